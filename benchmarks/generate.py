@@ -0,0 +1,241 @@
+""" Generate synthetic but realistically sized inputs for the benchmarks """
+
+import random
+import string
+
+import openpyxl
+import pandas as pd
+
+TD_HEADER = [
+    "Clinical indication ID", "Test ID", "Clinical Indication",
+    "Target/Genes", "Test Method", "Commissioning category",
+    "Specialist test group", "Technology",
+    "Changes since April 2023 publication"
+]
+NGS_TEST_METHODS = [
+    "WES or Large panel", "Small panel", "Medium panel", "WGS",
+    "Single gene sequencing <10 amplicons", "Small panel - deep sequencing"
+]
+OTHER_TEST_METHODS = [
+    "Karyotype", "MLPA or equivalent", "Targeted mutation testing",
+    "Methylation testing"
+]
+CANCER_HEADER = [
+    "Clinical indication ID", "Test ID", "Clinical Indication",
+    "Target/Genes", "Test Method", "Changes since April 2023 publication"
+]
+CANCER_TEST_METHODS = [
+    "Small panel", "Medium panel", "Large panel", "WGS",
+    "Simple targeted mutation testing", "Karyotype"
+]
+CHANGES = [
+    "No change", "Addition of gene", "Removal of gene", "New test",
+    "Panel renamed"
+]
+
+
+def random_symbol(rng: random.Random, used: set) -> str:
+    """ Generate a gene symbol that hasn't been used yet
+
+    Args:
+        rng (random.Random): Random generator
+        used (set): Symbols already generated
+
+    Returns:
+        str: Gene symbol like ABC12
+    """
+
+    while True:
+        symbol = "".join(
+            rng.choices(string.ascii_uppercase, k=rng.randint(2, 5))
+        ) + "".join(rng.choices(string.digits, k=rng.randint(0, 3)))
+
+        if len(symbol) > 1 and symbol not in used:
+            used.add(symbol)
+            return symbol
+
+
+def generate_hgnc_dump(path: str, nb_rows: int = 45000, seed: int = 0):
+    """ Write a TSV shaped like a HGNC custom download
+
+    Args:
+        path (str): Path to the TSV
+        nb_rows (int, optional): Number of genes
+        seed (int, optional): Seed of the random generator
+
+    Returns:
+        pd.DataFrame: Dataframe written to the TSV
+    """
+
+    rng = random.Random(seed)
+    used = set()
+    approved_symbols = [random_symbol(rng, used) for i in range(nb_rows)]
+    rows = []
+
+    for i, approved_symbol in enumerate(approved_symbols):
+        withdrawn = rng.random() < 0.05
+        previous_symbols = [
+            random_symbol(rng, used)
+            for j in range(rng.choice([0, 0, 0, 1, 1, 2, 3]))
+        ]
+        alias_symbols = [
+            random_symbol(rng, used)
+            for j in range(rng.choice([0, 0, 1, 1, 2, 3, 4]))
+        ]
+
+        # some aliases are shared between genes to get ambiguous symbols
+        if i and rng.random() < 0.02:
+            alias_symbols.append(rng.choice(rows)["Approved symbol"] + "L")
+
+        rows.append({
+            "HGNC ID": f"HGNC:{i + 1}",
+            "Approved symbol": (
+                f"{approved_symbol}~withdrawn" if withdrawn
+                else approved_symbol
+            ),
+            "Approved name": f"synthetic gene {approved_symbol.lower()}",
+            "Status": "Entry Withdrawn" if withdrawn else "Approved",
+            "Locus type": rng.choice(
+                ["gene with protein product", "RNA, long non-coding",
+                 "pseudogene"]
+            ),
+            "Previous symbols": ", ".join(previous_symbols) or None,
+            "Alias symbols": ", ".join(alias_symbols) or None,
+            "Chromosome": f"{rng.randint(1, 22)}q{rng.randint(11, 35)}",
+            "Accession numbers": f"AB{rng.randint(100000, 999999)}",
+            "RefSeq IDs": f"NM_{rng.randint(100000, 999999)}",
+        })
+
+    hgnc_dump = pd.DataFrame(rows)
+    hgnc_dump.to_csv(path, sep="\t", index=False)
+    return hgnc_dump
+
+
+def pick_gene_symbols(rng: random.Random, hgnc_dump: pd.DataFrame) -> list:
+    """ Pick symbols for a gene target, mostly approved symbols with some
+    previous, alias and unknown ones
+
+    Args:
+        rng (random.Random): Random generator
+        hgnc_dump (pd.DataFrame): Synthetic HGNC dump
+
+    Returns:
+        list: List of gene symbols
+    """
+
+    symbols = []
+
+    for i in range(rng.choice([1, 1, 1, 2, 3, 5, 10, 30])):
+        row = hgnc_dump.iloc[rng.randrange(len(hgnc_dump))]
+        kind = rng.random()
+
+        if kind < 0.05:
+            symbols.append(random_symbol(rng, set()))
+        elif kind < 0.1 and row["Previous symbols"]:
+            symbols.append(row["Previous symbols"].split(", ")[0])
+        elif kind < 0.15 and row["Alias symbols"]:
+            symbols.append(row["Alias symbols"].split(", ")[0])
+        else:
+            symbols.append(row["Approved symbol"])
+
+    return symbols
+
+
+def generate_test_directory(
+    path: str, hgnc_dump: pd.DataFrame, nb_rows: int = 3000, seed: int = 0,
+    cancer_rows: int = 0
+) -> list:
+    """ Write a workbook shaped like the "R&ID indications" sheet of the
+    national test directory, with the header on the second row
+
+    Args:
+        path (str): Path to the workbook
+        hgnc_dump (pd.DataFrame): Synthetic HGNC dump to pick symbols from
+        nb_rows (int, optional): Number of tests
+        seed (int, optional): Seed of the random generator
+        cancer_rows (int, optional): Number of tests of a "Cancer
+        indications" sheet, no sheet is added if 0
+
+    Returns:
+        list: Test ids of the NGS tests
+    """
+
+    rng = random.Random(seed)
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "R&ID indications"
+    sheet.append(["National genomic test directory - synthetic"])
+    sheet.append(TD_HEADER)
+
+    for cell in sheet[2]:
+        cell.font = openpyxl.styles.Font(bold=True)
+        cell.fill = openpyxl.styles.PatternFill("solid", fgColor="DDDDDD")
+
+    ngs_test_ids = []
+
+    for i in range(nb_rows):
+        r_code = f"R{i // 3 + 1}"
+        test_id = f"{r_code}.{i % 3 + 1}"
+        ngs = rng.random() < 0.7
+
+        if rng.random() < 0.5:
+            target = ", ".join(
+                f"Synthetic panel {j} ({rng.randint(1, 1500)})"
+                for j in range(rng.choice([1, 1, 2, 3]))
+            )
+        else:
+            target = ", ".join(pick_gene_symbols(rng, hgnc_dump))
+
+        if ngs:
+            test_method = rng.choice(NGS_TEST_METHODS)
+            technology = rng.choice(["WES", "CEN"])
+            ngs_test_ids.append(test_id)
+        else:
+            test_method = rng.choice(OTHER_TEST_METHODS)
+            technology = rng.choice(["MLPA", "Sanger", "Other"])
+
+        sheet.append([
+            r_code, test_id, f"Synthetic clinical indication {i}", target,
+            test_method, "Category", "Core", technology, rng.choice(CHANGES)
+        ])
+
+    if cancer_rows:
+        cancer_sheet = workbook.create_sheet("Cancer indications")
+        cancer_sheet.append(["National genomic test directory - synthetic"])
+        cancer_sheet.append(CANCER_HEADER)
+
+        for i in range(cancer_rows):
+            m_code = f"M{i // 2 + 1}"
+            cancer_sheet.append([
+                m_code, f"{m_code}.{i % 2 + 1}",
+                f"Synthetic cancer indication {i}",
+                ", ".join(pick_gene_symbols(rng, hgnc_dump)),
+                rng.choice(CANCER_TEST_METHODS), rng.choice(CHANGES)
+            ])
+
+    workbook.save(path)
+    return ngs_test_ids
+
+
+def generate_lab_excel(
+    path: str, test_ids: list, fraction: float = 0.8, seed: int = 0
+):
+    """ Write a lab excel listing a subset of the NGS tests
+
+    Args:
+        path (str): Path to the excel file
+        test_ids (list): Test ids of the NGS tests
+        fraction (float, optional): Fraction of the tests the lab handles
+        seed (int, optional): Seed of the random generator
+    """
+
+    rng = random.Random(seed)
+    lab_test_ids = rng.sample(test_ids, int(len(test_ids) * fraction))
+    pd.DataFrame(
+        {
+            "Test ID": lab_test_ids,
+            "NGS Technology": [
+                rng.choice(["WES", "CEN"]) for i in lab_test_ids
+            ]
+        }
+    ).to_excel(path, index=False)
@@ -0,0 +1,308 @@
+""" Time each stage of the rare disease pipeline on synthetic inputs and
+record the results in a JSON baseline
+
+python -m benchmarks.run [--td_rows 3000] [--hgnc_rows 45000] [-o out.json]
+python -m benchmarks.run --compare previous_baseline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks import generate
+from test_directory_parser import clinical_indication
+from test_directory_parser import hgnc
+from test_directory_parser import lookup_file
+from test_directory_parser import rare_disease
+from test_directory_parser import test_directory
+from test_directory_parser import utils
+
+CONFIG = (
+    Path(__file__).resolve().parent.parent / "configs" / "240226_RD.json"
+)
+
+
+def measure(stage, prepare=None, repeat: int = 3) -> dict:
+    """ Measure the wall time, CPU time and peak memory of a stage
+
+    Args:
+        stage (callable): Function running the stage, given the output of
+        prepare if there is one
+        prepare (callable, optional): Function run before each run of the
+        stage and not measured
+        repeat (int, optional): Number of timed runs, the best one is kept
+
+    Returns:
+        dict: Dict with the wall and CPU seconds and the peak memory in MB
+    """
+
+    wall_times = []
+    cpu_times = []
+
+    # silence the prints of the pipeline
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(repeat):
+            args = (prepare(),) if prepare else ()
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            stage(*args)
+            cpu_times.append(time.process_time() - cpu_start)
+            wall_times.append(time.perf_counter() - wall_start)
+
+        # memory is measured in a separate run as tracemalloc slows the code
+        # down
+        args = (prepare(),) if prepare else ()
+        tracemalloc.start()
+        stage(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        "wall_seconds": round(min(wall_times), 6),
+        "cpu_seconds": round(min(cpu_times), 6),
+        "peak_memory_mb": round(peak / 1024 / 1024, 3)
+    }
+
+
+def reset_test_directory(td: test_directory.TestDirectory):
+    """ Remove the clinical indications of a test directory object so that
+    its setup can be run again
+
+    Args:
+        td (TestDirectory): Test directory object
+
+    Returns:
+        TestDirectory: The same object
+    """
+
+    td.reset_clinical_indications()
+    return td
+
+
+def setup_and_resolve(td: test_directory.TestDirectory):
+    """ Setup the clinical indications and access their genes so that the
+    lazy target cleaning is included in the measure
+
+    Args:
+        td (TestDirectory): Test directory object
+    """
+
+    td.setup_clinical_indications()
+
+    for ci in td.ngs_clinical_indications:
+        ci.genes
+
+
+def run_benchmarks(
+    td_rows: int, hgnc_rows: int, repeat: int, tmp_dir: str
+) -> dict:
+    """ Generate the inputs and measure every stage
+
+    Args:
+        td_rows (int): Number of tests in the synthetic test directory
+        hgnc_rows (int): Number of genes in the synthetic HGNC dump
+        repeat (int): Number of timed runs per stage
+        tmp_dir (str): Directory for the generated inputs and outputs
+
+    Returns:
+        dict: Dict of stage names to their measures
+    """
+
+    hgnc_path = Path(tmp_dir) / "hgnc.tsv"
+    td_path = Path(tmp_dir) / "test_directory.xlsx"
+    lab_path = Path(tmp_dir) / "lab.xlsx"
+    output_path = Path(tmp_dir) / "output.json"
+    lookup_path = Path(tmp_dir) / "hgnc.bin"
+
+    print("Generating inputs...", file=sys.stderr)
+    hgnc_dump = generate.generate_hgnc_dump(hgnc_path, hgnc_rows)
+    ngs_test_ids = generate.generate_test_directory(
+        td_path, hgnc_dump, td_rows
+    )
+    generate.generate_lab_excel(lab_path, ngs_test_ids)
+
+    config = rare_disease.parse_config(CONFIG)
+    hgnc_dump = utils.parse_tsv(hgnc_path)
+    hgnc_index = hgnc.HgncIndex(hgnc_dump)
+    lookup_file.compile_lookup_file(hgnc_index, lookup_path)
+    hgnc_lookup_file = lookup_file.HgncLookupFile(lookup_path)
+    sheet, change_column = rare_disease.parse_rare_disease_td(td_path, config)
+    tokens = clinical_indication.parse_targets(sheet[config["panel_column"]])
+    gene_symbols = tokens.loc[tokens["kind"] == "gene", "token"].unique()
+    # the dataframe lookup is too slow to go through every symbol
+    sampled_symbols = gene_symbols[:50]
+    td = test_directory.TestDirectory(
+        td_path, CONFIG, "rare_disease", hgnc_index
+    )
+    lab_df = utils.parse_lab_excel(lab_path)
+
+    stages = {
+        "parse_tsv": (lambda: utils.parse_tsv(hgnc_path), None),
+        "read_hgnc_dump": (lambda: hgnc.read_hgnc_dump(hgnc_path), None),
+        "build_hgnc_index": (lambda: hgnc.HgncIndex(hgnc_dump), None),
+        "find_hgnc_id_dataframe_x50": (
+            lambda: [
+                utils.find_hgnc_id(symbol, hgnc_dump)
+                for symbol in sampled_symbols
+            ], None
+        ),
+        "find_hgnc_id_index": (
+            lambda: [
+                utils.find_hgnc_id(symbol, hgnc_index)
+                for symbol in gene_symbols
+            ], None
+        ),
+        "open_lookup_file": (
+            lambda: lookup_file.HgncLookupFile(lookup_path), None
+        ),
+        "find_hgnc_id_lookup_file": (
+            lambda: [
+                utils.find_hgnc_id(symbol, hgnc_lookup_file)
+                for symbol in gene_symbols
+            ], None
+        ),
+        "find_hgnc_ids_dataframe": (
+            lambda: utils.find_hgnc_ids(gene_symbols, hgnc_dump), None
+        ),
+        "find_hgnc_ids_index": (
+            lambda: utils.find_hgnc_ids(gene_symbols, hgnc_index), None
+        ),
+        "parse_rare_disease_td": (
+            lambda: rare_disease.parse_rare_disease_td(td_path, config), None
+        ),
+        "parse_rare_disease_td_streaming": (
+            lambda: rare_disease.parse_rare_disease_td(
+                td_path, config, streaming=True
+            ), None
+        ),
+        "setup_clinical_indications": (
+            setup_and_resolve, lambda: reset_test_directory(td)
+        ),
+        "filter_clinical_indications": (
+            lambda td: td.filter_clinical_indications(lab_df, False),
+            lambda: setattr(td, "filtered_clinical_indications", None) or td
+        ),
+        "output_json": (lambda: td.output_json(output_path), None),
+        "output_json_ndjson": (
+            lambda: td.output_json(output_path, "ndjson"), None
+        ),
+    }
+
+    results = {}
+
+    for name, (stage, prepare) in stages.items():
+        print(f"Running {name}...", file=sys.stderr)
+        results[name] = measure(stage, prepare, repeat)
+
+    return results
+
+
+def get_commit() -> str:
+    """ Get the current git commit if available
+
+    Returns:
+        str: Commit hash or None
+    """
+
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """ Print the ratio of every stage against a baseline
+
+    Args:
+        results (dict): Stage measures of the current run
+        baseline (dict): Stage measures of the baseline
+        threshold (float): Ratio of wall time above which a stage is
+        considered a regression
+
+    Returns:
+        list: Names of the stages that regressed
+    """
+
+    regressions = []
+    print(f"\n{'stage':<35}{'baseline':>12}{'current':>12}{'ratio':>8}")
+
+    for name, measures in results.items():
+        if name not in baseline:
+            continue
+
+        previous = baseline[name]["wall_seconds"]
+        current = measures["wall_seconds"]
+        ratio = current / previous if previous else float("inf")
+        flag = ""
+
+        if ratio > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+
+        print((
+            f"{name:<35}{previous:>12.4f}{current:>12.4f}{ratio:>8.2f}"
+            f"{flag}"
+        ))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--td_rows", type=int, default=3000)
+    parser.add_argument("--hgnc_rows", type=int, default=45000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "-o", "--output", default="benchmark.json",
+        help="Path to the JSON results"
+    )
+    parser.add_argument(
+        "--compare", help="Previous JSON results to compare against"
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=1.2,
+        help="Wall time ratio above which a stage is a regression"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results = run_benchmarks(
+            args.td_rows, args.hgnc_rows, args.repeat, tmp_dir
+        )
+
+    data = {
+        "commit": get_commit(), "python": platform.python_version(),
+        "td_rows": args.td_rows, "hgnc_rows": args.hgnc_rows,
+        "stages": results
+    }
+
+    with open(args.output, "w") as f:
+        json.dump(data, f, indent=2)
+
+    for name, measures in results.items():
+        print((
+            f"{name:<35}{measures['wall_seconds']:>10.4f}s"
+            f"{measures['peak_memory_mb']:>10.1f}MB"
+        ))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+        if compare(results, baseline["stages"], args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+""" Measure the speedup of building the clinical indications in a process
+pool against the number of processes
+
+python -m benchmarks.sharding [--td_rows 20000] [--hgnc_rows 45000]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+from benchmarks import generate
+from test_directory_parser import hgnc
+from test_directory_parser import test_directory
+
+CONFIG = (
+    Path(__file__).resolve().parent.parent / "configs" / "240226_RD.json"
+)
+
+
+def time_setup(
+    td: test_directory.TestDirectory, processes: int, repeat: int
+) -> float:
+    """ Time the setup of the clinical indications with their targets cleaned
+
+    Args:
+        td (TestDirectory): Test directory object
+        processes (int): Number of processes, 1 for the serial path
+        repeat (int): Number of timed runs, the best one is kept
+
+    Returns:
+        float: Wall time in seconds
+    """
+
+    times = []
+
+    for i in range(repeat):
+        td.reset_clinical_indications()
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            td.setup_clinical_indications(processes=processes)
+
+            for ci in td.ngs_clinical_indications:
+                ci.genes
+
+            times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--td_rows", type=int, default=20000)
+    parser.add_argument("--hgnc_rows", type=int, default=45000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--processes", type=int, nargs="+",
+        help=(
+            "Numbers of processes to measure, defaults to powers of 2 up to "
+            "the number of cores"
+        )
+    )
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    processes_to_measure = args.processes or sorted(
+        {1, cores} | {2 ** i for i in range(1, cores.bit_length())}
+    )
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        hgnc_path = Path(tmp_dir) / "hgnc.tsv"
+        td_path = Path(tmp_dir) / "test_directory.xlsx"
+
+        print("Generating inputs...", file=sys.stderr)
+        hgnc_dump = generate.generate_hgnc_dump(hgnc_path, args.hgnc_rows)
+        generate.generate_test_directory(td_path, hgnc_dump, args.td_rows)
+        td = test_directory.TestDirectory(
+            td_path, CONFIG, "rare_disease", hgnc.load_hgnc_index(hgnc_path)
+        )
+
+        print(f"{cores} cores")
+        print(f"{'processes':>10}{'seconds':>10}{'speedup':>10}")
+        serial_time = None
+
+        for processes in processes_to_measure:
+            elapsed = time_setup(td, processes, args.repeat)
+            serial_time = serial_time or elapsed
+            print((
+                f"{processes:>10}{elapsed:>10.3f}"
+                f"{serial_time / elapsed:>10.2f}"
+            ))
+
+
+if __name__ == "__main__":
+    main()
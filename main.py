@@ -1,33 +1,376 @@
 import argparse
+from pathlib import Path
+import time
 
-from test_directory_parser import utils
-from test_directory_parser import test_directory
+# pandas, numpy and regex are imported by the modules used in the commands so
+# they are only imported when a command needs them, not for --help or
+# argument errors
+from test_directory_parser import cache
+from test_directory_parser import json_output
+
+
+def load_hgnc_data(args):
+    """ Load the compiled HGNC lookup file if given, the HGNC dump otherwise
+
+    Args:
+        args (Namespace): Arguments of the command line
+
+    Returns:
+        HgncResolver: HgncLookupFile or HgncIndex
+    """
+
+    if args.hgnc_lookup:
+        from test_directory_parser import lookup_file
+
+        return lookup_file.HgncLookupFile(args.hgnc_lookup)
+
+    from test_directory_parser import hgnc
+
+    return hgnc.load_hgnc_index(
+        args.hgnc, args.cache_dir, args.drop_withdrawn
+    )
+
+
+def get_default_output(args, td_type: str = "RD") -> str:
+    """ Get the default name of the output of a sheet type
+
+    Args:
+        args (Namespace): Arguments of the command line
+        td_type (str, optional): Sheet type in the output name, RD or cancer
+
+    Returns:
+        str: Output name i.e. 240226_RD_TD.json
+    """
+
+    from test_directory_parser import utils
+
+    date = utils.get_date()
+    extension = "ndjson" if args.output_format == "ndjson" else "json"
+    output = f"{date}_{td_type}_TD.{extension}"
+
+    if args.gzip:
+        output = f"{output}.gz"
+
+    return output
+
+
+def get_delta_output(output: str) -> str:
+    """ Get the default path of the delta output, next to the output
+
+    Args:
+        output (str): Path to the output
+
+    Returns:
+        str: Path to the delta output i.e. 240226_RD_TD_delta.json
+    """
+
+    name = Path(output).name
+
+    # only the suffixes of the output formats are removed so that dots in
+    # the rest of the name are kept
+    for suffix in [".gz", ".json", ".ndjson"]:
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+
+    return str(Path(output).with_name(f"{name}_delta.json"))
+
+
+def get_config(args, td_type: str = "rare_disease") -> str:
+    """ Get the config given with --config or select it from the header of
+    the test directory with --auto_config. With both, the config given is
+    preferred whenever it matches the header
+
+    Args:
+        args (Namespace): Arguments of the command line
+        td_type (str, optional): Type of the sheet i.e. rare_disease, cancer
+
+    Raises:
+        Exception: if no config is given or none matches the test directory
+
+    Returns:
+        str: Path to the config
+    """
+
+    if not args.auto_config:
+        if not args.config:
+            raise Exception("--config or --auto_config is required")
+
+        return args.config
+
+    from test_directory_parser import rare_disease
+
+    start = time.perf_counter()
+    config_paths = sorted(
+        str(path) for path in Path(args.config_dir).glob("*.json")
+    )
+    config = rare_disease.select_config(
+        args.test_directory, config_paths, td_type, args.config
+    )
+    print(
+        f"Selected {config} for the {td_type} sheet in "
+        f"{time.perf_counter() - start:.3f}s"
+    )
+    return config
 
 
 def main(args):
     cmd = args.cmd
 
-    if cmd == "rare_disease":
-        if args.output:
-            output = args.output
+    if args.clear_cache:
+        if not args.cache_dir:
+            raise Exception("--clear_cache requires --cache_dir")
+
+        cache.clear_cache(args.cache_dir)
+
+        # clearing the cache is enough on its own
+        if cmd is None:
+            return
+
+    if cmd in ("rare_disease", "diff"):
+        from test_directory_parser import diff
+        from test_directory_parser import pipeline
+
+        output = args.output or get_default_output(args)
+        # the config is selected before loading the HGNC data to fail fast
+        config = get_config(args)
+
+        # index the HGNC symbols once for all the clinical indications
+        hgnc_data = load_hgnc_data(args)
+
+        if cmd == "diff":
+            # only the clinical indications that changed since the previous
+            # output get their targets cleaned again
+            previous_output = json_output.load_output(
+                args.previous_output
+            )
+            previous_indications = previous_output["indications"]
         else:
-            date = utils.get_date()
-            output = f"{date}_RD_TD.json"
+            previous_indications = None
+
+        rd_test_directory = pipeline.run_rare_disease(
+            args.test_directory, config, hgnc_data, output,
+            args.lab_excel, args.streaming, args.cache_dir,
+            previous_indications, not args.lenient, args.output_format,
+            args.gzip, args.processes
+        )
+
+        if cmd == "diff":
+            delta_output = args.delta_output or get_delta_output(output)
+
+            diff.output_delta(
+                previous_output, rd_test_directory.get_indications(),
+                rd_test_directory.td, delta_output
+            )
 
-        hgnc_data = utils.parse_tsv(args.hgnc)
-        rd_test_directory = test_directory.TestDirectory(
-            args.test_directory, args.config, "rare_disease", hgnc_data
+    elif cmd == "batch":
+        from test_directory_parser import batch
+
+        jobs = batch.parse_manifest(args.manifest)
+        start = time.perf_counter()
+        # the HGNC data is loaded once and handed to every worker process,
+        # a lookup file is only sent as its path and shared between them
+        hgnc_data = load_hgnc_data(args)
+        results = batch.run_batch(
+            jobs, hgnc_data, args.processes, args.streaming, args.cache_dir
+        )
+        batch.print_summary(results, time.perf_counter() - start)
+
+        failed_jobs = [job for job, elapsed, error in results if error]
+
+        if failed_jobs:
+            raise Exception(f"{len(failed_jobs)} jobs failed")
+
+    elif cmd == "compile_hgnc":
+        from test_directory_parser import hgnc
+        from test_directory_parser import lookup_file
+
+        hgnc_index = hgnc.load_hgnc_index(
+            args.hgnc, args.cache_dir, args.drop_withdrawn
         )
-        rd_test_directory.setup_clinical_indications()
+        lookup_file.compile_lookup_file(hgnc_index, args.lookup_file)
+        print(f"HGNC lookup file written to {args.lookup_file}")
+
+    elif cmd == "watch":
+        import asyncio
+
+        from test_directory_parser import watch
 
-        if args.lab_excel:
-            lab_df = utils.parse_lab_excel(args.lab_excel)
-            rd_test_directory.filter_clinical_indications(lab_df)
+        config_paths = sorted(str(path) for path in Path(
+            args.config_dir
+        ).glob("*.json"))
+        # the HGNC data is loaded once and kept by the worker processes for
+        # every workbook parsed
+        hgnc_data = load_hgnc_data(args)
+        print(f"Watching {args.directory}")
 
-        rd_test_directory.output_json(output)
+        try:
+            asyncio.run(
+                watch.watch(
+                    args.directory, config_paths, hgnc_data, args.output,
+                    args.lab_excel, args.processes, args.interval,
+                    args.settle, args.streaming, args.cache_dir, args.config
+                )
+            )
+        except KeyboardInterrupt:
+            pass
+
+    elif cmd == "serve":
+        from test_directory_parser import service
+
+        parse_service = service.ParseService(
+            args.hgnc, args.hgnc_lookup, args.cache_dir, args.drop_withdrawn
+        )
+        server = service.create_server(parse_service, args.host, args.port)
+        host, port = server.server_address[:2]
+        print(f"Serving on http://{host}:{port} (POST /parse, POST /reload)")
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+    elif cmd in ("cancer", "release"):
+        from test_directory_parser import pipeline
+
+        if cmd == "cancer":
+            configs = {"cancer": get_config(args, "cancer")}
+            outputs = {
+                "cancer": args.output or get_default_output(args, "cancer")
+            }
+        else:
+            configs = {}
 
-    elif cmd == "cancer":
-        print("Parsing of the cancer test directory is not implemented yet")
+            if args.rd_config:
+                configs["rare_disease"] = args.rd_config
+            elif args.auto_config:
+                configs["rare_disease"] = get_config(args)
+
+            if args.cancer_config:
+                configs["cancer"] = args.cancer_config
+            elif args.auto_config:
+                configs["cancer"] = get_config(args, "cancer")
+
+            if not configs:
+                raise Exception(
+                    "release requires --rd_config, --cancer_config or "
+                    "--auto_config"
+                )
+
+            output_dir = Path(args.output or ".")
+            outputs = {
+                td_type: str(output_dir / get_default_output(
+                    args, "RD" if td_type == "rare_disease" else "cancer"
+                ))
+                for td_type in configs
+            }
+
+        hgnc_data = load_hgnc_data(args)
+        # the sheets of every type are extracted from one opening of the
+        # workbook
+        pipeline.run_release(
+            args.test_directory, configs, hgnc_data, outputs,
+            getattr(args, "lab_excel", None), args.cache_dir,
+            not getattr(args, "lenient", False), args.output_format,
+            args.gzip, args.processes
+        )
+
+    elif cmd in ("db_import", "db_export", "db_query"):
+        from test_directory_parser import store
+
+        connection = store.connect(args.database)
+
+        try:
+            if cmd == "db_import":
+                # every output is inserted in its own transaction
+                for output in args.outputs:
+                    release_id = store.import_output(
+                        connection, output, args.replace
+                    )
+                    print(f"Imported {output} as release {release_id}")
+
+            elif cmd == "db_export":
+                output = args.output or get_default_output(args)
+                store.export_output(
+                    connection, args.release_id, output, args.output_format,
+                    args.gzip
+                )
+                print(f"Release {args.release_id} written to {output}")
+
+            elif args.releases:
+                rows = store.list_releases(connection)
+
+                if rows:
+                    print("\t".join(rows[0]))
+
+                for row in rows:
+                    print("\t".join(str(value) for value in row.values()))
+
+            else:
+                rows = store.query_indications(
+                    connection, args.hgnc_id, args.panel_id, args.r_code
+                )
+                print("\t".join(store.QUERY_COLUMNS))
+
+                for row in rows:
+                    print("\t".join(str(value) for value in row.values()))
+
+        finally:
+            connection.close()
+
+    elif cmd == "query":
+        from test_directory_parser import indication_index
+
+        output_data, index = indication_index.load_index(args.saved_output)
+        print(f"{len(index)} indications in {output_data['td_source']}")
+        print("code\tname\ttest_method\tpanels")
+
+        for indication in index.find(
+            args.hgnc_id, args.panel_id, args.test_method
+        ):
+            print("\t".join([
+                indication["code"], indication["name"],
+                indication["test_method"],
+                ", ".join(str(target) for target in indication["panels"])
+            ]))
+
+    elif cmd == "history_import":
+        from test_directory_parser import history
+
+        release_history = history.load_history(args.history)
+        nb_releases = release_history.add_outputs(args.outputs)
+        release_history.save(args.history)
+        print(
+            f"Added {nb_releases} releases to {args.history}, "
+            f"{len(release_history.releases)} releases in total"
+        )
+
+    elif cmd == "history":
+        from test_directory_parser import history
+
+        release_history = history.ReleaseHistory.load(args.history)
+        timeline = release_history.get_timeline(args.target, args.r_code)
+        # + targeted, - listed without the target, . test code not listed
+        print("\t".join(
+            ["code"] + [release["date"] for release in timeline["releases"]]
+        ))
+
+        for code, targeted, listed in zip(
+            timeline["codes"], timeline["targeted"], timeline["listed"]
+        ):
+            print("\t".join([code] + [
+                "+" if is_targeted else "-" if is_listed else "."
+                for is_targeted, is_listed in zip(targeted, listed)
+            ]))
+
+        print()
+
+        for change in release_history.get_changes(args.target, args.r_code):
+            print(
+                f"{change['code']}\t{change['change']}\t{change['date']}\t"
+                f"{change['td_source']}"
+            )
 
     else:
         raise Exception(f"'{cmd}' is not a valid option")
@@ -48,18 +391,383 @@ if __name__ == "__main__":
             "actually handles"
         )
     )
+    rare_disease_parser.add_argument(
+        "-streaming", "--streaming", action="store_true",
+        help=(
+            "Read the test directory row by row using a read-only workbook, "
+            "only keeping the columns and rows of interest"
+        )
+    )
+    rare_disease_parser.add_argument(
+        "-lenient", "--lenient", action="store_true",
+        help=(
+            "Only warn about tests of the lab excel missing from the test "
+            "directory instead of failing"
+        )
+    )
+    rare_disease_parser.add_argument(
+        "-processes", "--processes", type=int,
+        help=(
+            "Number of processes to build the clinical indications with, "
+            "useful for very large sheets"
+        )
+    )
     rare_disease_parser.set_defaults(which="rare_disease")
 
+    diff_parser = subparsers.add_parser("diff")
+    diff_parser.add_argument(
+        "previous_output",
+        help="Rare disease JSON output of the previous test directory"
+    )
+    diff_parser.add_argument("test_directory", help="Path to test directory")
+    diff_parser.add_argument(
+        "-lab_excel", "--lab_excel",
+        help=(
+            "Excel file containing the clinical indications that the CUH lab "
+            "actually handles"
+        )
+    )
+    diff_parser.add_argument(
+        "-streaming", "--streaming", action="store_true",
+        help=(
+            "Read the test directory row by row using a read-only workbook, "
+            "only keeping the columns and rows of interest"
+        )
+    )
+    diff_parser.add_argument(
+        "-delta_output", "--delta_output",
+        help=(
+            "Output path and name of the delta JSON, defaults to the output "
+            "name with a '_delta' suffix"
+        )
+    )
+    diff_parser.add_argument(
+        "-lenient", "--lenient", action="store_true",
+        help=(
+            "Only warn about tests of the lab excel missing from the test "
+            "directory instead of failing"
+        )
+    )
+    diff_parser.add_argument(
+        "-processes", "--processes", type=int,
+        help=(
+            "Number of processes to build the clinical indications with, "
+            "useful for very large sheets"
+        )
+    )
+    diff_parser.set_defaults(which="diff")
+
+    batch_parser = subparsers.add_parser("batch")
+    batch_parser.add_argument(
+        "manifest",
+        help=(
+            "JSON file containing a list of jobs with the 'test_directory', "
+            "'config', 'output' and optionally 'lab_excel' keys"
+        )
+    )
+    batch_parser.add_argument(
+        "-processes", "--processes", type=int,
+        help="Number of processes to use, defaults to the number of cores"
+    )
+    batch_parser.add_argument(
+        "-streaming", "--streaming", action="store_true",
+        help=(
+            "Read the test directories row by row using a read-only workbook"
+        )
+    )
+    batch_parser.set_defaults(which="batch")
+
+    compile_hgnc_parser = subparsers.add_parser("compile_hgnc")
+    compile_hgnc_parser.add_argument(
+        "lookup_file",
+        help=(
+            "Path to the binary lookup file compiled from the HGNC dump given "
+            "with --hgnc"
+        )
+    )
+    compile_hgnc_parser.set_defaults(which="compile_hgnc")
+
+    watch_parser = subparsers.add_parser("watch")
+    watch_parser.add_argument(
+        "directory", help="Directory in which test directories are dropped"
+    )
+    watch_parser.add_argument(
+        "-lab_excel", "--lab_excel",
+        help=(
+            "Excel file containing the clinical indications that the CUH lab "
+            "actually handles, every test directory is parsed again when it "
+            "changes"
+        )
+    )
+    watch_parser.add_argument(
+        "-processes", "--processes", type=int,
+        help="Number of processes to use, defaults to the number of cores"
+    )
+    watch_parser.add_argument(
+        "-interval", "--interval", type=float, default=2,
+        help="Seconds between 2 scans of the directory"
+    )
+    watch_parser.add_argument(
+        "-settle", "--settle", type=float, default=2,
+        help=(
+            "Seconds during which a test directory must not change before "
+            "being parsed"
+        )
+    )
+    watch_parser.add_argument(
+        "-streaming", "--streaming", action="store_true",
+        help=(
+            "Read the test directories row by row using a read-only workbook"
+        )
+    )
+    watch_parser.set_defaults(which="watch")
+
+    serve_parser = subparsers.add_parser("serve")
+    serve_parser.add_argument(
+        "-host", "--host", default="127.0.0.1",
+        help="Host to listen on, defaults to localhost only"
+    )
+    serve_parser.add_argument(
+        "-port", "--port", type=int, default=8000,
+        help="Port to listen on"
+    )
+    serve_parser.set_defaults(which="serve")
+
     cancer_parser = subparsers.add_parser("cancer")
     cancer_parser.add_argument("test_directory", help="Path to test directory")
+    cancer_parser.add_argument(
+        "-processes", "--processes", type=int,
+        help=(
+            "Number of processes to build the clinical indications with, "
+            "useful for very large sheets"
+        )
+    )
     cancer_parser.set_defaults(which="cancer")
 
+    release_parser = subparsers.add_parser("release")
+    release_parser.add_argument(
+        "test_directory",
+        help=(
+            "Path to a test directory containing several sheets, one output "
+            "per sheet type is written in the --output directory"
+        )
+    )
+    release_parser.add_argument(
+        "-rd_config", "--rd_config",
+        help="Config file of the rare disease sheet"
+    )
+    release_parser.add_argument(
+        "-cancer_config", "--cancer_config",
+        help="Config file of the cancer sheet"
+    )
+    release_parser.add_argument(
+        "-lab_excel", "--lab_excel",
+        help=(
+            "Excel file containing the rare disease clinical indications that "
+            "the CUH lab actually handles"
+        )
+    )
+    release_parser.add_argument(
+        "-lenient", "--lenient", action="store_true",
+        help=(
+            "Only warn about tests of the lab excel missing from the test "
+            "directory instead of failing"
+        )
+    )
+    release_parser.add_argument(
+        "-processes", "--processes", type=int,
+        help=(
+            "Number of processes to build the clinical indications with, "
+            "useful for very large sheets"
+        )
+    )
+    release_parser.set_defaults(which="release")
+
+    db_import_parser = subparsers.add_parser("db_import")
+    db_import_parser.add_argument(
+        "database", help="Path to the SQLite indication store"
+    )
+    db_import_parser.add_argument(
+        "outputs", nargs="+",
+        help="Outputs of the rare_disease, diff or cancer commands to import"
+    )
+    db_import_parser.add_argument(
+        "-replace", "--replace", action="store_true",
+        help=(
+            "Replace the releases already stored with the same test "
+            "directory, config and date"
+        )
+    )
+    db_import_parser.set_defaults(which="db_import")
+
+    db_export_parser = subparsers.add_parser("db_export")
+    db_export_parser.add_argument(
+        "database", help="Path to the SQLite indication store"
+    )
+    db_export_parser.add_argument(
+        "release_id", type=int,
+        help="Id of the release to write to --output, see db_query --releases"
+    )
+    db_export_parser.set_defaults(which="db_export")
+
+    db_query_parser = subparsers.add_parser("db_query")
+    db_query_parser.add_argument(
+        "database", help="Path to the SQLite indication store"
+    )
+    db_query_group = db_query_parser.add_mutually_exclusive_group(
+        required=True
+    )
+    db_query_group.add_argument(
+        "-hgnc_id", "--hgnc_id",
+        help="Find the indications targeting a HGNC id i.e. HGNC:1100"
+    )
+    db_query_group.add_argument(
+        "-panel_id", "--panel_id",
+        help="Find the indications targeting a panelapp panel"
+    )
+    db_query_group.add_argument(
+        "-r_code", "--r_code",
+        help="Find the indications of a R code (R1) or test code (R1.1)"
+    )
+    db_query_group.add_argument(
+        "-releases", "--releases", action="store_true",
+        help="List the stored releases"
+    )
+    db_query_parser.set_defaults(which="db_query")
+
+    query_parser = subparsers.add_parser("query")
+    query_parser.add_argument(
+        "saved_output",
+        help="Output of the rare_disease, diff or cancer commands"
+    )
+    query_group = query_parser.add_mutually_exclusive_group(required=True)
+    query_group.add_argument(
+        "-hgnc_id", "--hgnc_id",
+        help="Find the indications targeting a HGNC id i.e. HGNC:1100"
+    )
+    query_group.add_argument(
+        "-panel_id", "--panel_id",
+        help="Find the indications targeting a panelapp panel"
+    )
+    query_group.add_argument(
+        "-test_method", "--test_method",
+        help="Find the indications using a test method i.e. WGS"
+    )
+    query_parser.set_defaults(which="query")
+
+    history_import_parser = subparsers.add_parser("history_import")
+    history_import_parser.add_argument(
+        "history",
+        help="Path to the release history archive, created if it is missing"
+    )
+    history_import_parser.add_argument(
+        "outputs", nargs="+",
+        help="Outputs of the rare_disease, diff or cancer commands to add"
+    )
+    history_import_parser.set_defaults(which="history_import")
+
+    history_parser = subparsers.add_parser("history")
+    history_parser.add_argument(
+        "history", help="Path to the release history archive"
+    )
+    history_parser.add_argument(
+        "target", help="HGNC id (i.e. HGNC:1100) or panelapp id to follow"
+    )
+    history_parser.add_argument(
+        "-r_code", "--r_code",
+        help=(
+            "R code (R1) or test code (R1.1) to restrict the timeline to, "
+            "every test code that ever targeted it by default"
+        )
+    )
+    history_parser.set_defaults(which="history")
+
     parser.add_argument(
         "-c", "--config",
-        help="Config file to know which sheet to gather for example"
+        help=(
+            "Config file to know which sheet to gather for example. With "
+            "--auto_config or the watch command, config preferred whenever "
+            "it matches the header i.e. between configs matching equally"
+        )
+    )
+    parser.add_argument(
+        "-auto_config", "--auto_config", "--auto-config", action="store_true",
+        help=(
+            "Select the config from --config_dir by matching the sheet names "
+            "and header of the test directory, without loading its data"
+        )
+    )
+    parser.add_argument(
+        "-config_dir", "--config_dir",
+        default=str(Path(__file__).resolve().parent / "configs"),
+        help=(
+            "Directory of the configs to select from using the header of the "
+            "test directories, for --auto_config and the watch command"
+        )
     )
     parser.add_argument("-hgnc", "--hgnc", help="Path to the hgnc dump")
-    parser.add_argument("-o", "--output", help="Output path and name")
+    parser.add_argument(
+        "-hgnc_lookup", "--hgnc_lookup",
+        help=(
+            "Path to a lookup file compiled with the compile_hgnc command, "
+            "used instead of the HGNC dump"
+        )
+    )
+    parser.add_argument(
+        "-drop_withdrawn", "--drop_withdrawn", action="store_true",
+        help=(
+            "Ignore the withdrawn entries of the HGNC dump when resolving "
+            "gene symbols"
+        )
+    )
+    parser.add_argument(
+        "-o", "--output",
+        help=(
+            "Output path and name, or output directory for the watch "
+            "(defaults to the watched directory) and release commands"
+        )
+    )
+    parser.add_argument(
+        "-output_format", "--output_format", default="json",
+        choices=json_output.OUTPUT_FORMATS,
+        help=(
+            "Format of the output: indented JSON (default), compact JSON or "
+            "newline delimited JSON with one indication per line"
+        )
+    )
+    parser.add_argument(
+        "-gzip", "--gzip", action="store_true", help="Gzip the output"
+    )
+    parser.add_argument(
+        "-cache_dir", "--cache_dir",
+        help=(
+            "Directory used to cache the parsed HGNC dump and test directory "
+            "sheets between runs. Entries are invalidated when the files "
+            "change"
+        )
+    )
+    parser.add_argument(
+        "--clear_cache", action="store_true",
+        help="Remove every entry of the cache directory before running"
+    )
+    parser.add_argument(
+        "-profile", "--profile",
+        help=(
+            "Path to a JSON report of the wall time, CPU time and peak memory "
+            "of every stage and of the HGNC lookups. Worker processes of the "
+            "batch command are not profiled"
+        )
+    )
+    parser.add_argument(
+        "-cprofile", "--cprofile",
+        help="Path to a cProfile dump of the run, readable with pstats"
+    )
 
     args = parser.parse_args()
-    main(args)
+
+    if args.profile or args.cprofile:
+        from test_directory_parser import profiling
+
+        profiling.run_profiled(main, args, args.profile, args.cprofile)
+    else:
+        main(args)
@@ -0,0 +1,153 @@
+from concurrent.futures import ProcessPoolExecutor
+import json
+import time
+import traceback
+
+from test_directory_parser import pipeline
+
+# HGNC data of the worker processes, set once per worker by init_worker
+HGNC_DATA = None
+
+
+def parse_manifest(manifest: str) -> list:
+    """ Parse the batch manifest
+
+    Args:
+        manifest (str): Path to a JSON file containing a list of jobs with
+        the "test_directory", "config" and "output" keys and optionally the
+        "lab_excel" key
+
+    Raises:
+        Exception: if a job is missing a required key
+
+    Returns:
+        list: List of dicts, one per job
+    """
+
+    with open(manifest) as f:
+        jobs = json.load(f)
+
+    for i, job in enumerate(jobs):
+        missing_keys = [
+            key for key in ["test_directory", "config", "output"]
+            if key not in job
+        ]
+
+        if missing_keys:
+            raise Exception(
+                f"Job {i} of {manifest} is missing: {', '.join(missing_keys)}"
+            )
+
+    return jobs
+
+
+def init_worker(hgnc_data):
+    """ Store the HGNC data in the worker process so that it is sent once per
+    worker instead of once per job
+
+    Args:
+        hgnc_data (HgncIndex): HGNC dump dataframe or HgncIndex built from it
+    """
+
+    global HGNC_DATA
+    HGNC_DATA = hgnc_data
+
+
+def run_job(job: dict, streaming: bool = False, cache_dir: str = None):
+    """ Run a rare disease parsing job in a worker process
+
+    Args:
+        job (dict): Dict with the job's test directory, config, output and
+        optional lab excel
+        streaming (bool, optional): Whether to read the test directory row by
+        row using a read-only workbook
+        cache_dir (str, optional): Path to the cache directory
+
+    Returns:
+        tuple: Wall time of the job in seconds and the traceback of the error
+        if the job failed, None otherwise
+    """
+
+    start = time.perf_counter()
+
+    try:
+        pipeline.run_rare_disease(
+            job["test_directory"], job["config"], HGNC_DATA, job["output"],
+            job.get("lab_excel"), streaming, cache_dir
+        )
+    except Exception:
+        return time.perf_counter() - start, traceback.format_exc()
+
+    return time.perf_counter() - start, None
+
+
+def run_batch(
+    jobs: list, hgnc_data, processes: int = None, streaming: bool = False,
+    cache_dir: str = None
+) -> list:
+    """ Run the jobs on a process pool, a failing job doesn't stop the others
+
+    Args:
+        jobs (list): List of jobs from parse_manifest
+        hgnc_data (HgncIndex): HGNC dump dataframe or HgncIndex built from it
+        processes (int, optional): Number of worker processes, defaults to
+        the number of cores
+        streaming (bool, optional): Whether to read the test directories row
+        by row using a read-only workbook
+        cache_dir (str, optional): Path to the cache directory
+
+    Returns:
+        list: List of (job, wall time, error) tuples in the manifest order
+    """
+
+    results = []
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(
+        max_workers=processes, initializer=init_worker,
+        initargs=(hgnc_data,)
+    ) as executor:
+        futures = [
+            executor.submit(run_job, job, streaming, cache_dir)
+            for job in jobs
+        ]
+
+        for job, future in zip(jobs, futures):
+            try:
+                results.append((job, *future.result()))
+            except Exception:
+                # i.e. BrokenProcessPool when a worker process died, the
+                # wall time of the job is unknown
+                results.append(
+                    (job, time.perf_counter() - start, traceback.format_exc())
+                )
+
+    return results
+
+
+def print_summary(results: list, total_time: float):
+    """ Print the timing and status of every job of the batch
+
+    Args:
+        results (list): List of (job, wall time, error) tuples
+        total_time (float): Wall time of the whole batch in seconds
+    """
+
+    print("\nBatch summary:")
+
+    for job, elapsed, error in results:
+        status = "FAILED" if error else "OK"
+        print((
+            f"{status}\t{elapsed:.2f}s\t{job['test_directory']}\t"
+            f"{job['output']}"
+        ))
+
+    for job, elapsed, error in results:
+        if error:
+            print(f"\nError for {job['test_directory']}:\n{error}")
+
+    cumulated_time = sum(elapsed for job, elapsed, error in results)
+    print((
+        f"\n{len(results)} jobs in {total_time:.2f}s "
+        f"({cumulated_time:.2f}s cumulated)"
+    ))
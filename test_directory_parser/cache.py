@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+import pickle
+import re
+
+# bump when the content of the cached objects changes shape
+CACHE_VERSION = 1
+# names of the entries written by store_cached, of any version, and of their
+# temporary files
+ENTRY_NAME = re.compile(r"\w+_[0-9a-f]{16}\.v\d+(\.pkl|\.\d+\.tmp)")
+
+
+def hash_file(path: str) -> str:
+    """ Compute the sha256 of the content of a file
+
+    Args:
+        path (str): Path to the file
+
+    Returns:
+        str: Hex digest of the file content
+    """
+
+    sha = hashlib.sha256()
+
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(chunk)
+
+    return sha.hexdigest()
+
+
+def get_entry_path(
+    cache_dir: str, namespace: str, source: str, key: dict = None
+) -> Path:
+    """ Get the path of the cache entry for the given source file
+
+    Args:
+        cache_dir (str): Path to the cache directory
+        namespace (str): Type of data cached i.e. hgnc_index
+        source (str): Path to the file the cached data was built from
+        key (dict, optional): Additional data the cached data depends on
+
+    Returns:
+        Path: Path to the cache entry
+    """
+
+    key_material = json.dumps(
+        [str(Path(source).resolve()), key], sort_keys=True, default=str
+    )
+    digest = hashlib.sha256(key_material.encode()).hexdigest()[:16]
+    return Path(cache_dir) / f"{namespace}_{digest}.v{CACHE_VERSION}.pkl"
+
+
+def load_cached(
+    cache_dir: str, namespace: str, source: str, key: dict = None
+):
+    """ Load data from the cache if the source file hasn't changed since it
+    was stored. Stale and unreadable entries are removed.
+
+    Args:
+        cache_dir (str): Path to the cache directory
+        namespace (str): Type of data cached i.e. hgnc_index
+        source (str): Path to the file the cached data was built from
+        key (dict, optional): Additional data the cached data depends on
+
+    Returns:
+        Any: Cached data or None if there is no valid entry
+    """
+
+    entry = get_entry_path(cache_dir, namespace, source, key)
+
+    if not entry.exists():
+        return None
+
+    stat = os.stat(source)
+
+    try:
+        with open(entry, "rb") as f:
+            metadata = pickle.load(f)
+
+            if (
+                metadata["version"] == CACHE_VERSION and
+                metadata["size"] == stat.st_size and (
+                    # same size and mtime is considered unchanged, otherwise
+                    # the content needs to be checked
+                    metadata["mtime_ns"] == stat.st_mtime_ns or
+                    metadata["sha256"] == hash_file(source)
+                )
+            ):
+                return pickle.load(f)
+    except FileNotFoundError:
+        # removed by another run in the meantime
+        return None
+    except (
+        pickle.UnpicklingError, EOFError, AttributeError, ImportError,
+        IndexError, KeyError, TypeError, ValueError
+    ):
+        # truncated entry or entry written by an incompatible version of the
+        # code, rebuilt like a stale one
+        pass
+
+    # another run may remove the same stale entry concurrently
+    entry.unlink(missing_ok=True)
+    return None
+
+
+def store_cached(
+    cache_dir: str, namespace: str, source: str, data, key: dict = None
+):
+    """ Store data in the cache along with the metadata of the source file
+
+    Args:
+        cache_dir (str): Path to the cache directory
+        namespace (str): Type of data cached i.e. hgnc_index
+        source (str): Path to the file the cached data was built from
+        data (Any): Picklable data to store
+        key (dict, optional): Additional data the cached data depends on
+    """
+
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    entry = get_entry_path(cache_dir, namespace, source, key)
+    stat = os.stat(source)
+    metadata = {
+        "version": CACHE_VERSION, "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns, "sha256": hash_file(source)
+    }
+
+    # write to a temporary file first so that concurrent runs never read a
+    # partially written entry
+    tmp_entry = entry.with_suffix(f".{os.getpid()}.tmp")
+
+    with open(tmp_entry, "wb") as f:
+        pickle.dump(metadata, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    os.replace(tmp_entry, entry)
+
+
+def clear_cache(cache_dir: str):
+    """ Remove every entry from the cache directory, other files are left
+    untouched as the directory may be shared
+
+    Args:
+        cache_dir (str): Path to the cache directory
+    """
+
+    cache_path = Path(cache_dir)
+
+    if not cache_path.is_dir():
+        return
+
+    for entry in cache_path.iterdir():
+        if ENTRY_NAME.fullmatch(entry.name):
+            entry.unlink(missing_ok=True)
@@ -1,13 +1,30 @@
+import math
+
 import pandas as pd
 import regex
 
 from test_directory_parser import utils
 
+# panelapp ids are numbers between parentheses
+PANEL_PATTERN = r"\(([0-9&\ ]+)\)"
+# gene symbols are uppercase words
+GENE_PATTERN = r"([A-Z]+[A-Z0-9\-]+)"
+PANEL_REGEX = regex.compile(PANEL_PATTERN)
+GENE_REGEX = regex.compile(GENE_PATTERN)
+
 
 class ClinicalIndication:
+    # slots keep the objects small when holding several test directories in
+    # memory
+    __slots__ = (
+        "r_code", "name", "gemini_name", "original_targets", "test_method",
+        "change", "_hgnc_dump", "_hgnc_ids", "_tokens", "_panels", "_genes"
+    )
+
     def __init__(
         self, r_code: str, name: str, target: str, test_method: str,
-        change: str, hgnc_dump: pd.DataFrame
+        change: str, hgnc_dump: pd.DataFrame, hgnc_ids: dict = None,
+        tokens: tuple = None
     ):
         """ Setup the clinical indication object
 
@@ -18,12 +35,18 @@ class ClinicalIndication:
             test_method (str): Test method of the clinical indication
             change (str): Changes described in the test directory excel i.e.
             no changes, addition of, removal of ...
-            hgnc_dump (pd.DataFrame): Dataframe containing the HGNC data
+            hgnc_dump (pd.DataFrame): Dataframe containing the HGNC data or
+            HgncIndex built from it
+            hgnc_ids (dict, optional): Dict of gene symbols to HGNC ids
+            already resolved using find_hgnc_ids
+            tokens (tuple, optional): Panelapp ids and gene symbols of the
+            target already extracted using parse_targets
+
+        The target is cleaned on first access to the panels or genes
         """
 
         self.r_code = r_code
-        # R424 has a space at the end of its name
-        self.name = name.replace("–", "-").strip()
+        self.name = clean_name(name)
 
         if "gene" in test_method:
             self.gemini_name = f"{self.r_code}_{self.name}_G"
@@ -33,38 +56,234 @@ class ClinicalIndication:
         self.original_targets = target
         self.test_method = test_method
         self.change = change
-        self.clean_target(hgnc_dump)
+        self._hgnc_dump = hgnc_dump
+        self._hgnc_ids = hgnc_ids
+        self._tokens = tokens
+        self._panels = None
+        self._genes = None
+
+    @property
+    def panels(self) -> list:
+        """ Panelapp ids of the target, cleaned on first access
+
+        Returns:
+            list: List of panelapp ids
+        """
+
+        if self._panels is None:
+            self.clean_target(self._hgnc_dump, self._hgnc_ids)
+
+        return self._panels
+
+    @property
+    def genes(self) -> list:
+        """ HGNC ids of the target, resolved on first access
+
+        Returns:
+            list: List of HGNC ids, None for unresolved symbols
+        """
+
+        if self._genes is None:
+            self.clean_target(self._hgnc_dump, self._hgnc_ids)
+
+        return self._genes
 
-    def clean_target(self, hgnc_dump: pd.DataFrame):
+    @classmethod
+    def from_output(cls, indication: dict):
+        """ Setup a clinical indication from an indication of a previous
+        output without cleaning its target again
+
+        Args:
+            indication (dict): Indication from the output of
+            TestDirectory.output_json
+
+        Returns:
+            ClinicalIndication: Clinical indication object
+        """
+
+        ci = cls.__new__(cls)
+        ci.r_code = indication["code"]
+        ci.name = indication["name"]
+        ci.gemini_name = indication["gemini_name"]
+        ci.original_targets = indication["original_targets"]
+        ci.test_method = indication["test_method"]
+        ci.change = indication["changes"]
+        ci._hgnc_dump = None
+        ci._hgnc_ids = None
+        ci._tokens = None
+        # panels and genes are merged in the output, genes being the HGNC ids
+        # or None for unresolved symbols
+        ci._panels = [
+            target for target in indication["panels"]
+            if target is not None and not target.startswith("HGNC:")
+        ]
+        ci._genes = [
+            target for target in indication["panels"]
+            if target is None or target.startswith("HGNC:")
+        ]
+        return ci
+
+    def clean_target(self, hgnc_dump: pd.DataFrame, hgnc_ids: dict = None):
         """ Attempt to clean up the targets in the excel file
 
         Args:
-            hgnc_dump (pandas.Dataframe): Dataframe of hgnc data
+            hgnc_dump (pandas.Dataframe): Dataframe of hgnc data or HgncIndex
+            built from it for constant time lookups
+            hgnc_ids (dict, optional): Dict of gene symbols to HGNC ids
+            already resolved using find_hgnc_ids
         """
 
-        self.panels = []
-        self.genes = []
+        if self._tokens is not None:
+            panels, potential_gene_targets = self._tokens
+        else:
+            panels, potential_gene_targets = get_target_tokens(
+                self.original_targets
+            )
+
+        genes = []
 
-        potential_panel_targets = regex.findall(
-            r"\([0-9&\ ]+\)", self.original_targets
-        )
-        potential_gene_targets = regex.findall(
-            r"[A-Z]+[A-Z0-9\-]+", self.original_targets
+        for potential_gene in potential_gene_targets:
+            # use the symbols resolved in batch by the test directory if
+            # available
+            if hgnc_ids is not None and potential_gene in hgnc_ids:
+                hgnc_id = hgnc_ids[potential_gene]
+            else:
+                hgnc_id = utils.find_hgnc_id(
+                    potential_gene, hgnc_dump
+                )["HGNC ID"]
+
+            if hgnc_id:
+                genes.append(hgnc_id)
+            else:
+                genes.append(None)
+
+        self._panels = panels
+        self._genes = genes
+        # the HGNC data is not needed anymore once the target is cleaned
+        self._hgnc_dump = None
+        self._hgnc_ids = None
+        self._tokens = None
+
+
+def clean_name(name: str) -> str:
+    """ Clean the name of a clinical indication
+
+    Args:
+        name (str): Name of the clinical indication
+
+    Returns:
+        str: Name with normalised dashes and without surrounding spaces
+    """
+
+    # R424 has a space at the end of its name
+    return name.replace("–", "-").strip()
+
+
+def matches_output(
+    indication: dict, name: str, target: str, test_method: str, change: str
+) -> bool:
+    """ Check whether a row of the test directory is the same as an
+    indication of a previous output
+
+    Args:
+        indication (dict): Indication from the output of
+        TestDirectory.output_json
+        name (str): Name of the clinical indication
+        target (str): Target of the clinical indication
+        test_method (str): Test method of the clinical indication
+        change (str): Changes described in the test directory excel
+
+    Returns:
+        bool: True if the name, target, test method and changes are the same
+    """
+
+    # blank cells are read as NaN and written as NaN in the output, which
+    # never equals itself
+    return (
+        indication["name"] == clean_name(name) and
+        normalise_missing(indication["original_targets"]) ==
+        normalise_missing(target) and
+        normalise_missing(indication["test_method"]) ==
+        normalise_missing(test_method) and
+        normalise_missing(indication["changes"]) == normalise_missing(change)
+    )
+
+
+def normalise_missing(value):
+    """ Convert the missing values of a cell to None
+
+    Args:
+        value (Any): Value of a cell or of an output field
+
+    Returns:
+        Any: None if the value is missing i.e. None or NaN, the value
+        otherwise
+    """
+
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+
+    return value
+
+
+def get_target_tokens(target: str) -> tuple:
+    """ Extract the panelapp ids or, if there are none, the gene symbols from
+    the target of a clinical indication
+
+    Args:
+        target (str): Target of the clinical indication
+
+    Returns:
+        tuple: List of panelapp ids and list of potential gene symbols
+    """
+
+    # regex to identify panelapp panels
+    potential_panel_targets = PANEL_REGEX.findall(target)
+
+    if potential_panel_targets:
+        return potential_panel_targets, []
+
+    # regex to identify gene symbol
+    return [], GENE_REGEX.findall(target)
+
+
+def parse_targets(targets: pd.Series) -> pd.DataFrame:
+    """ Extract the panelapp ids and gene symbols of a whole target column
+    in one pass. Like get_target_tokens, gene symbols are only kept for the
+    targets without panelapp ids.
+
+    Args:
+        targets (pd.Series): Targets of the clinical indications
+
+    Returns:
+        pd.DataFrame: Dataframe with one row per token and the "row" (index
+        of the target), "kind" ("panel" or "gene") and "token" columns, in the
+        order of the targets and of the tokens in the targets
+    """
+
+    rows = targets.index
+    # work on positions so that the original order can be restored
+    targets = targets.reset_index(drop=True).fillna("").astype(str)
+
+    panels = targets.str.extractall(PANEL_PATTERN)[0]
+    genes = targets.str.extractall(GENE_PATTERN)[0]
+    # panels take precedence over genes
+    genes = genes[
+        ~genes.index.get_level_values(0).isin(
+            panels.index.get_level_values(0)
         )
+    ]
+
+    tokens = pd.concat([
+        pd.DataFrame({"kind": "panel", "token": panels}),
+        pd.DataFrame({"kind": "gene", "token": genes})
+    ])
+    tokens = tokens.sort_index(kind="stable")
+    positions = tokens.index.get_level_values(0)
 
-        # regex to identify panelapp panels
-        if potential_panel_targets:
-            for potential_panel in potential_panel_targets:
-                cleaned_panelapp_id = potential_panel.replace(
-                    "(", "").replace(")", "")
-                self.panels.append(cleaned_panelapp_id)
-
-        # regex to identify gene symbol
-        elif potential_gene_targets:
-            for potential_gene in potential_gene_targets:
-                hgnc_id_data = utils.find_hgnc_id(potential_gene, hgnc_dump)
-
-                if hgnc_id_data["HGNC ID"]:
-                    self.genes.append(hgnc_id_data["HGNC ID"])
-                else:
-                    self.genes.append(None)
+    return pd.DataFrame(
+        {
+            "row": rows[positions], "kind": tokens["kind"].to_numpy(),
+            "token": tokens["token"].to_numpy()
+        }
+    )
@@ -0,0 +1,110 @@
+import json
+
+from test_directory_parser import clinical_indication
+from test_directory_parser import utils
+
+# fields of the output indications that are compared between releases
+COMPARED_FIELDS = ["name", "gemini_name", "test_method", "original_targets"]
+
+
+def compare_indications(
+    previous_indications: list, new_indications: list
+) -> dict:
+    """ Compare the indications of 2 outputs of TestDirectory.output_json
+
+    Args:
+        previous_indications (list): Indications of the previous output
+        new_indications (list): Indications of the new output
+
+    Returns:
+        dict: Dict with the added, removed and modified clinical indications
+    """
+
+    previous = {
+        indication["code"]: indication for indication in previous_indications
+    }
+    new = {indication["code"]: indication for indication in new_indications}
+
+    modified = {}
+
+    for code, new_indication in new.items():
+        if code not in previous:
+            continue
+
+        previous_indication = previous[code]
+        # blank cells of outputs written before they were output as null
+        # are NaN
+        previous_values, new_values = [
+            {
+                field: clinical_indication.normalise_missing(indication[field])
+                for field in COMPARED_FIELDS
+            }
+            for indication in [previous_indication, new_indication]
+        ]
+        changed_fields = {
+            field: [previous_values[field], new_values[field]]
+            for field in COMPARED_FIELDS
+            if previous_values[field] != new_values[field]
+        }
+        previous_targets = set(previous_indication["panels"])
+        new_targets = set(new_indication["panels"])
+
+        if changed_fields or previous_targets != new_targets:
+            modified[code] = {
+                "fields": changed_fields,
+                "added_targets": sort_targets(new_targets - previous_targets),
+                "removed_targets": sort_targets(
+                    previous_targets - new_targets
+                )
+            }
+
+    return {
+        "added": [code for code in new if code not in previous],
+        "removed": [code for code in previous if code not in new],
+        "modified": modified
+    }
+
+
+def sort_targets(targets: set) -> list:
+    """ Sort targets that may contain None for unresolved gene symbols
+
+    Args:
+        targets (set): Set of panelapp ids and HGNC ids
+
+    Returns:
+        list: Sorted list of targets with None last
+    """
+
+    return sorted(targets, key=lambda target: (target is None, target or ""))
+
+
+def output_delta(
+    previous_output: dict, new_indications: list, td_source: str,
+    output: str
+):
+    """ Output the differences between a previous output and the indications
+    of a new test directory as a JSON file
+
+    Args:
+        previous_output (dict): Content of the previous output
+        new_indications (list): Indications of the new test directory
+        td_source (str): Name of the new test directory file
+        output (str): Path to the delta output
+    """
+
+    delta = compare_indications(
+        previous_output["indications"], new_indications
+    )
+    print((
+        f"Delta with {previous_output['td_source']}: "
+        f"{len(delta['added'])} added, {len(delta['removed'])} removed, "
+        f"{len(delta['modified'])} modified clinical indications"
+    ))
+
+    data = {
+        "previous_td_source": previous_output["td_source"],
+        "td_source": td_source, "date": utils.get_date(), **delta
+    }
+
+    with open(output, "w") as f:
+        json.dump(data, f, indent=2)
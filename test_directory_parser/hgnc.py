@@ -0,0 +1,273 @@
+from abc import ABC, abstractmethod
+
+import pandas as pd
+import regex
+
+from test_directory_parser import cache
+
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = "string[pyarrow]"
+except ImportError:
+    STRING_DTYPE = object
+
+# columns of the HGNC dump used to resolve gene symbols
+HGNC_COLUMNS = [
+    "HGNC ID", "Approved symbol", "Previous symbols", "Alias symbols"
+]
+
+
+class HgncResolver(ABC):
+    """ Base class of the HGNC lookups resolving gene symbols through their
+    resolve method """
+
+    @abstractmethod
+    def resolve(self, gene_symbol: str) -> tuple:
+        """ Resolve a gene symbol using the same rules as find_hgnc_id
+
+        Args:
+            gene_symbol (str): Gene symbol
+
+        Returns:
+            tuple: HGNC id, whether the previous symbols were used and whether
+            the alias symbols were used
+        """
+
+    def find_hgnc_id(self, gene_symbol: str) -> pd.Series:
+        """ Find hgnc id using the index
+
+        Args:
+            gene_symbol (str): Gene symbol
+
+        Returns:
+            pd.Series: Series for the given gene and whether the code had to
+            look in the alias or previous columns to solve the symbol
+        """
+
+        hgnc_id, previous, alias = self.resolve(gene_symbol)
+
+        return pd.Series(
+            [gene_symbol, hgnc_id, previous, alias], index=[
+                "Gene symbol", "HGNC ID", "Previous", "Alias"
+            ]
+        )
+
+    def find_hgnc_ids(self, gene_symbols: list) -> pd.DataFrame:
+        """ Find the hgnc ids of multiple gene symbols using the index
+
+        Args:
+            gene_symbols (list): Deduplicated gene symbols
+
+        Returns:
+            pd.DataFrame: Dataframe indexed by gene symbol with the same
+            columns as the output of find_hgnc_id
+        """
+
+        return pd.DataFrame(
+            [
+                (gene_symbol, *self.resolve(gene_symbol))
+                for gene_symbol in gene_symbols
+            ], columns=["Gene symbol", "HGNC ID", "Previous", "Alias"],
+            dtype=object
+        ).set_index("Gene symbol", drop=False)
+
+
+class HgncIndex(HgncResolver):
+    def __init__(self, hgnc_dump: pd.DataFrame):
+        """ Build hash maps from the approved, previous and alias symbols to
+        their HGNC ids so that symbols can be resolved without scanning the
+        HGNC dump
+
+        Args:
+            hgnc_dump (pd.DataFrame): Dataframe containing the HGNC data
+        """
+
+        self.approved = {}
+        self.previous = {}
+        self.alias = {}
+
+        for hgnc_id, approved_symbol, previous_symbols, alias_symbols in zip(
+            hgnc_dump["HGNC ID"], hgnc_dump["Approved symbol"],
+            hgnc_dump["Previous symbols"], hgnc_dump["Alias symbols"]
+        ):
+            # keep the first row matching the approved symbol like the
+            # dataframe lookup does
+            if isinstance(approved_symbol, str):
+                self.approved.setdefault(approved_symbol, hgnc_id)
+
+            self._add_symbols(self.previous, previous_symbols, hgnc_id)
+            self._add_symbols(self.alias, alias_symbols, hgnc_id)
+
+    @staticmethod
+    def _add_symbols(symbol_map: dict, symbols: str, hgnc_id: str):
+        """ Add the comma separated symbols of a HGNC row to the given map
+
+        Args:
+            symbol_map (dict): Dict of symbol to list of HGNC ids
+            symbols (str): Comma separated symbols from the HGNC dump
+            hgnc_id (str): HGNC id of the row
+        """
+
+        if not isinstance(symbols, str):
+            return
+
+        # a row is only counted once even if it lists the symbol twice
+        for symbol in {symbol.strip() for symbol in symbols.split(",")}:
+            if symbol:
+                symbol_map.setdefault(symbol, []).append(hgnc_id)
+
+    def resolve(self, gene_symbol: str) -> tuple:
+        """ Resolve a gene symbol using the same rules as find_hgnc_id
+
+        Args:
+            gene_symbol (str): Gene symbol
+
+        Returns:
+            tuple: HGNC id, whether the previous symbols were used and whether
+            the alias symbols were used
+        """
+
+        if gene_symbol in self.approved:
+            return self.approved[gene_symbol], None, None
+
+        if not regex.match(r"[A-Z]+[A-Z0-9]+", gene_symbol):
+            return None, None, None
+
+        previous_ids = self.previous.get(gene_symbol, [])
+        alias_ids = self.alias.get(gene_symbol, [])
+
+        if not previous_ids and not alias_ids:
+            return None, None, None
+
+        if len(previous_ids) == 1 and not alias_ids:
+            return previous_ids[0], True, False
+
+        if not previous_ids and len(alias_ids) == 1:
+            return alias_ids[0], False, True
+
+        # multiple matches cannot be resolved
+        return None, bool(previous_ids), bool(alias_ids)
+
+
+def read_hgnc_dump(tsv: str, drop_withdrawn: bool = False) -> pd.DataFrame:
+    """ Read only the columns of the HGNC dump needed to resolve gene symbols
+    using compact dtypes. Missing values are left as NA as every lookup
+    handles them
+
+    Args:
+        tsv (str): Path to the HGNC dump
+        drop_withdrawn (bool, optional): Whether to remove the withdrawn
+        entries
+
+    Returns:
+        pd.DataFrame: Dataframe containing the HGNC ID, Approved symbol,
+        Previous symbols, Alias symbols and Status (if present) columns
+    """
+
+    columns = HGNC_COLUMNS + ["Status"]
+    dtypes = {column: STRING_DTYPE for column in HGNC_COLUMNS}
+    dtypes["Status"] = "category"
+
+    hgnc_dump = pd.read_csv(
+        tsv, delimiter="\t", usecols=lambda column: column in columns,
+        dtype=dtypes
+    )
+
+    missing_columns = [
+        column for column in HGNC_COLUMNS if column not in hgnc_dump.columns
+    ]
+
+    if missing_columns:
+        raise Exception(
+            f"{tsv} is missing the following columns: "
+            f"{', '.join(missing_columns)}"
+        )
+
+    if drop_withdrawn:
+        if "Status" in hgnc_dump.columns:
+            withdrawn = hgnc_dump["Status"] == "Entry Withdrawn"
+        else:
+            withdrawn = hgnc_dump["Approved symbol"].str.endswith(
+                "~withdrawn", na=False
+            )
+
+        hgnc_dump = hgnc_dump[~withdrawn].reset_index(drop=True)
+
+    return hgnc_dump
+
+
+def get_cache_key(drop_withdrawn: bool) -> dict:
+    """ Get the key of the cached HGNC data, only set if the withdrawn
+    entries are removed so that existing entries stay valid
+
+    Args:
+        drop_withdrawn (bool): Whether the withdrawn entries are removed
+
+    Returns:
+        dict: Cache key or None
+    """
+
+    return {"drop_withdrawn": True} if drop_withdrawn else None
+
+
+def load_hgnc_dump(
+    tsv: str, cache_dir: str = None, drop_withdrawn: bool = False
+) -> pd.DataFrame:
+    """ Parse the HGNC dump, using the cache directory if given
+
+    Args:
+        tsv (str): Path to the HGNC dump
+        cache_dir (str, optional): Path to the cache directory
+        drop_withdrawn (bool, optional): Whether to remove the withdrawn
+        entries
+
+    Returns:
+        pd.DataFrame: Dataframe containing the HGNC data
+    """
+
+    key = get_cache_key(drop_withdrawn)
+
+    if cache_dir:
+        hgnc_dump = cache.load_cached(cache_dir, "hgnc_dump", tsv, key)
+
+        if hgnc_dump is not None:
+            return hgnc_dump
+
+    hgnc_dump = read_hgnc_dump(tsv, drop_withdrawn)
+
+    if cache_dir:
+        cache.store_cached(cache_dir, "hgnc_dump", tsv, hgnc_dump, key)
+
+    return hgnc_dump
+
+
+def load_hgnc_index(
+    tsv: str, cache_dir: str = None, drop_withdrawn: bool = False
+) -> HgncIndex:
+    """ Build the HgncIndex of the HGNC dump, using the cache directory if
+    given so that warm runs don't parse the dump at all
+
+    Args:
+        tsv (str): Path to the HGNC dump
+        cache_dir (str, optional): Path to the cache directory
+        drop_withdrawn (bool, optional): Whether to remove the withdrawn
+        entries
+
+    Returns:
+        HgncIndex: Index of the HGNC symbols
+    """
+
+    key = get_cache_key(drop_withdrawn)
+
+    if cache_dir:
+        hgnc_index = cache.load_cached(cache_dir, "hgnc_index", tsv, key)
+
+        if hgnc_index is not None:
+            return hgnc_index
+
+    hgnc_index = HgncIndex(load_hgnc_dump(tsv, cache_dir, drop_withdrawn))
+
+    if cache_dir:
+        cache.store_cached(cache_dir, "hgnc_index", tsv, hgnc_index, key)
+
+    return hgnc_index
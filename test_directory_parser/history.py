@@ -0,0 +1,369 @@
+from pathlib import Path
+
+import numpy as np
+
+from test_directory_parser import json_output
+
+RELEASE_FIELDS = ["td_source", "config_source", "date"]
+
+
+class StringTable:
+    def __init__(self, strings: list = None):
+        """ Intern strings as consecutive integer ids
+
+        Args:
+            strings (list, optional): Strings already interned, in the order
+            of their ids
+        """
+
+        self.strings = list(strings or [])
+        self.ids = {string: i for i, string in enumerate(self.strings)}
+
+    def __len__(self):
+        return len(self.strings)
+
+    def intern(self, string: str) -> int:
+        """ Get the id of a string, adding it to the table if needed
+
+        Args:
+            string (str): String to intern
+
+        Returns:
+            int: Id of the string
+        """
+
+        string_id = self.ids.get(string)
+
+        if string_id is None:
+            string_id = self.ids[string] = len(self.strings)
+            self.strings.append(string)
+
+        return string_id
+
+    def get(self, string: str) -> int:
+        """ Get the id of a string
+
+        Args:
+            string (str): String to look for
+
+        Returns:
+            int: Id of the string, -1 if it isn't in the table
+        """
+
+        return self.ids.get(string, -1)
+
+    def to_array(self) -> np.ndarray:
+        return np.array(self.strings, dtype=str)
+
+
+class ReleaseHistory:
+    def __init__(self):
+        """ Columnar store of the targets of the clinical indications of many
+        releases. Test codes, R codes and targets are interned and every
+        (release, test code, target) triplet is a row of 3 int32 columns so
+        that years of releases fit in memory and are queried with vectorised
+        NumPy operations
+        """
+
+        self.releases = []
+        self.codes = StringTable()
+        self.r_codes = StringTable()
+        self.targets = StringTable()
+        # R code id of every test code id
+        self.code_r_codes = np.zeros(0, dtype=np.int32)
+        # one row per indication of a release
+        self.indication_release = np.zeros(0, dtype=np.int32)
+        self.indication_code = np.zeros(0, dtype=np.int32)
+        # one row per panelapp id or HGNC id of an indication of a release
+        self.target_release = np.zeros(0, dtype=np.int32)
+        self.target_code = np.zeros(0, dtype=np.int32)
+        self.target_id = np.zeros(0, dtype=np.int32)
+
+    def add_releases(self, outputs_data: list) -> int:
+        """ Add releases, the columns are extended once for all of them
+
+        Args:
+            outputs_data (list): Outputs loaded with json_output.load_output
+
+        Raises:
+            Exception: if a release is already in the history
+
+        Returns:
+            int: Number of releases added
+        """
+
+        release_keys = {
+            tuple(release[field] for field in RELEASE_FIELDS)
+            for release in self.releases
+        }
+
+        # checked before adding anything so that a failure leaves the history
+        # unchanged
+        for output_data in outputs_data:
+            release_key = tuple(
+                output_data[field] for field in RELEASE_FIELDS
+            )
+
+            if release_key in release_keys:
+                raise Exception(
+                    f"Release {' '.join(release_key)} is already in the "
+                    "history"
+                )
+
+            release_keys.add(release_key)
+
+        indication_columns = ([], [])
+        target_columns = ([], [], [])
+
+        for output_data in outputs_data:
+            release_id = len(self.releases)
+            self.releases.append(
+                {field: output_data[field] for field in RELEASE_FIELDS}
+            )
+
+            for indication in output_data["indications"]:
+                code_id = self.codes.intern(indication["code"])
+                indication_columns[0].append(release_id)
+                indication_columns[1].append(code_id)
+
+                # a target listing the same gene or panel twice is stored once
+                for target in dict.fromkeys(indication["panels"]):
+                    # unresolved gene symbols have no id to follow
+                    if target is None:
+                        continue
+
+                    target_columns[0].append(release_id)
+                    target_columns[1].append(code_id)
+                    target_columns[2].append(self.targets.intern(target))
+
+        self.code_r_codes = np.array(
+            [
+                self.r_codes.intern(code.split(".")[0])
+                for code in self.codes.strings
+            ], dtype=np.int32
+        )
+        self.indication_release, self.indication_code = [
+            np.concatenate([column, np.array(values, dtype=np.int32)])
+            for column, values in zip(
+                [self.indication_release, self.indication_code],
+                indication_columns
+            )
+        ]
+        self.target_release, self.target_code, self.target_id = [
+            np.concatenate([column, np.array(values, dtype=np.int32)])
+            for column, values in zip(
+                [self.target_release, self.target_code, self.target_id],
+                target_columns
+            )
+        ]
+
+        return len(outputs_data)
+
+    def add_outputs(self, outputs: list) -> int:
+        """ Add the releases of outputs of TestDirectory.output_json
+
+        Args:
+            outputs (list): Paths to the outputs, in any of their formats
+
+        Returns:
+            int: Number of releases added
+        """
+
+        return self.add_releases(
+            [json_output.load_output(output) for output in outputs]
+        )
+
+    def save(self, path: str):
+        """ Save the history as a compressed NumPy archive
+
+        Args:
+            path (str): Path to the archive
+        """
+
+        # written through a file object so that no .npz suffix is added
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                **{
+                    field: np.array(
+                        [release[field] for release in self.releases],
+                        dtype=str
+                    )
+                    for field in RELEASE_FIELDS
+                },
+                codes=self.codes.to_array(),
+                targets=self.targets.to_array(),
+                indication_release=self.indication_release,
+                indication_code=self.indication_code,
+                target_release=self.target_release,
+                target_code=self.target_code,
+                target_id=self.target_id
+            )
+
+    @classmethod
+    def load(cls, path: str):
+        """ Load a history saved with save
+
+        Args:
+            path (str): Path to the archive
+
+        Returns:
+            ReleaseHistory: History of the releases
+        """
+
+        history = cls()
+
+        with np.load(path, allow_pickle=False) as archive:
+            history.releases = [
+                dict(zip(RELEASE_FIELDS, values))
+                for values in zip(*[
+                    archive[field].tolist() for field in RELEASE_FIELDS
+                ])
+            ]
+            history.codes = StringTable(archive["codes"].tolist())
+            history.targets = StringTable(archive["targets"].tolist())
+
+            for column in [
+                "indication_release", "indication_code", "target_release",
+                "target_code", "target_id"
+            ]:
+                setattr(history, column, archive[column])
+
+        history.code_r_codes = np.array(
+            [
+                history.r_codes.intern(code.split(".")[0])
+                for code in history.codes.strings
+            ], dtype=np.int32
+        )
+        return history
+
+    def get_release_order(self) -> np.ndarray:
+        """ Get the release ids sorted by date, then by order of addition
+
+        Returns:
+            np.ndarray: Array of release ids
+        """
+
+        return np.argsort(
+            np.array([release["date"] for release in self.releases]),
+            kind="stable"
+        )
+
+    def get_code_ids(self, r_code: str) -> np.ndarray:
+        """ Get the ids of the test codes of a R code
+
+        Args:
+            r_code (str): R code i.e. R208, or test code i.e. R208.1
+
+        Returns:
+            np.ndarray: Array of test code ids
+        """
+
+        if "." in r_code:
+            code_id = self.codes.get(r_code)
+            return np.array([code_id] if code_id != -1 else [], dtype=np.int32)
+
+        return np.flatnonzero(
+            self.code_r_codes == self.r_codes.get(r_code)
+        ).astype(np.int32)
+
+    def get_timeline(self, target: str, r_code: str = None) -> dict:
+        """ Get whether a gene or panel was in the target of the test codes
+        across the releases
+
+        Args:
+            target (str): HGNC id i.e. HGNC:1100 or panelapp id
+            r_code (str, optional): R code or test code to restrict the
+            timeline to, every test code that ever targeted it otherwise
+
+        Returns:
+            dict: Dict with the releases sorted by date, the test codes and
+            2 boolean arrays of shape (test codes, releases): "targeted"
+            whether the target was in the test code of the release and
+            "listed" whether the test code was in the release
+        """
+
+        order = self.get_release_order()
+        # position of every release id in the timeline
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+
+        mask = self.target_id == self.targets.get(target)
+
+        if r_code is not None:
+            code_ids = self.get_code_ids(r_code)
+            mask &= np.isin(self.target_code, code_ids)
+        else:
+            code_ids = np.unique(self.target_code[mask])
+
+        targeted = np.zeros((len(code_ids), len(order)), dtype=bool)
+        targeted[
+            np.searchsorted(code_ids, self.target_code[mask]),
+            rank[self.target_release[mask]]
+        ] = True
+
+        listed = np.zeros((len(code_ids), len(order)), dtype=bool)
+        indication_mask = np.isin(self.indication_code, code_ids)
+        listed[
+            np.searchsorted(code_ids, self.indication_code[indication_mask]),
+            rank[self.indication_release[indication_mask]]
+        ] = True
+
+        return {
+            "releases": [self.releases[release_id] for release_id in order],
+            "codes": [self.codes.strings[code_id] for code_id in code_ids],
+            "targeted": targeted,
+            "listed": listed
+        }
+
+    def get_changes(self, target: str, r_code: str = None) -> list:
+        """ Get the releases in which a gene or panel entered or left the
+        target of the test codes
+
+        Args:
+            target (str): HGNC id i.e. HGNC:1100 or panelapp id
+            r_code (str, optional): R code or test code to restrict the
+            changes to
+
+        Returns:
+            list: List of dicts with the test code, the release and whether
+            the target was "added" or "removed", sorted by test code and date.
+            Targets of the first release are reported as added in it
+        """
+
+        timeline = self.get_timeline(target, r_code)
+        targeted = timeline["targeted"].astype(np.int8)
+        steps = np.diff(
+            targeted, axis=1, prepend=np.zeros((len(targeted), 1), np.int8)
+        )
+        code_positions, release_positions = np.nonzero(steps)
+
+        return [
+            {
+                "code": timeline["codes"][code_position],
+                **timeline["releases"][release_position],
+                "change": (
+                    "added" if steps[code_position, release_position] > 0
+                    else "removed"
+                )
+            }
+            for code_position, release_position in zip(
+                code_positions, release_positions
+            )
+        ]
+
+
+def load_history(path: str) -> ReleaseHistory:
+    """ Load a history if the archive exists, start an empty one otherwise
+
+    Args:
+        path (str): Path to the archive
+
+    Returns:
+        ReleaseHistory: History of the releases
+    """
+
+    if Path(path).exists():
+        return ReleaseHistory.load(path)
+
+    return ReleaseHistory()
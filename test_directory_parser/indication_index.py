@@ -0,0 +1,106 @@
+from test_directory_parser import json_output
+
+
+class IndicationIndex:
+    def __init__(self):
+        """ Inverted indexes of the clinical indications on the HGNC ids and
+        panelapp ids of their target and on their test method. The indexed
+        items are ClinicalIndication objects for a test directory and the
+        indication dicts for a saved output
+        """
+
+        self.by_hgnc_id = {}
+        self.by_panel_id = {}
+        self.by_test_method = {}
+
+    def __len__(self):
+        return sum(len(items) for items in self.by_test_method.values())
+
+    def add(self, item, targets: list, test_method: str):
+        """ Index a clinical indication
+
+        Args:
+            item (ClinicalIndication or dict): Clinical indication returned
+            by the lookups
+            targets (list): Panelapp ids and HGNC ids of the target, None for
+            the unresolved gene symbols
+            test_method (str): Test method of the clinical indication
+        """
+
+        # a target listing the same gene or panel twice is indexed once
+        for target in dict.fromkeys(targets):
+            if target is None:
+                continue
+
+            if target.startswith("HGNC:"):
+                self.by_hgnc_id.setdefault(target, []).append(item)
+            else:
+                self.by_panel_id.setdefault(target, []).append(item)
+
+        self.by_test_method.setdefault(test_method, []).append(item)
+
+    def find(
+        self, hgnc_id: str = None, panel_id: str = None,
+        test_method: str = None
+    ) -> list:
+        """ Find the clinical indications targeting a gene or a panel or
+        using a test method
+
+        Args:
+            hgnc_id (str, optional): HGNC id i.e. HGNC:1100
+            panel_id (str, optional): Panelapp id
+            test_method (str, optional): Test method i.e. WES or Large panel
+
+        Raises:
+            Exception: if none or several lookups are given
+
+        Returns:
+            list: Clinical indications in the order they were indexed
+        """
+
+        lookups = [
+            (index, key) for index, key in [
+                (self.by_hgnc_id, hgnc_id), (self.by_panel_id, panel_id),
+                (self.by_test_method, test_method)
+            ]
+            if key is not None
+        ]
+
+        if len(lookups) != 1:
+            raise Exception("Give one of hgnc_id, panel_id or test_method")
+
+        index, key = lookups[0]
+        return list(index.get(key, []))
+
+
+def index_indications(indications: list) -> IndicationIndex:
+    """ Index the indications of an output of TestDirectory.output_json
+
+    Args:
+        indications (list): Indication dicts
+
+    Returns:
+        IndicationIndex: Index of the indication dicts
+    """
+
+    index = IndicationIndex()
+
+    for indication in indications:
+        index.add(indication, indication["panels"], indication["test_method"])
+
+    return index
+
+
+def load_index(output: str) -> tuple:
+    """ Load a saved output and index its indications without parsing the
+    test directory again
+
+    Args:
+        output (str): Path to the output, in any of its formats
+
+    Returns:
+        tuple: Dict of the output and index of its indications
+    """
+
+    output_data = json_output.load_output(output)
+    return output_data, index_indications(output_data["indications"])
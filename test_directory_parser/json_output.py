@@ -0,0 +1,128 @@
+import gzip
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+OUTPUT_FORMATS = ["json", "compact", "ndjson"]
+
+
+def encode_json(data) -> str:
+    """ Encode data as compact JSON, using orjson if it is installed
+
+    Args:
+        data (Any): Data to encode
+
+    Returns:
+        str: Compact JSON string
+    """
+
+    if orjson:
+        return orjson.dumps(data).decode()
+
+    return json.dumps(data, separators=(",", ":"))
+
+
+def open_output(output: str, mode: str, compress: bool = False):
+    """ Open an output file as text, gzipped or not
+
+    Args:
+        output (str): Path to the output
+        mode (str): "r" or "w"
+        compress (bool, optional): Whether the file is gzipped, detected from
+        the content when reading
+
+    Returns:
+        file object: Text file object
+    """
+
+    if mode == "r":
+        with open(output, "rb") as f:
+            compress = f.read(2) == b"\x1f\x8b"
+
+    if compress:
+        return gzip.open(output, f"{mode}t", encoding="utf-8")
+
+    return open(output, mode)
+
+
+def write_output(
+    output: str, metadata: dict, indications, output_format: str = "json",
+    compress: bool = False
+):
+    """ Write the output of a test directory. Apart from the default pretty
+    JSON, indications are written one at a time as they are produced.
+
+    Args:
+        output (str): Path to the output
+        metadata (dict): Test directory source, config source and date
+        indications (iterable): Dicts of the indications to output
+        output_format (str, optional): "json" for indented JSON, "compact"
+        for compact JSON or "ndjson" for the metadata on the first line
+        followed by one indication per line
+        compress (bool, optional): Whether to gzip the output
+
+    Raises:
+        Exception: if the output format is not supported
+    """
+
+    if output_format not in OUTPUT_FORMATS:
+        raise Exception(
+            f"'{output_format}' is not a valid output format, choose from: "
+            f"{', '.join(OUTPUT_FORMATS)}"
+        )
+
+    with open_output(output, "w", compress) as f:
+        if output_format == "json":
+            json.dump(
+                {**metadata, "indications": list(indications)}, f, indent=2
+            )
+
+        elif output_format == "compact":
+            # write the metadata keys and open the indications list
+            f.write(f"{encode_json(metadata)[:-1]},\"indications\":[")
+
+            for i, indication in enumerate(indications):
+                if i:
+                    f.write(",")
+
+                f.write(encode_json(indication))
+
+            f.write("]}")
+
+        else:
+            f.write(f"{encode_json(metadata)}\n")
+
+            for indication in indications:
+                f.write(f"{encode_json(indication)}\n")
+
+
+def load_output(output: str) -> dict:
+    """ Load an output of TestDirectory.output_json in any of its formats
+
+    Args:
+        output (str): Path to the output
+
+    Returns:
+        dict: Dict with the test directory source, the config source, the
+        date and the indications
+    """
+
+    with open_output(output, "r") as f:
+        first_line = f.readline()
+
+        try:
+            header = json.loads(first_line)
+        except ValueError:
+            header = None
+
+        # newline delimited outputs start with the metadata alone
+        if header is not None and "indications" not in header:
+            return {
+                **header,
+                "indications": [json.loads(line) for line in f if line.strip()]
+            }
+
+        return json.loads(first_line + f.read())
@@ -0,0 +1,282 @@
+import bisect
+import mmap
+import os
+from pathlib import Path
+import struct
+
+import numpy as np
+import regex
+
+from test_directory_parser import hgnc
+
+MAGIC = b"HGNCLKP1"
+# magic followed by the number of symbols, previous references, alias
+# references and HGNC ids and the sizes of the symbol and HGNC id blobs
+HEADER = struct.Struct("<8s6Q")
+
+
+def get_section_sizes(
+    nb_symbols: int, nb_previous: int, nb_alias: int, nb_ids: int
+) -> list:
+    """ Get the name, dtype and length of the arrays of the lookup file in the
+    order they are written
+
+    Args:
+        nb_symbols (int): Number of symbols
+        nb_previous (int): Number of previous symbol references
+        nb_alias (int): Number of alias symbol references
+        nb_ids (int): Number of HGNC ids
+
+    Returns:
+        list: List of (name, dtype, length) tuples
+    """
+
+    return [
+        # symbol i is symbol_blob[symbol_offsets[i]:symbol_offsets[i + 1]]
+        ("symbol_offsets", "<u4", nb_symbols + 1),
+        # HGNC id number of the approved symbol, -1 if the symbol isn't one
+        ("approved", "<i4", nb_symbols),
+        # HGNC id numbers of the rows listing symbol i as a previous symbol
+        # are previous_refs[previous_offsets[i]:previous_offsets[i + 1]]
+        ("previous_offsets", "<u4", nb_symbols + 1),
+        ("alias_offsets", "<u4", nb_symbols + 1),
+        ("previous_refs", "<i4", nb_previous),
+        ("alias_refs", "<i4", nb_alias),
+        ("id_offsets", "<u4", nb_ids + 1),
+    ]
+
+
+def pack_strings(strings: list) -> tuple:
+    """ Concatenate strings into a blob with their offsets
+
+    Args:
+        strings (list): List of strings
+
+    Returns:
+        tuple: Offsets array and blob of the utf-8 encoded strings
+    """
+
+    encoded_strings = [string.encode() for string in strings]
+    offsets = np.zeros(len(encoded_strings) + 1, dtype="<u4")
+    np.cumsum(
+        [len(string) for string in encoded_strings], out=offsets[1:]
+    )
+    return offsets, b"".join(encoded_strings)
+
+
+def compile_lookup_file(hgnc_index: hgnc.HgncIndex, output: str):
+    """ Write the symbols of a HgncIndex as a binary lookup file that can be
+    memory mapped and searched without deserialising it
+
+    Args:
+        hgnc_index (HgncIndex): Index of the HGNC symbols
+        output (str): Path to the lookup file
+    """
+
+    # symbols are sorted on their utf-8 encoding to be binary searched
+    symbols = sorted(
+        set(hgnc_index.approved) | set(hgnc_index.previous) |
+        set(hgnc_index.alias), key=str.encode
+    )
+    hgnc_ids = sorted(
+        set(hgnc_index.approved.values()) |
+        {
+            hgnc_id
+            for symbol_map in [hgnc_index.previous, hgnc_index.alias]
+            for ids in symbol_map.values()
+            for hgnc_id in ids
+        }
+    )
+    id_numbers = {hgnc_id: i for i, hgnc_id in enumerate(hgnc_ids)}
+
+    arrays = {}
+    arrays["symbol_offsets"], symbol_blob = pack_strings(symbols)
+    arrays["id_offsets"], id_blob = pack_strings(hgnc_ids)
+    arrays["approved"] = np.array(
+        [
+            id_numbers[hgnc_index.approved[symbol]]
+            if symbol in hgnc_index.approved else -1
+            for symbol in symbols
+        ], dtype="<i4"
+    )
+
+    for name, symbol_map in [
+        ("previous", hgnc_index.previous), ("alias", hgnc_index.alias)
+    ]:
+        refs = [
+            [id_numbers[hgnc_id] for hgnc_id in symbol_map.get(symbol, [])]
+            for symbol in symbols
+        ]
+        offsets = np.zeros(len(symbols) + 1, dtype="<u4")
+        np.cumsum([len(symbol_refs) for symbol_refs in refs], out=offsets[1:])
+        arrays[f"{name}_offsets"] = offsets
+        arrays[f"{name}_refs"] = np.array(
+            [ref for symbol_refs in refs for ref in symbol_refs], dtype="<i4"
+        )
+
+    header = HEADER.pack(
+        MAGIC, len(symbols), len(arrays["previous_refs"]),
+        len(arrays["alias_refs"]), len(hgnc_ids), len(symbol_blob),
+        len(id_blob)
+    )
+
+    # write to a temporary file first so that processes reading the lookup
+    # file never see a partial one
+    tmp_output = Path(f"{output}.tmp")
+
+    with open(tmp_output, "wb") as f:
+        f.write(header)
+
+        for name, dtype, length in get_section_sizes(
+            len(symbols), len(arrays["previous_refs"]),
+            len(arrays["alias_refs"]), len(hgnc_ids)
+        ):
+            f.write(arrays[name].astype(dtype).tobytes())
+
+        f.write(symbol_blob)
+        f.write(id_blob)
+
+    os.replace(tmp_output, output)
+
+
+class StringTable:
+    def __init__(self, offsets: np.ndarray, blob: memoryview):
+        """ Sequence of the strings of a blob, decoded on access
+
+        Args:
+            offsets (np.ndarray): Offsets of the strings in the blob
+            blob (memoryview): Concatenated utf-8 encoded strings
+        """
+
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> bytes:
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]])
+
+    def find(self, string: str) -> int:
+        """ Binary search a string in the sorted table
+
+        Args:
+            string (str): String to look for
+
+        Returns:
+            int: Position of the string, -1 if it is absent
+        """
+
+        encoded_string = string.encode()
+        i = bisect.bisect_left(self, encoded_string)
+
+        if i < len(self) and self[i] == encoded_string:
+            return i
+
+        return -1
+
+
+class HgncLookupFile(hgnc.HgncResolver):
+    def __init__(self, path: str):
+        """ Memory map a lookup file written by compile_lookup_file. The pages
+        are shared between the processes opening the same file and pickling
+        the object only sends its path
+
+        Args:
+            path (str): Path to the lookup file
+
+        Raises:
+            Exception: if the file isn't a lookup file
+        """
+
+        self.path = str(path)
+
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (
+            magic, nb_symbols, nb_previous, nb_alias, nb_ids,
+            symbol_blob_size, id_blob_size
+        ) = HEADER.unpack_from(self._mmap)
+
+        if magic != MAGIC:
+            raise Exception(f"{self.path} is not a HGNC lookup file")
+
+        offset = HEADER.size
+        arrays = {}
+
+        for name, dtype, length in get_section_sizes(
+            nb_symbols, nb_previous, nb_alias, nb_ids
+        ):
+            arrays[name] = np.frombuffer(
+                self._mmap, dtype=dtype, count=length, offset=offset
+            )
+            offset += arrays[name].nbytes
+
+        buffer = memoryview(self._mmap)
+        self.symbols = StringTable(
+            arrays["symbol_offsets"],
+            buffer[offset:offset + symbol_blob_size]
+        )
+        offset += symbol_blob_size
+        self.hgnc_ids = StringTable(
+            arrays["id_offsets"], buffer[offset:offset + id_blob_size]
+        )
+        self.approved = arrays["approved"]
+        self.previous_offsets = arrays["previous_offsets"]
+        self.previous_refs = arrays["previous_refs"]
+        self.alias_offsets = arrays["alias_offsets"]
+        self.alias_refs = arrays["alias_refs"]
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def get_hgnc_id(self, id_number: int) -> str:
+        """ Get the HGNC id from its number in the lookup file
+
+        Args:
+            id_number (int): Number of the HGNC id
+
+        Returns:
+            str: HGNC id
+        """
+
+        return self.hgnc_ids[id_number].decode()
+
+    def resolve(self, gene_symbol: str) -> tuple:
+        """ Resolve a gene symbol using the same rules as find_hgnc_id
+
+        Args:
+            gene_symbol (str): Gene symbol
+
+        Returns:
+            tuple: HGNC id, whether the previous symbols were used and whether
+            the alias symbols were used
+        """
+
+        i = self.symbols.find(gene_symbol)
+
+        if i != -1 and self.approved[i] != -1:
+            return self.get_hgnc_id(self.approved[i]), None, None
+
+        if not regex.match(r"[A-Z]+[A-Z0-9]+", gene_symbol) or i == -1:
+            return None, None, None
+
+        previous_refs = self.previous_refs[
+            self.previous_offsets[i]:self.previous_offsets[i + 1]
+        ]
+        alias_refs = self.alias_refs[
+            self.alias_offsets[i]:self.alias_offsets[i + 1]
+        ]
+
+        if len(previous_refs) == 1 and not len(alias_refs):
+            return self.get_hgnc_id(previous_refs[0]), True, False
+
+        if not len(previous_refs) and len(alias_refs) == 1:
+            return self.get_hgnc_id(alias_refs[0]), False, True
+
+        # multiple matches cannot be resolved
+        return None, bool(len(previous_refs)), bool(len(alias_refs))
@@ -0,0 +1,107 @@
+from test_directory_parser import rare_disease
+from test_directory_parser import test_directory
+from test_directory_parser import utils
+
+
+def run_rare_disease(
+    test_directory_path: str, config_path: str, hgnc_data, output: str,
+    lab_excel: str = None, streaming: bool = False, cache_dir: str = None,
+    previous_indications: list = None, strict: bool = True,
+    output_format: str = "json", compress: bool = False,
+    processes: int = None
+) -> test_directory.TestDirectory:
+    """ Parse a rare disease test directory and output its clinical
+    indications as a JSON file if an output is given
+
+    Args:
+        test_directory_path (str): Path to the test directory
+        config_path (str): Path to the config file
+        hgnc_data (HgncIndex): HGNC dump dataframe or HgncIndex built from it
+        output (str): Path to the output, nothing is written if None
+        lab_excel (str, optional): Excel file containing the clinical
+        indications that the lab handles
+        streaming (bool, optional): Whether to read the test directory row by
+        row using a read-only workbook
+        cache_dir (str, optional): Path to the cache directory
+        previous_indications (list, optional): Indications of a previous
+        output to carry over unchanged clinical indications from
+        strict (bool, optional): Whether tests of the lab excel missing from
+        the test directory are an error
+        output_format (str, optional): "json", "compact" or "ndjson"
+        compress (bool, optional): Whether to gzip the output
+        processes (int, optional): Number of processes to build the clinical
+        indications with
+
+    Returns:
+        TestDirectory: Test directory object
+    """
+
+    # the sheet and columns are checked from the header before loading the
+    # whole sheet, unless it is cached
+    rd_test_directory = test_directory.TestDirectory(
+        test_directory_path, config_path, "rare_disease", hgnc_data,
+        streaming, cache_dir, validate=True
+    )
+    rd_test_directory.setup_clinical_indications(
+        previous_indications, processes
+    )
+
+    if lab_excel:
+        lab_df = utils.parse_lab_excel(lab_excel)
+        rd_test_directory.filter_clinical_indications(lab_df, strict)
+
+    if output:
+        rd_test_directory.output_json(output, output_format, compress)
+
+    return rd_test_directory
+
+
+def run_release(
+    test_directory_path: str, configs: dict, hgnc_data, outputs: dict,
+    lab_excel: str = None, cache_dir: str = None, strict: bool = True,
+    output_format: str = "json", compress: bool = False,
+    processes: int = None
+) -> dict:
+    """ Parse several sheets of a test directory release, i.e. the rare
+    disease and cancer indications, opening the workbook once and output one
+    JSON file per sheet type
+
+    Args:
+        test_directory_path (str): Path to the test directory
+        configs (dict): Dict of sheet type to the path of its config
+        hgnc_data (HgncIndex): HGNC dump dataframe or HgncIndex built from it
+        outputs (dict): Dict of sheet type to the path of its output
+        lab_excel (str, optional): Excel file containing the rare disease
+        clinical indications that the lab handles
+        cache_dir (str, optional): Path to the cache directory
+        strict (bool, optional): Whether tests of the lab excel missing from
+        the test directory are an error
+        output_format (str, optional): "json", "compact" or "ndjson"
+        compress (bool, optional): Whether to gzip the outputs
+        processes (int, optional): Number of processes to build the clinical
+        indications with
+
+    Returns:
+        dict: Dict of sheet type to its test directory object
+    """
+
+    test_directories = {}
+
+    with rare_disease.WorkbookSession(test_directory_path) as session:
+        for td_type, config_path in configs.items():
+            test_directories[td_type] = test_directory.TestDirectory(
+                test_directory_path, config_path, td_type, hgnc_data,
+                cache_dir=cache_dir, session=session, validate=True
+            )
+
+    for td_type, td in test_directories.items():
+        td.setup_clinical_indications(processes=processes)
+
+        # the lab excel lists rare disease tests
+        if lab_excel and td_type == "rare_disease":
+            lab_df = utils.parse_lab_excel(lab_excel)
+            td.filter_clinical_indications(lab_df, strict)
+
+        td.output_json(outputs[td_type], output_format, compress)
+
+    return test_directories
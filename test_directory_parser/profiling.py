@@ -0,0 +1,322 @@
+import contextlib
+import cProfile
+import functools
+import json
+import time
+import tracemalloc
+
+from test_directory_parser import hgnc
+from test_directory_parser import lookup_file
+from test_directory_parser import rare_disease
+from test_directory_parser import test_directory
+from test_directory_parser import utils
+
+# functions timed as pipeline stages: (owner, attribute name, stage name)
+STAGES = [
+    # the HGNC load includes reading the dump, or the cache, and building
+    # the index
+    (hgnc, "load_hgnc_index", "load_hgnc_index"),
+    (hgnc, "read_hgnc_dump", "read_hgnc_dump"),
+    (hgnc.HgncIndex, "__init__", "build_hgnc_index"),
+    (rare_disease, "parse_config", "parse_config"),
+    (rare_disease, "parse_rare_disease_td", "parse_rare_disease_td"),
+    (
+        test_directory.TestDirectory, "setup_clinical_indications",
+        "setup_clinical_indications"
+    ),
+    (
+        test_directory.TestDirectory, "filter_clinical_indications",
+        "filter_clinical_indications"
+    ),
+    (utils, "parse_lab_excel", "parse_lab_excel"),
+    (test_directory.TestDirectory, "output_json", "output_json"),
+]
+
+
+def get_lookup_path(hgnc_id, previous, alias) -> str:
+    """ Get the path taken to resolve a gene symbol from the output of a HGNC
+    lookup
+
+    Args:
+        hgnc_id (str): HGNC id found
+        previous (bool): Whether the previous symbols were used
+        alias (bool): Whether the alias symbols were used
+
+    Returns:
+        str: "approved", "previous", "alias", "ambiguous" or "not_found"
+    """
+
+    if previous is None:
+        return "approved" if hgnc_id else "not_found"
+
+    if previous and alias:
+        return "ambiguous"
+
+    if not hgnc_id:
+        return "ambiguous"
+
+    return "previous" if previous else "alias"
+
+
+class Profiler:
+    def __init__(self):
+        """ Setup the profiler recording the stages of the pipeline and the
+        HGNC lookups """
+
+        self.stages = {}
+        self.lookups = {}
+        self.stack = []
+        # memory traced before the traces were last cleared
+        self.base = 0
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """ Record the wall time, CPU time and peak traced memory of a stage
+
+        Args:
+            name (str): Name of the stage
+        """
+
+        # tracemalloc.reset_peak needs python 3.9, the traces are cleared
+        # instead and the memory traced before is kept in self.base
+        current_memory, peak_memory = tracemalloc.get_traced_memory()
+
+        if self.stack:
+            # keep the peak of the enclosing stage before clearing the traces
+            self.stack[-1]["peak"] = max(
+                self.stack[-1]["peak"], self.base + peak_memory
+            )
+
+        self.base += current_memory
+        tracemalloc.clear_traces()
+        current = {"peak": 0, "start": self.base}
+        self.stack.append(current)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - wall_start
+            cpu_time = time.process_time() - cpu_start
+            peak = max(
+                current["peak"],
+                self.base + tracemalloc.get_traced_memory()[1]
+            )
+            self.stack.pop()
+
+            if self.stack:
+                self.stack[-1]["peak"] = max(self.stack[-1]["peak"], peak)
+
+            # peak allocated on top of the memory in use when the stage
+            # started
+            peak -= current["start"]
+            stage = self.stages.setdefault(
+                name, {
+                    "calls": 0, "wall_seconds": 0, "cpu_seconds": 0,
+                    "peak_memory_mb": 0
+                }
+            )
+            stage["calls"] += 1
+            stage["wall_seconds"] += wall_time
+            stage["cpu_seconds"] += cpu_time
+            stage["peak_memory_mb"] = max(
+                stage["peak_memory_mb"], peak / 1024 / 1024
+            )
+
+    def record_lookup(self, name: str, path: str, elapsed: float):
+        """ Record a HGNC lookup
+
+        Args:
+            name (str): Name of the lookup function
+            path (str): Path taken to resolve the symbol
+            elapsed (float): Time taken in seconds
+        """
+
+        lookup = self.lookups.setdefault(
+            name, {"calls": 0, "seconds": 0, "paths": {}}
+        )
+        lookup["calls"] += 1
+        lookup["seconds"] += elapsed
+        lookup_path = lookup["paths"].setdefault(
+            path, {"calls": 0, "seconds": 0}
+        )
+        lookup_path["calls"] += 1
+        lookup_path["seconds"] += elapsed
+
+    def wrap_stage(self, func, name: str):
+        """ Wrap a function so that its calls are recorded as a stage
+
+        Args:
+            func (callable): Function to wrap
+            name (str): Name of the stage
+
+        Returns:
+            callable: Wrapped function
+        """
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.stage(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    def wrap_lookup(self, func, name: str):
+        """ Wrap a single symbol lookup function returning either a Series
+        or a (HGNC id, previous, alias) tuple
+
+        Args:
+            func (callable): Function to wrap
+            name (str): Name of the lookup
+
+        Returns:
+            callable: Wrapped function
+        """
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+
+            if isinstance(result, tuple):
+                path = get_lookup_path(*result)
+            else:
+                path = get_lookup_path(
+                    result["HGNC ID"], result["Previous"], result["Alias"]
+                )
+
+            self.record_lookup(name, path, elapsed)
+            return result
+
+        return wrapper
+
+    def wrap_batch_lookup(self, func, name: str):
+        """ Wrap the batch lookup function, recording the path of every
+        symbol
+
+        Args:
+            func (callable): Function to wrap
+            name (str): Name of the lookup
+
+        Returns:
+            callable: Wrapped function
+        """
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+            lookup = self.lookups.setdefault(
+                name, {"calls": 0, "seconds": 0, "symbols": 0, "paths": {}}
+            )
+            lookup["calls"] += 1
+            lookup["seconds"] += elapsed
+            lookup["symbols"] += len(result)
+
+            for row in zip(
+                result["HGNC ID"], result["Previous"], result["Alias"]
+            ):
+                path = get_lookup_path(*row)
+                lookup["paths"][path] = lookup["paths"].get(path, 0) + 1
+
+            return result
+
+        return wrapper
+
+    @contextlib.contextmanager
+    def instrumented(self):
+        """ Replace the functions of the pipeline by recording wrappers and
+        restore them on exit, nothing is instrumented outside of it """
+
+        patches = [
+            (
+                owner, attribute,
+                self.wrap_stage(getattr(owner, attribute), name)
+            )
+            for owner, attribute, name in STAGES
+        ]
+        patches.extend([
+            (
+                utils, "find_hgnc_id",
+                self.wrap_lookup(utils.find_hgnc_id, "find_hgnc_id")
+            ),
+            (
+                utils, "find_hgnc_ids",
+                self.wrap_batch_lookup(utils.find_hgnc_ids, "find_hgnc_ids")
+            ),
+            (
+                hgnc.HgncIndex, "resolve",
+                self.wrap_lookup(hgnc.HgncIndex.resolve, "HgncIndex.resolve")
+            ),
+            (
+                lookup_file.HgncLookupFile, "resolve",
+                self.wrap_lookup(
+                    lookup_file.HgncLookupFile.resolve,
+                    "HgncLookupFile.resolve"
+                )
+            ),
+        ])
+        originals = [
+            (owner, attribute, getattr(owner, attribute))
+            for owner, attribute, wrapper in patches
+        ]
+
+        for owner, attribute, wrapper in patches:
+            setattr(owner, attribute, wrapper)
+
+        tracemalloc.start()
+
+        try:
+            yield self
+        finally:
+            tracemalloc.stop()
+
+            for owner, attribute, original in originals:
+                setattr(owner, attribute, original)
+
+    def report(self) -> dict:
+        """ Get the recorded data
+
+        Returns:
+            dict: Dict with the stages and the HGNC lookups
+        """
+
+        return {"stages": self.stages, "hgnc_lookups": self.lookups}
+
+
+def run_profiled(
+    func, args, report: str = None, cprofile_output: str = None
+):
+    """ Run a function with the pipeline instrumented and/or under cProfile
+
+    Args:
+        func (callable): Function to run, given args
+        args (Namespace): Arguments given to the function
+        report (str, optional): Path to the JSON report of the stages and
+        HGNC lookups
+        cprofile_output (str, optional): Path to the cProfile dump
+    """
+
+    profiler = Profiler()
+    instrumentation = (
+        profiler.instrumented() if report else contextlib.nullcontext()
+    )
+    cprofiler = cProfile.Profile() if cprofile_output else None
+
+    with instrumentation:
+        if cprofiler:
+            cprofiler.enable()
+
+        try:
+            func(args)
+        finally:
+            if cprofiler:
+                cprofiler.disable()
+                cprofiler.dump_stats(cprofile_output)
+
+    if report:
+        with open(report, "w") as f:
+            json.dump(profiler.report(), f, indent=2)
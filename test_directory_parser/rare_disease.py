@@ -1,7 +1,12 @@
 import json
+from pathlib import Path
 
+import numpy as np
+import openpyxl
 import pandas as pd
 
+from test_directory_parser import cache
+
 
 def parse_config(config: str):
     """ Parse config file
@@ -19,32 +24,28 @@ def parse_config(config: str):
     return config_data
 
 
-def parse_rare_disease_td(test_directory: str, config: dict):
-    """Parse rare disease test directory using the config file
+def find_change_column(columns: list, config: dict) -> str:
+    """ Find the name of the column containing the changes
 
     Args:
-        test_directory (str): Path to the test directory
+        columns (list): Names of the columns of the test directory
         config (dict): Dict containing the data for the config file
 
+    Raises:
+        Exception: if none or more than one column match
+
     Returns:
-        pandas.Dataframe: Dataframe containing the columns of interest
+        str: Name of the change column
     """
 
-    xls = pd.read_excel(
-        test_directory,
-        sheet_name=config["sheet_of_interest"],
-        header=config["header_index"]
-    )
-
-    # find name of change column
     change_column = [
-        col for col in xls.columns
+        col for col in columns
         if config['changes_column'].lower() in col.lower()
     ]
 
     if change_column:
         if len(change_column) == 1:
-            change_column = change_column[0]
+            return change_column[0]
         else:
             raise Exception((
                 "2 or more columns were detected as having "
@@ -55,20 +56,642 @@ def parse_rare_disease_td(test_directory: str, config: dict):
     else:
         raise Exception("Couldn't find the change column.")
 
-    data = xls.loc(axis=1)[
+
+def get_columns_of_interest(config: dict, change_column: str) -> list:
+    """ Get the names of the columns to extract from the test directory
+
+    Args:
+        config (dict): Dict containing the data for the config file
+        change_column (str): Name of the change column
+
+    Returns:
+        list: List of column names
+    """
+
+    columns = [
         config["clinical_indication_column_code"],
         config["clinical_indication_column_name"],
         config["panel_column"],
-        config["test_method_column"],
-        config["ngs_column"],
-        change_column
+        config["test_method_column"]
     ]
 
-    # filter using the NGS tests used in the lab
-    filtered_data = data.loc[
-        data[
-            config["ngs_column"]
-        ].isin(config["ngs_type"])
+    # sheets without a technology column aren't filtered
+    if config.get("ngs_column"):
+        columns.append(config["ngs_column"])
+
+    columns.append(change_column)
+    return columns
+
+
+def get_header_names(header: tuple) -> list:
+    """ Convert the cells of a header row to column names the same way pandas
+    does for unnamed and duplicated columns
+
+    Args:
+        header (tuple): Values of the header row
+
+    Returns:
+        list: List of column names
+    """
+
+    columns = []
+    seen = {}
+
+    for i, cell in enumerate(header):
+        column = f"Unnamed: {i}" if cell is None else str(cell)
+
+        if column in seen:
+            seen[column] += 1
+            column = f"{column}.{seen[column]}"
+        else:
+            seen[column] = 0
+
+        columns.append(column)
+
+    return columns
+
+
+def read_header(workbook, config: dict) -> list:
+    """ Read the header row of the sheet of interest of a config
+
+    Args:
+        workbook (openpyxl.Workbook): Workbook opened in read-only mode
+        config (dict): Dict containing the data for the config file
+
+    Returns:
+        list: List of column names, None if the sheet or header is missing
+    """
+
+    if config["sheet_of_interest"] not in workbook.sheetnames:
+        return None
+
+    rows = workbook[config["sheet_of_interest"]].iter_rows(
+        min_row=config["header_index"] + 1,
+        max_row=config["header_index"] + 1, values_only=True
+    )
+    header = next(rows, None)
+
+    if header is None:
+        return None
+
+    return get_header_names(header)
+
+
+def check_header(sheetnames: list, columns: list, config: dict) -> tuple:
+    """ Check the sheet names and header of a test directory against a config
+    without loading its data
+
+    Args:
+        sheetnames (list): Names of the sheets of the test directory
+        columns (list): Names of the columns of the header at the header index
+        of the config, None if the sheet or header is missing
+        config (dict): Dict containing the data for the config file
+
+    Returns:
+        tuple: Number of expected columns found, number of expected columns
+        and list of the problems found, empty if the config can be used
+    """
+
+    expected_columns = [
+        config.get(key) for key in [
+            "clinical_indication_column_code",
+            "clinical_indication_column_name", "panel_column",
+            "test_method_column", "ngs_column"
+        ]
+        # the technology column is optional
+        if key != "ngs_column" or config.get("ngs_column")
+    ]
+    nb_expected = len(expected_columns) + 1
+
+    if config.get("sheet_of_interest") not in sheetnames:
+        return 0, nb_expected, [
+            f"Missing sheet '{config.get('sheet_of_interest')}'"
+        ]
+
+    if columns is None:
+        return 0, nb_expected, [
+            f"No header at index {config.get('header_index')} of sheet "
+            f"'{config['sheet_of_interest']}'"
+        ]
+
+    problems = [
+        f"Missing column '{column}'"
+        for column in expected_columns if column not in columns
     ]
 
+    if "changes_column" not in config:
+        problems.append("No changes_column in the config")
+    else:
+        try:
+            find_change_column(columns, config)
+        except Exception:
+            problems.append(
+                f"Missing or duplicated column containing "
+                f"'{config['changes_column']}'"
+            )
+
+    return nb_expected - len(problems), nb_expected, problems
+
+
+def matches_config(columns: list, config: dict) -> bool:
+    """ Check that the columns of a header contain the columns of interest of
+    a config
+
+    Args:
+        columns (list): Names of the columns of the test directory
+        config (dict): Dict containing the data for the config file
+
+    Returns:
+        bool: Whether the config can be used with these columns
+    """
+
+    if columns is None:
+        return False
+
+    found, expected, problems = check_header(
+        [config.get("sheet_of_interest")], columns, config
+    )
+    return not problems
+
+
+def score_configs(
+    session, config_paths: list, td_type: str = "rare_disease"
+) -> list:
+    """ Score configs against the sheet names and headers of a test directory,
+    only the header row at the header index of every config is read
+
+    Args:
+        session (WorkbookSession): Session of the test directory workbook
+        config_paths (list): Paths to the config files, named by date
+        td_type (str, optional): Type of the sheet i.e. rare_disease, cancer.
+        Configs without a td_type are rare disease ones
+
+    Returns:
+        list: List of (config path, columns found, columns expected,
+        problems, header) tuples from the best to the worst match. Full
+        matches come first, the ones expecting the most columns and then the
+        most recent first
+    """
+
+    sheetnames = session.get_workbook().sheetnames
+    headers = {}
+    scores = []
+
+    for config_path in config_paths:
+        config = parse_config(config_path)
+
+        if config.get("td_type", "rare_disease") != td_type:
+            continue
+
+        # configs of different dates usually share their header row
+        header_key = (
+            config.get("sheet_of_interest"), config.get("header_index")
+        )
+
+        if header_key not in headers:
+            try:
+                headers[header_key] = session.read_header(config)
+            except Exception:
+                headers[header_key] = None
+
+        found, expected, problems = check_header(
+            sheetnames, headers[header_key], config
+        )
+        scores.append(
+            (config_path, found, expected, problems, headers[header_key])
+        )
+
+    # config names start with their date
+    scores.sort(
+        key=lambda score: (
+            not score[3], score[1] / score[2], score[2],
+            Path(score[0]).name
+        ), reverse=True
+    )
+    return scores
+
+
+def format_header_problems(
+    test_directory: str, config_name: str, problems: list, header: list
+) -> str:
+    """ Describe the differences between a config and a test directory header
+
+    Args:
+        test_directory (str): Path to the test directory
+        config_name (str): Name of the config
+        problems (list): Problems found by check_header
+        header (list): Columns of the header, None if it couldn't be read
+
+    Returns:
+        str: Message listing the problems and the columns of the header
+    """
+
+    message = [f"{config_name} doesn't match {test_directory}:"]
+    message.extend(f"  - {problem}" for problem in problems)
+
+    if header:
+        message.append(
+            "  Header columns: " +
+            "; ".join(column for column in header if column)
+        )
+
+    return "\n".join(message)
+
+
+def select_config(
+    test_directory: str, config_paths: list, td_type: str = "rare_disease",
+    preferred_config: str = None
+) -> str:
+    """ Select the config matching the header of a test directory without
+    loading its data. If several match, the one expecting the most columns is
+    picked
+
+    Args:
+        test_directory (str): Path to the test directory
+        config_paths (list): Paths to the config files, named by date
+        td_type (str, optional): Type of the sheet i.e. rare_disease, cancer.
+        Configs without a td_type are rare disease ones
+        preferred_config (str, optional): Path to a config picked whenever it
+        matches the header, i.e. to choose between configs matching equally
+
+    Raises:
+        Exception: if no config matches, listing the column differences of
+        the closest configs, or if several configs match equally well as
+        their other fields i.e. ngs_test_methods may differ, unless the
+        preferred config is one of them
+
+    Returns:
+        str: Path to the selected config
+    """
+
+    config_paths = list(config_paths)
+
+    if preferred_config is not None:
+        preferred_path = Path(preferred_config).resolve()
+
+        if preferred_path not in [
+            Path(config_path).resolve() for config_path in config_paths
+        ]:
+            config_paths.append(preferred_config)
+
+    with WorkbookSession(test_directory) as session:
+        scores = score_configs(session, config_paths, td_type)
+
+    if preferred_config is not None:
+        for config_path, found, expected, problems, header in scores:
+            if not problems and Path(config_path).resolve() == preferred_path:
+                return config_path
+
+    if scores and not scores[0][3]:
+        # full matches expecting as many columns as the best one
+        candidates = [
+            config_path
+            for config_path, found, expected, problems, header in scores
+            if not problems and expected == scores[0][2]
+        ]
+
+        if len(candidates) > 1:
+            raise Exception(
+                f"Several configs match the header of {test_directory} "
+                "equally: "
+                f"{', '.join(Path(path).name for path in candidates)}. "
+                "Give the one to prefer with --config"
+            )
+
+        return scores[0][0]
+
+    if not scores:
+        raise Exception(f"No {td_type} config to select from")
+
+    best_found = scores[0][1]
+    closest_configs = [
+        format_header_problems(
+            test_directory, Path(config_path).name, problems, header
+        )
+        for config_path, found, expected, problems, header in scores
+        if found == best_found
+    ]
+
+    raise Exception(
+        f"No config matches the header of {test_directory}\n" +
+        "\n".join(closest_configs)
+    )
+
+
+def validate_test_directory(
+    test_directory: str, config: dict, session=None
+):
+    """ Check the sheet and columns of interest of a config against the
+    header of a test directory before loading its data
+
+    Args:
+        test_directory (str): Path to the test directory
+        config (dict): Dict containing the data for the config file
+        session (WorkbookSession, optional): Session of the test directory
+        workbook, used instead of opening the file again
+
+    Raises:
+        Exception: if the sheet or columns of interest are missing
+    """
+
+    if session is None:
+        with WorkbookSession(test_directory) as session:
+            return validate_test_directory(test_directory, config, session)
+
+    header = session.read_header(config)
+    found, expected, problems = check_header(
+        session.get_workbook().sheetnames, header, config
+    )
+
+    if problems:
+        raise Exception(
+            format_header_problems(
+                test_directory, config.get("name", "config"), problems,
+                header
+            )
+        )
+
+
+def stream_rare_disease_td(test_directory: str, config: dict):
+    """ Parse rare disease test directory row by row using a read-only
+    workbook so that only the columns of interest of the NGS rows are loaded
+
+    Args:
+        test_directory (str): Path to the test directory
+        config (dict): Dict containing the data for the config file
+
+    Raises:
+        Exception: if the header or the columns of interest can't be found
+
+    Returns:
+        tuple: Dataframe containing the columns of interest and name of the
+        change column
+    """
+
+    workbook = openpyxl.load_workbook(
+        test_directory, read_only=True, data_only=True
+    )
+
+    try:
+        return extract_sheet(workbook, config)
+    finally:
+        workbook.close()
+
+
+def extract_sheet(workbook, config: dict):
+    """ Extract the columns of interest of the NGS rows of the sheet of a
+    config from an opened workbook
+
+    Args:
+        workbook (openpyxl.Workbook): Workbook opened in read-only mode
+        config (dict): Dict containing the data for the config file
+
+    Raises:
+        Exception: if the header or the columns of interest can't be found
+
+    Returns:
+        tuple: Dataframe containing the columns of interest and name of the
+        change column
+    """
+
+    rows = workbook[config["sheet_of_interest"]].iter_rows(values_only=True)
+
+    for i in range(config["header_index"]):
+        next(rows, None)
+
+    header = next(rows, None)
+
+    if header is None:
+        raise Exception(
+            f"Couldn't find the header at index {config['header_index']}"
+        )
+
+    columns = get_header_names(header)
+    change_column = find_change_column(columns, config)
+    columns_of_interest = get_columns_of_interest(config, change_column)
+    missing_columns = [
+        column for column in columns_of_interest if column not in columns
+    ]
+
+    if missing_columns:
+        raise Exception(
+            f"Couldn't find the columns: {';'.join(missing_columns)}"
+        )
+
+    column_indexes = [columns.index(column) for column in columns_of_interest]
+
+    if config.get("ngs_column"):
+        ngs_index = columns.index(config["ngs_column"])
+        ngs_types = set(config["ngs_type"])
+    else:
+        ngs_index = None
+
+    records = []
+    row_indexes = []
+
+    for row_index, row in enumerate(rows):
+        # filter using the NGS tests used in the lab
+        if ngs_index is not None and (
+            ngs_index >= len(row) or row[ngs_index] not in ngs_types
+        ):
+            continue
+
+        records.append([
+            row[i] if i < len(row) and row[i] is not None else np.nan
+            for i in column_indexes
+        ])
+        row_indexes.append(row_index)
+
+    filtered_data = pd.DataFrame(
+        records, index=row_indexes, columns=columns_of_interest
+    )
+
     return filtered_data, change_column
+
+
+class WorkbookSession:
+    def __init__(self, test_directory: str):
+        """ Keep a test directory workbook open so that several sheets or
+        headers can be read from it while opening the file once. The workbook
+        is opened on first use
+
+        Args:
+            test_directory (str): Path to the test directory
+        """
+
+        self.test_directory = test_directory
+        self.workbook = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get_workbook(self):
+        """ Get the workbook, opening it in read-only mode if needed
+
+        Returns:
+            openpyxl.Workbook: Workbook of the test directory
+        """
+
+        if self.workbook is None:
+            self.workbook = openpyxl.load_workbook(
+                self.test_directory, read_only=True, data_only=True
+            )
+
+        return self.workbook
+
+    def read_header(self, config: dict) -> list:
+        """ Read the header row of the sheet of interest of a config
+
+        Args:
+            config (dict): Dict containing the data for the config file
+
+        Returns:
+            list: List of column names, None if the sheet or header is missing
+        """
+
+        return read_header(self.get_workbook(), config)
+
+    def extract_sheet(self, config: dict):
+        """ Extract the sheet of interest of a config
+
+        Args:
+            config (dict): Dict containing the data for the config file
+
+        Returns:
+            tuple: Dataframe containing the columns of interest and name of
+            the change column
+        """
+
+        return extract_sheet(self.get_workbook(), config)
+
+    def close(self):
+        if self.workbook is not None:
+            self.workbook.close()
+            self.workbook = None
+
+
+def read_rare_disease_td(test_directory: str, config: dict):
+    """ Parse rare disease test directory by loading the whole sheet with
+    pandas
+
+    Args:
+        test_directory (str): Path to the test directory
+        config (dict): Dict containing the data for the config file
+
+    Returns:
+        tuple: Dataframe containing the columns of interest and name of the
+        change column
+    """
+
+    xls = pd.read_excel(
+        test_directory,
+        sheet_name=config["sheet_of_interest"],
+        header=config["header_index"]
+    )
+
+    # find name of change column
+    change_column = find_change_column(xls.columns, config)
+
+    data = xls.loc(axis=1)[
+        get_columns_of_interest(config, change_column)
+    ]
+
+    # filter using the NGS tests used in the lab
+    if config.get("ngs_column"):
+        filtered_data = data.loc[
+            data[
+                config["ngs_column"]
+            ].isin(config["ngs_type"])
+        ]
+    else:
+        filtered_data = data
+
+    return filtered_data, change_column
+
+
+def get_cache_key(config: dict) -> dict:
+    """ Get the config fields that the extracted sheet depends on
+
+    Args:
+        config (dict): Dict containing the data for the config file
+
+    Returns:
+        dict: Dict of the config fields used for extracting the sheet
+    """
+
+    return {
+        field: config.get(field)
+        for field in [
+            "sheet_of_interest", "header_index",
+            "clinical_indication_column_code",
+            "clinical_indication_column_name", "panel_column",
+            "test_method_column", "changes_column", "ngs_column", "ngs_type"
+        ]
+    }
+
+
+def parse_rare_disease_td(
+    test_directory: str, config: dict, streaming: bool = False,
+    cache_dir: str = None, session: WorkbookSession = None,
+    validate: bool = False
+):
+    """Parse rare disease test directory using the config file
+
+    Args:
+        test_directory (str): Path to the test directory
+        config (dict): Dict containing the data for the config file
+        streaming (bool, optional): Whether to read the test directory row by
+        row using a read-only workbook
+        cache_dir (str, optional): Path to the cache directory in which the
+        extracted sheet is stored for subsequent runs
+        session (WorkbookSession, optional): Session of the test directory
+        workbook, used instead of opening the file again
+        validate (bool, optional): Whether to check the sheet and columns of
+        interest against the header before loading the sheet, skipped when
+        the cache is hit
+
+    Returns:
+        pandas.Dataframe: Dataframe containing the columns of interest
+    """
+
+    if cache_dir:
+        cache_key = get_cache_key(config)
+        cached_data = cache.load_cached(
+            cache_dir, "test_directory", test_directory, cache_key
+        )
+
+        if cached_data is not None:
+            print(f"Test directory cache hit: {test_directory}")
+            return cached_data
+
+        print(f"Test directory cache miss: {test_directory}")
+
+    own_session = None
+
+    if validate and session is None and streaming:
+        # the workbook opened to read the header is used for the extraction
+        session = own_session = WorkbookSession(test_directory)
+
+    try:
+        if validate:
+            validate_test_directory(test_directory, config, session)
+
+        if session:
+            data = session.extract_sheet(config)
+        elif streaming:
+            data = stream_rare_disease_td(test_directory, config)
+        else:
+            data = read_rare_disease_td(test_directory, config)
+    finally:
+        if own_session:
+            own_session.close()
+
+    if cache_dir:
+        cache.store_cached(
+            cache_dir, "test_directory", test_directory, data, cache_key
+        )
+
+    return data
@@ -0,0 +1,214 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import traceback
+
+from test_directory_parser import hgnc
+from test_directory_parser import json_output
+from test_directory_parser import lookup_file
+from test_directory_parser import pipeline
+
+
+class RequestError(Exception):
+    """ Invalid request sent to the parse service """
+
+
+class ParseService:
+    def __init__(
+        self, hgnc_dump: str = None, hgnc_lookup: str = None,
+        cache_dir: str = None, drop_withdrawn: bool = False
+    ):
+        """ Keep the HGNC data loaded between parse requests
+
+        Args:
+            hgnc_dump (str, optional): Path to the HGNC dump
+            hgnc_lookup (str, optional): Path to a compiled HGNC lookup file,
+            used instead of the HGNC dump
+            cache_dir (str, optional): Path to the cache directory
+            drop_withdrawn (bool, optional): Whether to ignore the withdrawn
+            entries of the HGNC dump
+        """
+
+        self.hgnc_dump = hgnc_dump
+        self.hgnc_lookup = hgnc_lookup
+        self.cache_dir = cache_dir
+        self.drop_withdrawn = drop_withdrawn
+        self.lock = threading.Lock()
+        self.hgnc_data = None
+        self.reload()
+
+    def reload(self, hgnc_dump: str = None, hgnc_lookup: str = None) -> dict:
+        """ Load the HGNC data again, i.e. after a new dump was downloaded.
+        Requests already running keep using the previous data
+
+        Args:
+            hgnc_dump (str, optional): Path to a new HGNC dump
+            hgnc_lookup (str, optional): Path to a new compiled HGNC lookup
+            file
+
+        Raises:
+            Exception: if no HGNC data is given
+
+        Returns:
+            dict: Dict with the HGNC files in use
+        """
+
+        with self.lock:
+            if hgnc_lookup:
+                hgnc_dump = None
+            elif not hgnc_dump:
+                hgnc_dump, hgnc_lookup = self.hgnc_dump, self.hgnc_lookup
+
+            if hgnc_lookup:
+                hgnc_data = lookup_file.HgncLookupFile(hgnc_lookup)
+            elif hgnc_dump:
+                hgnc_data = hgnc.load_hgnc_index(
+                    hgnc_dump, self.cache_dir, self.drop_withdrawn
+                )
+            else:
+                raise Exception("A HGNC dump or lookup file is required")
+
+            # the files in use only change once their data is loaded
+            self.hgnc_dump, self.hgnc_lookup = hgnc_dump, hgnc_lookup
+            self.hgnc_data = hgnc_data
+
+        return {"hgnc": self.hgnc_dump, "hgnc_lookup": self.hgnc_lookup}
+
+    def parse(self, request: dict) -> dict:
+        """ Parse a rare disease test directory
+
+        Args:
+            request (dict): Dict with the "test_directory" and "config" keys
+            and optionally the "output", "lab_excel", "streaming", "lenient",
+            "output_format" and "gzip" keys
+
+        Raises:
+            RequestError: if a required key is missing or the output format
+            is unknown
+
+        Returns:
+            dict: Dict with the path of the output if one was given, the
+            metadata and the indications otherwise
+        """
+
+        missing_keys = [
+            key for key in ["test_directory", "config"] if key not in request
+        ]
+
+        if missing_keys:
+            raise RequestError(f"Missing keys: {', '.join(missing_keys)}")
+
+        output_format = request.get("output_format", "json")
+
+        if output_format not in json_output.OUTPUT_FORMATS:
+            raise RequestError(f"Unknown output format: {output_format}")
+
+        rd_test_directory = pipeline.run_rare_disease(
+            request["test_directory"], request["config"], self.hgnc_data,
+            request.get("output"), request.get("lab_excel"),
+            request.get("streaming", False), self.cache_dir,
+            strict=not request.get("lenient", False),
+            output_format=output_format, compress=request.get("gzip", False)
+        )
+
+        if request.get("output"):
+            return {"output": request["output"]}
+
+        return {
+            **rd_test_directory.get_metadata(),
+            "indications": rd_test_directory.get_indications()
+        }
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """ Handle the requests of the parse service:
+
+    POST /parse with a JSON body, see ParseService.parse
+    POST /reload with an optional JSON body with the "hgnc" or
+    "hgnc_lookup" keys
+    """
+
+    def send_json(self, status: int, data: dict):
+        """ Send a JSON response
+
+        Args:
+            status (int): HTTP status code
+            data (dict): Content of the response
+        """
+
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self) -> dict:
+        """ Read the JSON body of the request
+
+        Raises:
+            RequestError: if the body isn't a JSON object
+
+        Returns:
+            dict: Content of the body, empty if there is no body
+        """
+
+        length = int(self.headers.get("Content-Length", 0))
+
+        if not length:
+            return {}
+
+        try:
+            request = json.loads(self.rfile.read(length))
+        except json.JSONDecodeError as e:
+            raise RequestError(f"Invalid JSON body: {e}")
+
+        if not isinstance(request, dict):
+            raise RequestError("The JSON body must be an object")
+
+        return request
+
+    def do_POST(self):
+        service = self.server.service
+
+        try:
+            request = self.read_json()
+
+            if self.path == "/parse":
+                self.send_json(200, service.parse(request))
+            elif self.path == "/reload":
+                self.send_json(
+                    200, service.reload(
+                        request.get("hgnc"), request.get("hgnc_lookup")
+                    )
+                )
+            else:
+                self.send_json(404, {"error": f"Unknown path: {self.path}"})
+
+        except RequestError as e:
+            self.send_json(400, {"error": str(e)})
+        except Exception as e:
+            self.send_json(
+                500, {"error": str(e), "traceback": traceback.format_exc()}
+            )
+
+
+def create_server(
+    service: ParseService, host: str = "127.0.0.1", port: int = 8000
+) -> ThreadingHTTPServer:
+    """ Create the HTTP server of the parse service, every request is handled
+    in its own thread
+
+    Args:
+        service (ParseService): Service with the HGNC data loaded
+        host (str, optional): Host to listen on, only local by default
+        port (int, optional): Port to listen on, 0 picks a free port
+
+    Returns:
+        ThreadingHTTPServer: Server, started with serve_forever
+    """
+
+    server = ThreadingHTTPServer((host, port), RequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
@@ -0,0 +1,370 @@
+from pathlib import Path
+import sqlite3
+
+from test_directory_parser import clinical_indication
+from test_directory_parser import json_output
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS release (
+    id INTEGER PRIMARY KEY,
+    td_source TEXT NOT NULL,
+    config_source TEXT NOT NULL,
+    date TEXT NOT NULL,
+    source TEXT,
+    UNIQUE (td_source, config_source, date)
+);
+CREATE TABLE IF NOT EXISTS indication (
+    id INTEGER PRIMARY KEY,
+    release_id INTEGER NOT NULL REFERENCES release (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    code TEXT,
+    r_code TEXT,
+    name TEXT,
+    gemini_name TEXT,
+    test_method TEXT,
+    original_targets TEXT,
+    changes TEXT
+);
+CREATE TABLE IF NOT EXISTS gene (
+    id INTEGER PRIMARY KEY,
+    hgnc_id TEXT NOT NULL UNIQUE
+);
+-- a target is either a panelapp id, a gene or an unresolved gene symbol when
+-- both are null
+CREATE TABLE IF NOT EXISTS target (
+    indication_id INTEGER NOT NULL
+        REFERENCES indication (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    panel_id TEXT,
+    gene_id INTEGER REFERENCES gene (id),
+    PRIMARY KEY (indication_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS indication_release ON indication (release_id);
+CREATE INDEX IF NOT EXISTS indication_code ON indication (code);
+CREATE INDEX IF NOT EXISTS indication_r_code ON indication (r_code);
+CREATE INDEX IF NOT EXISTS target_panel ON target (panel_id);
+CREATE INDEX IF NOT EXISTS target_gene ON target (gene_id);
+"""
+
+# columns returned by the indication queries
+QUERY_COLUMNS = [
+    "date", "td_source", "config_source", "code", "name", "test_method",
+    "original_targets"
+]
+
+
+def connect(database: str) -> sqlite3.Connection:
+    """ Open the indication store, creating its tables if needed
+
+    Args:
+        database (str): Path to the SQLite database
+
+    Returns:
+        sqlite3.Connection: Connection to the store
+    """
+
+    connection = sqlite3.connect(database)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def get_r_code(code: str) -> str:
+    """ Get the R code of a test code i.e. R1 for R1.1
+
+    Args:
+        code (str): Test code
+
+    Returns:
+        str: R code, None if there is no code
+    """
+
+    if not code:
+        return None
+
+    return code.split(".")[0]
+
+
+def import_release(
+    connection: sqlite3.Connection, output_data: dict, source: str = None,
+    replace: bool = False
+) -> int:
+    """ Insert the indications of an output in one transaction
+
+    Args:
+        connection (sqlite3.Connection): Connection to the store
+        output_data (dict): Output loaded with json_output.load_output
+        source (str, optional): Path to the output
+        replace (bool, optional): Whether to replace a release with the same
+        test directory, config and date
+
+    Raises:
+        Exception: if the release is already stored and replace is False
+
+    Returns:
+        int: Id of the release
+    """
+
+    release_key = (
+        output_data["td_source"], output_data["config_source"],
+        output_data["date"]
+    )
+    indications = output_data["indications"]
+
+    with connection:
+        existing_release = connection.execute(
+            "SELECT id FROM release WHERE td_source = ? AND "
+            "config_source = ? AND date = ?", release_key
+        ).fetchone()
+
+        if existing_release:
+            if not replace:
+                raise Exception(
+                    f"Release {' '.join(release_key)} is already stored"
+                )
+
+            connection.execute(
+                "DELETE FROM release WHERE id = ?", (existing_release["id"],)
+            )
+
+        release_id = connection.execute(
+            "INSERT INTO release (td_source, config_source, date, source) "
+            "VALUES (?, ?, ?, ?)", (*release_key, source)
+        ).lastrowid
+
+        hgnc_ids = {
+            target
+            for indication in indications
+            for target in indication["panels"]
+            if target and target.startswith("HGNC:")
+        }
+        connection.executemany(
+            "INSERT OR IGNORE INTO gene (hgnc_id) VALUES (?)",
+            [(hgnc_id,) for hgnc_id in sorted(hgnc_ids)]
+        )
+        gene_ids = dict(
+            connection.execute("SELECT hgnc_id, id FROM gene").fetchall()
+        )
+
+        # ids are given in the transaction so that the targets can be
+        # inserted in bulk along with the indications
+        first_id = connection.execute(
+            "SELECT COALESCE(MAX(id), 0) + 1 FROM indication"
+        ).fetchone()[0]
+        indication_rows = []
+        target_rows = []
+
+        normalise_missing = clinical_indication.normalise_missing
+
+        for position, indication in enumerate(indications):
+            indication_id = first_id + position
+            # blank cells written as NaN by the json module are stored and
+            # exported as null, like the outputs written now
+            indication_rows.append((
+                indication_id, release_id, position, indication["code"],
+                get_r_code(indication["code"]),
+                normalise_missing(indication["name"]),
+                indication["gemini_name"],
+                normalise_missing(indication["test_method"]),
+                normalise_missing(indication["original_targets"]),
+                normalise_missing(indication["changes"])
+            ))
+
+            for target_position, target in enumerate(indication["panels"]):
+                if target and target.startswith("HGNC:"):
+                    panel_id, gene_id = None, gene_ids[target]
+                else:
+                    panel_id, gene_id = target, None
+
+                target_rows.append(
+                    (indication_id, target_position, panel_id, gene_id)
+                )
+
+        connection.executemany(
+            "INSERT INTO indication (id, release_id, position, code, r_code, "
+            "name, gemini_name, test_method, original_targets, changes) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", indication_rows
+        )
+        connection.executemany(
+            "INSERT INTO target (indication_id, position, panel_id, gene_id) "
+            "VALUES (?, ?, ?, ?)", target_rows
+        )
+
+    return release_id
+
+
+def import_output(
+    connection: sqlite3.Connection, output: str, replace: bool = False
+) -> int:
+    """ Import an output of TestDirectory.output_json in any of its formats
+
+    Args:
+        connection (sqlite3.Connection): Connection to the store
+        output (str): Path to the output
+        replace (bool, optional): Whether to replace a release with the same
+        test directory, config and date
+
+    Returns:
+        int: Id of the release
+    """
+
+    return import_release(
+        connection, json_output.load_output(output),
+        str(Path(output).resolve()), replace
+    )
+
+
+def export_release(connection: sqlite3.Connection, release_id: int) -> dict:
+    """ Rebuild the output of a stored release
+
+    Args:
+        connection (sqlite3.Connection): Connection to the store
+        release_id (int): Id of the release
+
+    Raises:
+        Exception: if the release doesn't exist
+
+    Returns:
+        dict: Dict with the test directory source, the config source, the
+        date and the indications, as loaded by json_output.load_output
+    """
+
+    release = connection.execute(
+        "SELECT td_source, config_source, date FROM release WHERE id = ?",
+        (release_id,)
+    ).fetchone()
+
+    if release is None:
+        raise Exception(f"Release {release_id} doesn't exist")
+
+    targets = {}
+
+    for indication_id, panel_id, hgnc_id in connection.execute(
+        "SELECT target.indication_id, target.panel_id, gene.hgnc_id "
+        "FROM target JOIN indication ON indication.id = target.indication_id "
+        "LEFT JOIN gene ON gene.id = target.gene_id "
+        "WHERE indication.release_id = ? "
+        "ORDER BY target.indication_id, target.position", (release_id,)
+    ):
+        targets.setdefault(indication_id, []).append(hgnc_id or panel_id)
+
+    indications = [
+        {
+            "name": row["name"], "code": row["code"],
+            "gemini_name": row["gemini_name"],
+            "test_method": row["test_method"],
+            "panels": targets.get(row["id"], []),
+            "original_targets": row["original_targets"],
+            "changes": row["changes"]
+        }
+        for row in connection.execute(
+            "SELECT * FROM indication WHERE release_id = ? ORDER BY position",
+            (release_id,)
+        )
+    ]
+
+    return {**dict(release), "indications": indications}
+
+
+def export_output(
+    connection: sqlite3.Connection, release_id: int, output: str,
+    output_format: str = "json", compress: bool = False
+):
+    """ Write a stored release as an output of TestDirectory.output_json
+
+    Args:
+        connection (sqlite3.Connection): Connection to the store
+        release_id (int): Id of the release
+        output (str): Path to the output
+        output_format (str, optional): "json", "compact" or "ndjson"
+        compress (bool, optional): Whether to gzip the output
+    """
+
+    output_data = export_release(connection, release_id)
+    indications = output_data.pop("indications")
+    json_output.write_output(
+        output, output_data, indications, output_format, compress
+    )
+
+
+def list_releases(connection: sqlite3.Connection) -> list:
+    """ List the stored releases
+
+    Args:
+        connection (sqlite3.Connection): Connection to the store
+
+    Returns:
+        list: List of dicts with the id, test directory, config, date and
+        number of indications of the releases
+    """
+
+    return [
+        dict(row) for row in connection.execute(
+            "SELECT release.id, release.date, release.td_source, "
+            "release.config_source, COUNT(indication.id) AS indications "
+            "FROM release LEFT JOIN indication "
+            "ON indication.release_id = release.id "
+            "GROUP BY release.id ORDER BY release.date, release.id"
+        )
+    ]
+
+
+def query_indications(
+    connection: sqlite3.Connection, hgnc_id: str = None,
+    panel_id: str = None, r_code: str = None
+) -> list:
+    """ Find the indications of every release containing a gene, a panel or
+    with a R code. The lookups use the indexes of the store
+
+    Args:
+        connection (sqlite3.Connection): Connection to the store
+        hgnc_id (str, optional): HGNC id i.e. HGNC:1100
+        panel_id (str, optional): Panelapp id
+        r_code (str, optional): R code i.e. R1, or test code i.e. R1.1
+
+    Raises:
+        Exception: if none or several lookups are given
+
+    Returns:
+        list: List of dicts with the QUERY_COLUMNS of the indications, sorted
+        by release date and code
+    """
+
+    lookups = [
+        lookup for lookup in [hgnc_id, panel_id, r_code]
+        if lookup is not None
+    ]
+
+    if len(lookups) != 1:
+        raise Exception("Give one of hgnc_id, panel_id or r_code")
+
+    columns = ", ".join(
+        f"release.{column}"
+        if column in ("date", "td_source", "config_source")
+        else f"indication.{column}"
+        for column in QUERY_COLUMNS
+    )
+    query = (
+        f"SELECT DISTINCT {columns} FROM indication "
+        "JOIN release ON release.id = indication.release_id "
+    )
+
+    if hgnc_id is not None:
+        query += (
+            "JOIN target ON target.indication_id = indication.id "
+            "JOIN gene ON gene.id = target.gene_id WHERE gene.hgnc_id = ?"
+        )
+    elif panel_id is not None:
+        query += (
+            "JOIN target ON target.indication_id = indication.id "
+            "WHERE target.panel_id = ?"
+        )
+    elif "." in r_code:
+        query += "WHERE indication.code = ?"
+    else:
+        query += "WHERE indication.r_code = ?"
+
+    query += " ORDER BY release.date, release.id, indication.position"
+
+    return [dict(row) for row in connection.execute(query, lookups)]
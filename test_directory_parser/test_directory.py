@@ -1,9 +1,13 @@
-import json
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import math
 from pathlib import Path
 
 import pandas as pd
 
 from test_directory_parser import clinical_indication
+from test_directory_parser import indication_index
+from test_directory_parser import json_output
 from test_directory_parser import rare_disease
 from test_directory_parser import utils
 
@@ -11,7 +15,9 @@ from test_directory_parser import utils
 class TestDirectory:
     def __init__(
         self, test_directory_path: str, config_path: str, td_type: str,
-        hgnc_dump: pd.DataFrame
+        hgnc_dump: pd.DataFrame, streaming: bool = False,
+        cache_dir: str = None, session: rare_disease.WorkbookSession = None,
+        validate: bool = False
     ):
         """ Setup the test directory object with its clinical indications
 
@@ -21,27 +27,60 @@ class TestDirectory:
             directory
             td_type (str): Type of the test directory i.e. rare disease, cancer
             hgnc_dump (pd.DataFrame): Dataframe containing the HGNC data for
-            symbols conversion
+            symbols conversion or HgncIndex built from it
+            streaming (bool, optional): Whether to read the test directory
+            row by row using a read-only workbook
+            cache_dir (str, optional): Path to the cache directory for the
+            extracted test directory sheet
+            session (WorkbookSession, optional): Session of the test
+            directory workbook shared by the test directory objects of its
+            sheets so that the file is opened once
+            validate (bool, optional): Whether to check the sheet and columns
+            of the config against the header before loading the sheet
         """
 
         config_data = rare_disease.parse_config(config_path)
         sheet, change_column = rare_disease.parse_rare_disease_td(
-            test_directory_path, config_data
+            test_directory_path, config_data, streaming, cache_dir, session,
+            validate
         )
 
-        # convert the dataframe to a dictionary
-        self.data = sheet.to_dict()
+        # the sheet is kept as is, columns are read together when setting up
+        # the clinical indications
+        self.data = sheet
         self.td = Path(test_directory_path).name
         self.td_type = td_type
         self.change_column = change_column
         self.config = config_data
+        self.hgnc_dump = hgnc_dump
+        self.reset_clinical_indications()
+
+    def reset_clinical_indications(self):
+        """ Remove the clinical indications and their lookups so that the
+        setup can be run again """
+
         self.all_clinical_indications = []
         self.ngs_clinical_indications = []
-        self.filtered_clinical_indications = []
-        self.hgnc_dump = hgnc_dump
+        # None until filtered using the internal test directory, the filter
+        # can keep no clinical indication in lenient mode
+        self.filtered_clinical_indications = None
+        # lookups of the clinical indications to output
+        self.index = indication_index.IndicationIndex()
+
+    def setup_clinical_indications(
+        self, previous_indications: list = None, processes: int = None
+    ):
+        """ Go through the test directory and create clinical indications
 
-    def setup_clinical_indications(self):
-        """ Go through the test directory and create clinical indications """
+        Args:
+            previous_indications (list, optional): Indications from a previous
+            output. Clinical indications with the same name, target, test
+            method and changes are carried over without cleaning their target
+            again
+            processes (int, optional): Number of processes to build the
+            clinical indications with, the rows are split in chunks built in
+            parallel if more than 1
+        """
 
         r_codes = self.data[
             self.config["clinical_indication_column_code"]
@@ -57,87 +96,375 @@ class TestDirectory:
         ]
         changes = self.data[self.change_column]
 
-        for index, ci in clinical_indications.items():
-            r_code = r_codes[index]
-            panel = panels[index]
-            test_method = test_methods[index]
-            change = changes[index]
+        # handled clinical indications by the lab and that will be stored
+        # in panel palace
+        ngs_mask = get_ngs_mask(self.data, self.config)
+
+        previous_indications = {
+            indication["code"]: indication
+            for indication in previous_indications or []
+        }
+        carried_over_indications = {}
+
+        if previous_indications:
+            for index, r_code, ci, panel, test_method, change in zip(
+                self.data.index, r_codes, clinical_indications, panels,
+                test_methods, changes
+            ):
+                previous_indication = previous_indications.get(r_code)
+
+                if previous_indication and (
+                    clinical_indication.matches_output(
+                        previous_indication, ci, panel, test_method, change
+                    )
+                ):
+                    carried_over_indications[index] = previous_indication
 
-            ci = clinical_indication.ClinicalIndication(
-                r_code, ci, panel, test_method, change, self.hgnc_dump
+            print((
+                f"{len(carried_over_indications)} clinical indications carried"
+                " over from the previous output, "
+                f"{len(self.data) - len(carried_over_indications)} to process"
+            ))
+
+        rows_to_build = self.data[
+            ~self.data.index.isin(carried_over_indications.keys())
+        ]
+
+        if processes and processes > 1 and len(rows_to_build):
+            built_indications = build_sharded_clinical_indications(
+                rows_to_build, self.config, self.change_column,
+                self.hgnc_dump, processes
             )
+        else:
+            built_indications = build_clinical_indications(
+                rows_to_build, self.config, self.change_column,
+                self.hgnc_dump
+            )
+
+        for index, is_ngs in zip(self.data.index, ngs_mask):
+            if index in carried_over_indications:
+                ci = clinical_indication.ClinicalIndication.from_output(
+                    carried_over_indications[index]
+                )
+            else:
+                ci = built_indications[index]
 
-            # handled clinical indications by the lab and that will be stored
-            # in panel palace
-            if test_method.strip() in self.config["ngs_test_methods"]:
+            if is_ngs:
                 self.ngs_clinical_indications.append(ci)
+                # the NGS targets are cleaned here instead of when outputting
+                self.index.add(ci, ci.panels + ci.genes, ci.test_method)
 
             self.all_clinical_indications.append(ci)
 
-    def filter_clinical_indications(self, internal_td: pd.DataFrame):
+    def filter_clinical_indications(
+        self, internal_td: pd.DataFrame, strict: bool = True
+    ) -> tuple:
         """ Filter the gathered clinical indications using the internal test
         directory
 
         Args:
             internal_td (pd.DataFrame): Dataframe containing the internal test
             directory data
+            strict (bool, optional): Whether tests of the internal test
+            directory missing from the test directory are an error or only a
+            warning
+
+        Raises:
+            AssertionError: if tests are missing in strict mode
+
+        Returns:
+            tuple: List of the kept clinical indications and set of the test
+            ids of the internal test directory missing from the test directory
         """
 
-        for clinical_indication in self.ngs_clinical_indications:
-            filtered_df = internal_td[
-                internal_td["Test ID"] == clinical_indication.r_code
-            ]
+        # blank rows of the lab excel have no test id
+        lab_test_ids = set(internal_td["Test ID"].dropna())
+        kept_clinical_indications = [
+            ci for ci in self.ngs_clinical_indications
+            if ci.r_code in lab_test_ids
+        ]
+        missing_test_ids = lab_test_ids - {
+            ci.r_code for ci in self.ngs_clinical_indications
+        }
+        if self.filtered_clinical_indications is None:
+            self.filtered_clinical_indications = []
+
+        self.filtered_clinical_indications.extend(kept_clinical_indications)
+        self.index = indication_index.IndicationIndex()
 
-            if filtered_df.shape[0] != 0:
-                self.filtered_clinical_indications.append(clinical_indication)
+        for ci in self.filtered_clinical_indications:
+            self.index.add(ci, ci.panels + ci.genes, ci.test_method)
 
-        assert (
-            len(self.filtered_clinical_indications) == internal_td.shape[0]
-        ), (
-            "Did not found every test from the internal test directory in the "
-            "new test directory"
-        )
+        if missing_test_ids:
+            msg = (
+                "Did not found every test from the internal test directory in "
+                "the new test directory: "
+                f"{', '.join(sorted(missing_test_ids))}"
+            )
+
+            assert not strict, msg
+            print(f"WARNING: {msg}")
+
+        return kept_clinical_indications, missing_test_ids
 
-    def output_json(self, output: str):
+    def output_json(
+        self, output: str, output_format: str = "json",
+        compress: bool = False
+    ):
         """ Output the content of the test directory object as a JSON file
 
         Args:
             output (str): Path to the output
+            output_format (str, optional): "json" for indented JSON,
+            "compact" for compact JSON or "ndjson" for newline delimited JSON
+            compress (bool, optional): Whether to gzip the output
         """
 
         print("\nOutputting json file..\n")
-        td = self.td
-        source = self.config["name"]
-        date = utils.get_date()
 
-        indications = []
+        json_output.write_output(
+            output, self.get_metadata(), self.check_indications(),
+            output_format, compress
+        )
+
+    def find_indications(
+        self, hgnc_id: str = None, panel_id: str = None,
+        test_method: str = None
+    ) -> list:
+        """ Find the clinical indications to output targeting a gene or a
+        panel or using a test method
+
+        Args:
+            hgnc_id (str, optional): HGNC id i.e. HGNC:1100
+            panel_id (str, optional): Panelapp id
+            test_method (str, optional): Test method i.e. WES or Large panel
+
+        Returns:
+            list: List of ClinicalIndication objects
+        """
+
+        return self.index.find(hgnc_id, panel_id, test_method)
+
+    def get_metadata(self) -> dict:
+        """ Get the metadata written at the top of the output
+
+        Returns:
+            dict: Dict with the test directory, config and date
+        """
+
+        return {
+            "td_source": self.td, "config_source": self.config["name"],
+            "date": utils.get_date()
+        }
+
+    def check_indications(self):
+        """ Go through the indications to output and warn about the targets
+        containing unresolved gene symbols
+
+        Yields:
+            dict: Dict of the clinical indication
+        """
+
+        for indication in self.iter_indications():
+            if None in indication["panels"]:
+                print((
+                    f"Check {indication['code']} for why the target is or "
+                    f"contains None: {indication['original_targets']}"
+                ))
+
+            yield indication
 
-        if self.filtered_clinical_indications:
+    def get_indications(self) -> list:
+        """ Get the clinical indications to output i.e. the ones filtered
+        using the internal test directory if it was given, the NGS ones
+        otherwise
+
+        Returns:
+            list: List of dicts, one per clinical indication
+        """
+
+        return list(self.iter_indications())
+
+    def iter_indications(self):
+        """ Produce the clinical indications to output one at a time
+
+        Yields:
+            dict: Dict of the clinical indication
+        """
+
+        if self.filtered_clinical_indications is not None:
             clinical_indications = self.filtered_clinical_indications
         else:
             clinical_indications = self.ngs_clinical_indications
 
+        normalise_missing = clinical_indication.normalise_missing
+
         for ci in clinical_indications:
-            # we only output clinical indications that the lab will handle
-            indication = {
-                "name": ci.name, "code": ci.r_code,
-                "gemini_name": ci.gemini_name, "test_method": ci.test_method,
+            # we only output clinical indications that the lab will handle,
+            # blank cells are output as null whatever the JSON encoder
+            yield {
+                "name": normalise_missing(ci.name), "code": ci.r_code,
+                "gemini_name": ci.gemini_name,
+                "test_method": normalise_missing(ci.test_method),
                 "panels": ci.panels + ci.genes,
-                "original_targets": ci.original_targets, "changes": ci.change
+                "original_targets": normalise_missing(ci.original_targets),
+                "changes": normalise_missing(ci.change)
             }
 
-            if None in indication["panels"]:
-                print((
-                    f"Check {ci.r_code} for why the target is or contains "
-                    f"None: {ci.original_targets}"
-                ))
 
-            indications.append(indication)
+def get_ngs_mask(data: pd.DataFrame, config: dict) -> pd.Series:
+    """ Get the rows whose test method is handled by the lab
 
-        data = {
-            "td_source": td, "config_source": source, "date": date,
-            "indications": indications
-        }
+    Args:
+        data (pd.DataFrame): Rows of the test directory
+        config (dict): Dict containing the data for the config file
+
+    Returns:
+        pd.Series: Boolean series, True for the NGS clinical indications
+    """
+
+    return data[config["test_method_column"]].str.strip().isin(
+        config["ngs_test_methods"]
+    )
+
+
+def build_clinical_indications(
+    data: pd.DataFrame, config: dict, change_column: str, hgnc_dump
+) -> dict:
+    """ Create the clinical indications of rows of the test directory
+
+    Args:
+        data (pd.DataFrame): Rows of the test directory
+        config (dict): Dict containing the data for the config file
+        change_column (str): Name of the change column
+        hgnc_dump (pd.DataFrame): Dataframe containing the HGNC data or
+        HgncIndex built from it
+
+    Returns:
+        dict: Dict of row index to ClinicalIndication in the order of the rows
+    """
+
+    panels = data[config["panel_column"]]
+    ngs_mask = get_ngs_mask(data, config)
+
+    # extract the panelapp ids and gene symbols of every target at once
+    target_tokens = clinical_indication.parse_targets(panels)
+    tokens = {}
+
+    for index, kind, token in zip(
+        target_tokens["row"], target_tokens["kind"], target_tokens["token"]
+    ):
+        panel_tokens, gene_tokens = tokens.setdefault(index, ([], []))
+
+        if kind == "panel":
+            panel_tokens.append(token)
+        else:
+            gene_tokens.append(token)
+
+    # resolve every gene symbol of the NGS clinical indications in one go,
+    # the other ones are only resolved if their genes are accessed
+    gene_symbols = target_tokens.loc[
+        (target_tokens["kind"] == "gene") &
+        target_tokens["row"].isin(data.index[ngs_mask]),
+        "token"
+    ]
+    hgnc_data = utils.find_hgnc_ids(gene_symbols, hgnc_dump)
+    hgnc_ids = dict(zip(hgnc_data["Gene symbol"], hgnc_data["HGNC ID"]))
+
+    clinical_indications = {}
+
+    for index, r_code, ci, panel, test_method, change in zip(
+        data.index, data[config["clinical_indication_column_code"]],
+        data[config["clinical_indication_column_name"]], panels,
+        data[config["test_method_column"]], data[change_column]
+    ):
+        clinical_indications[index] = clinical_indication.ClinicalIndication(
+            r_code, ci, panel, test_method, change, hgnc_dump, hgnc_ids,
+            tokens.get(index, ([], []))
+        )
+
+    return clinical_indications
+
+
+def build_clinical_indications_shard(
+    data: pd.DataFrame, config: dict, change_column: str
+) -> dict:
+    """ Create the clinical indications of a chunk of rows in a worker process
+    initialised with batch.init_worker. The targets of the NGS clinical
+    indications are cleaned in the worker, the HGNC data is removed from the
+    other ones so that it isn't sent back with them
+
+    Args:
+        data (pd.DataFrame): Chunk of rows of the test directory
+        config (dict): Dict containing the data for the config file
+        change_column (str): Name of the change column
+
+    Returns:
+        dict: Dict of row index to ClinicalIndication in the order of the rows
+    """
+
+    from test_directory_parser import batch
+
+    clinical_indications = build_clinical_indications(
+        data, config, change_column, batch.HGNC_DATA
+    )
+
+    for ci, is_ngs in zip(
+        clinical_indications.values(), get_ngs_mask(data, config)
+    ):
+        if is_ngs:
+            # accessing the genes cleans the target
+            ci.genes
+        else:
+            ci._hgnc_dump = None
+            ci._hgnc_ids = None
+
+    return clinical_indications
+
+
+def build_sharded_clinical_indications(
+    data: pd.DataFrame, config: dict, change_column: str, hgnc_dump,
+    processes: int
+) -> dict:
+    """ Create the clinical indications of the rows of the test directory in
+    a pool of processes. The HGNC data is sent once per process and the
+    chunks are merged back in the order of the rows
+
+    Args:
+        data (pd.DataFrame): Rows of the test directory
+        config (dict): Dict containing the data for the config file
+        change_column (str): Name of the change column
+        hgnc_dump (pd.DataFrame): Dataframe containing the HGNC data or
+        HgncIndex built from it
+        processes (int): Number of worker processes
+
+    Returns:
+        dict: Dict of row index to ClinicalIndication in the order of the rows
+    """
+
+    from test_directory_parser import batch
+
+    # a few chunks per process to balance targets of different sizes
+    chunk_size = math.ceil(len(data) / (processes * 4))
+    chunks = [
+        data.iloc[i:i + chunk_size] for i in range(0, len(data), chunk_size)
+    ]
+    clinical_indications = {}
+
+    with ProcessPoolExecutor(
+        max_workers=processes, initializer=batch.init_worker,
+        initargs=(hgnc_dump,)
+    ) as executor:
+        for shard in executor.map(
+            build_clinical_indications_shard, chunks,
+            itertools.repeat(config), itertools.repeat(change_column)
+        ):
+            clinical_indications.update(shard)
+
+    # the targets that weren't cleaned in the workers are cleaned on access
+    # using the HGNC data of this process
+    for ci in clinical_indications.values():
+        if ci._panels is None:
+            ci._hgnc_dump = hgnc_dump
 
-        with open(output, "w") as f:
-            json.dump(data, f, indent=2)
+    return clinical_indications
@@ -1,4 +1,17 @@
 from .test_utils import *
 from .test_clinical_indication import *
 from .test_rare_disease import *
-from .test_test_directory import *
\ No newline at end of file
+from .test_test_directory import *
+from .test_hgnc import *
+from .test_cache import *
+from .test_diff import *
+from .test_batch import *
+from .test_json_output import *
+from .test_profiling import *
+from .test_main import *
+from .test_lookup_file import *
+from .test_service import *
+from .test_watch import *
+from .test_store import *
+from .test_indication_index import *
+from .test_history import *
@@ -0,0 +1,260 @@
+""" Small synthetic HGNC dumps and test directories shared by the tests """
+
+from pathlib import Path
+import random
+import string
+
+import openpyxl
+import pandas as pd
+
+from test_directory_parser.test_directory import TestDirectory
+
+RD_CONFIG = str(
+    Path(__file__).resolve().parents[2] / "configs" / "240226_RD.json"
+)
+# headers of the rare disease sheet, the 2023 layout has no technology
+# column and is matched equally by the 230401_RD and 231001_RD configs
+TD_HEADERS = {
+    "2024": [
+        "Clinical indication ID", "Test ID", "Clinical Indication",
+        "Target/Genes", "Test Method", "Commissioning category",
+        "Specialist test group", "Technology",
+        "Changes since April 2023 publication"
+    ],
+    "2023": [
+        "Clinical indication ID", "Test ID", "Clinical Indication",
+        "Target/Genes", "Test Method", "Commissioning category",
+        "Specialist test group", "Changes since October 2023 publication"
+    ]
+}
+TD_HEADER = TD_HEADERS["2024"]
+CANCER_HEADER = [
+    "Clinical indication ID", "Test ID", "Clinical Indication",
+    "Target/Genes", "Test Method", "Changes since April 2023 publication"
+]
+NGS_TEST_METHODS = ["WES or Large panel", "Small panel", "Medium panel", "WGS"]
+OTHER_TEST_METHODS = ["Karyotype", "MLPA or equivalent"]
+CANCER_TEST_METHODS = ["Small panel", "Large panel", "WGS", "Karyotype"]
+CHANGES = ["No change", "Addition of gene", "Removal of gene", "New test"]
+
+
+def random_symbol(rng: random.Random, used: set) -> str:
+    """ Generate a gene symbol that hasn't been used yet
+
+    Args:
+        rng (random.Random): Random generator
+        used (set): Symbols already generated
+
+    Returns:
+        str: Gene symbol like ABC12
+    """
+
+    while True:
+        symbol = "".join(
+            rng.choices(string.ascii_uppercase, k=rng.randint(2, 5))
+        ) + "".join(rng.choices(string.digits, k=rng.randint(0, 3)))
+
+        if len(symbol) > 1 and symbol not in used:
+            used.add(symbol)
+            return symbol
+
+
+def write_hgnc_dump(path: str, nb_rows: int = 200, seed: int = 0):
+    """ Write a TSV shaped like a HGNC custom download, with withdrawn
+    entries, previous and alias symbols and aliases shared between genes
+
+    Args:
+        path (str): Path to the TSV
+        nb_rows (int, optional): Number of genes
+        seed (int, optional): Seed of the random generator
+
+    Returns:
+        pd.DataFrame: Dataframe written to the TSV
+    """
+
+    rng = random.Random(seed)
+    used = set()
+    rows = []
+
+    for i in range(nb_rows):
+        approved_symbol = random_symbol(rng, used)
+        withdrawn = rng.random() < 0.05
+        previous_symbols = [
+            random_symbol(rng, used) for j in range(rng.choice([0, 0, 1, 2]))
+        ]
+        alias_symbols = [
+            random_symbol(rng, used) for j in range(rng.choice([0, 1, 1, 3]))
+        ]
+
+        if i and rng.random() < 0.02:
+            alias_symbols.append(rng.choice(rows)["Approved symbol"] + "L")
+
+        rows.append({
+            "HGNC ID": f"HGNC:{i + 1}",
+            "Approved symbol": (
+                f"{approved_symbol}~withdrawn" if withdrawn
+                else approved_symbol
+            ),
+            "Approved name": f"synthetic gene {approved_symbol.lower()}",
+            "Status": "Entry Withdrawn" if withdrawn else "Approved",
+            "Previous symbols": ", ".join(previous_symbols) or None,
+            "Alias symbols": ", ".join(alias_symbols) or None,
+            "Chromosome": f"{rng.randint(1, 22)}q{rng.randint(11, 35)}",
+            "RefSeq IDs": f"NM_{rng.randint(100000, 999999)}",
+        })
+
+    hgnc_dump = pd.DataFrame(rows)
+    hgnc_dump.to_csv(path, sep="\t", index=False)
+    return hgnc_dump
+
+
+def pick_target(rng: random.Random, hgnc_dump: pd.DataFrame) -> str:
+    """ Pick the target of a test, panels or approved, previous, alias and
+    unknown gene symbols
+
+    Args:
+        rng (random.Random): Random generator
+        hgnc_dump (pd.DataFrame): Synthetic HGNC dump
+
+    Returns:
+        str: Target of the test
+    """
+
+    if rng.random() < 0.5:
+        return ", ".join(
+            f"Synthetic panel {j} ({rng.randint(1, 1500)})"
+            for j in range(rng.choice([1, 1, 2]))
+        )
+
+    symbols = []
+
+    for i in range(rng.choice([1, 1, 2, 5])):
+        row = hgnc_dump.iloc[rng.randrange(len(hgnc_dump))]
+        kind = rng.random()
+
+        if kind < 0.05:
+            symbols.append(random_symbol(rng, set()))
+        elif kind < 0.1 and row["Previous symbols"]:
+            symbols.append(row["Previous symbols"].split(", ")[0])
+        elif kind < 0.15 and row["Alias symbols"]:
+            symbols.append(row["Alias symbols"].split(", ")[0])
+        else:
+            symbols.append(row["Approved symbol"])
+
+    return ", ".join(symbols)
+
+
+def write_test_directory(
+    path: str, hgnc_dump: pd.DataFrame, nb_rows: int = 20, seed: int = 0,
+    cancer_rows: int = 0, layout: str = "2024"
+) -> list:
+    """ Write a workbook shaped like the "R&ID indications" sheet of the
+    national test directory, with the header on the second row
+
+    Args:
+        path (str): Path to the workbook
+        hgnc_dump (pd.DataFrame): Synthetic HGNC dump to pick symbols from
+        nb_rows (int, optional): Number of tests
+        seed (int, optional): Seed of the random generator
+        cancer_rows (int, optional): Number of tests of a "Cancer
+        indications" sheet, no sheet is added if 0
+        layout (str, optional): Layout of the header, see TD_HEADERS
+
+    Returns:
+        list: Test ids of the NGS tests
+    """
+
+    rng = random.Random(seed)
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "R&ID indications"
+    sheet.append(["National genomic test directory - synthetic"])
+    sheet.append(TD_HEADERS[layout])
+    ngs_test_ids = []
+
+    for i in range(nb_rows):
+        r_code = f"R{i // 3 + 1}"
+        test_id = f"{r_code}.{i % 3 + 1}"
+        target = pick_target(rng, hgnc_dump)
+
+        if rng.random() < 0.7:
+            test_method = rng.choice(NGS_TEST_METHODS)
+            technology = rng.choice(["WES", "CEN"])
+            ngs_test_ids.append(test_id)
+        else:
+            test_method = rng.choice(OTHER_TEST_METHODS)
+            technology = "Other"
+
+        row = [
+            r_code, test_id, f"Synthetic clinical indication {i}", target,
+            test_method, "Category", "Core", technology, rng.choice(CHANGES)
+        ]
+
+        if "Technology" not in TD_HEADERS[layout]:
+            del row[TD_HEADER.index("Technology")]
+
+        sheet.append(row)
+
+    if cancer_rows:
+        cancer_sheet = workbook.create_sheet("Cancer indications")
+        cancer_sheet.append(["National genomic test directory - synthetic"])
+        cancer_sheet.append(CANCER_HEADER)
+
+        for i in range(cancer_rows):
+            m_code = f"M{i // 2 + 1}"
+            cancer_sheet.append([
+                m_code, f"{m_code}.{i % 2 + 1}",
+                f"Synthetic cancer indication {i}",
+                pick_target(rng, hgnc_dump),
+                rng.choice(CANCER_TEST_METHODS), rng.choice(CHANGES)
+            ])
+
+    workbook.save(path)
+    return ngs_test_ids
+
+
+def write_inputs(
+    directory: str, nb_rows: int = 20, hgnc_rows: int = 200, **kwargs
+) -> tuple:
+    """ Write a HGNC dump and a test directory picking its symbols from it
+
+    Args:
+        directory (str): Directory to write the files in
+        nb_rows (int, optional): Number of tests
+        hgnc_rows (int, optional): Number of genes
+        **kwargs: Other arguments of write_test_directory
+
+    Returns:
+        tuple: Paths to the HGNC dump and the workbook and test ids of the
+        NGS tests
+    """
+
+    hgnc_tsv = Path(directory) / "hgnc.tsv"
+    workbook = Path(directory) / "test_directory.xlsx"
+    hgnc_dump = write_hgnc_dump(hgnc_tsv, hgnc_rows)
+    ngs_test_ids = write_test_directory(
+        workbook, hgnc_dump, nb_rows, **kwargs
+    )
+    return hgnc_tsv, workbook, ngs_test_ids
+
+
+def build_test_directory(
+    workbook: str, hgnc_data, config: str = RD_CONFIG, processes: int = None
+) -> TestDirectory:
+    """ Create a rare disease test directory object and set up its clinical
+    indications
+
+    Args:
+        workbook (str): Path to the test directory
+        hgnc_data (HgncResolver): HgncIndex or HgncLookupFile
+        config (str, optional): Path to the config
+        processes (int, optional): Number of processes to build the clinical
+        indications with
+
+    Returns:
+        TestDirectory: Test directory object
+    """
+
+    td = TestDirectory(workbook, config, "rare_disease", hgnc_data)
+    td.setup_clinical_indications(processes=processes)
+    return td
@@ -0,0 +1,87 @@
+import contextlib
+import io
+import json
+import os
+from pathlib import Path
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from test_directory_parser import batch
+
+
+def crash_job(job: dict, streaming: bool = False, cache_dir: str = None):
+    """ Kill the worker process like an out of memory error would """
+
+    os._exit(1)
+
+
+class TestBatch(unittest.TestCase):
+    """ Suite of tests for the batch.py script """
+
+    def test_parse_manifest_missing_keys(self):
+        """ Test that a job without output is rejected """
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            manifest = Path(tmp_dir) / "manifest.json"
+            manifest.write_text(json.dumps(
+                [{"test_directory": "td.xlsx", "config": "config.json"}]
+            ))
+
+            with self.assertRaises(Exception):
+                batch.parse_manifest(manifest)
+
+    @patch("test_directory_parser.batch.pipeline.run_rare_disease")
+    def test_run_job(self, mock_run_rare_disease):
+        """ Test that jobs use the HGNC data given to the worker and that
+        failures are returned instead of raised """
+
+        batch.init_worker("hgnc_data")
+        job = {
+            "test_directory": "td.xlsx", "config": "config.json",
+            "output": "output.json"
+        }
+
+        elapsed, error = batch.run_job(job)
+
+        with self.subTest():
+            self.assertIsNone(error)
+
+        with self.subTest():
+            mock_run_rare_disease.assert_called_once_with(
+                "td.xlsx", "config.json", "hgnc_data", "output.json", None,
+                False, None
+            )
+
+        mock_run_rare_disease.side_effect = FileNotFoundError("td.xlsx")
+        elapsed, error = batch.run_job(job)
+
+        with self.subTest():
+            self.assertIn("FileNotFoundError", error)
+
+    @patch("test_directory_parser.batch.run_job", crash_job)
+    def test_run_batch_dead_worker(self):
+        """ Test that a dead worker process is reported as the error of the
+        jobs instead of stopping the batch """
+
+        jobs = [
+            {
+                "test_directory": f"td_{i}.xlsx", "config": "config.json",
+                "output": f"output_{i}.json"
+            }
+            for i in range(2)
+        ]
+        results = batch.run_batch(jobs, None, processes=1)
+
+        with self.subTest("jobs"):
+            self.assertEqual([job for job, elapsed, error in results], jobs)
+
+        with self.subTest("errors"):
+            for job, elapsed, error in results:
+                self.assertIn("BrokenProcessPool", error)
+
+        with self.subTest("summary"):
+            with contextlib.redirect_stdout(io.StringIO()) as stdout:
+                batch.print_summary(results, 1)
+
+            self.assertIn("FAILED\t", stdout.getvalue())
@@ -0,0 +1,106 @@
+import os
+from pathlib import Path
+import tempfile
+import unittest
+
+from test_directory_parser.cache import (
+    clear_cache, get_entry_path, load_cached, store_cached
+)
+
+
+class TestCache(unittest.TestCase):
+    """ Suite of tests for the cache.py script """
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.tmp_dir.name) / "cache"
+        self.source = Path(self.tmp_dir.name) / "source.tsv"
+        self.source.write_text("HGNC ID\tApproved symbol\n")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_load_cached_hit(self):
+        """ Test that stored data is returned for an unchanged source """
+
+        store_cached(self.cache_dir, "test", self.source, {"data": 1})
+        self.assertEqual(
+            load_cached(self.cache_dir, "test", self.source), {"data": 1}
+        )
+
+    def test_load_cached_miss(self):
+        """ Test that nothing is returned when nothing was stored """
+
+        self.assertIsNone(load_cached(self.cache_dir, "test", self.source))
+
+    def test_load_cached_touched_source(self):
+        """ Test that a source with a new mtime but the same content is still
+        considered cached """
+
+        store_cached(self.cache_dir, "test", self.source, {"data": 1})
+        stat = os.stat(self.source)
+        os.utime(
+            self.source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9)
+        )
+        self.assertEqual(
+            load_cached(self.cache_dir, "test", self.source), {"data": 1}
+        )
+
+    def test_load_cached_stale(self):
+        """ Test that a changed source invalidates and removes the entry """
+
+        store_cached(self.cache_dir, "test", self.source, {"data": 1})
+        self.source.write_text("HGNC ID\tApproved symbol\tStatus\n")
+
+        with self.subTest():
+            self.assertIsNone(
+                load_cached(self.cache_dir, "test", self.source)
+            )
+
+        with self.subTest():
+            self.assertFalse(
+                get_entry_path(self.cache_dir, "test", self.source).exists()
+            )
+
+    def test_load_cached_different_key(self):
+        """ Test that entries with a different key are not returned """
+
+        store_cached(
+            self.cache_dir, "test", self.source, {"data": 1}, {"sheet": "A"}
+        )
+        self.assertIsNone(
+            load_cached(self.cache_dir, "test", self.source, {"sheet": "B"})
+        )
+
+    def test_load_cached_corrupt(self):
+        """ Test that an unreadable entry is a miss and is removed """
+
+        store_cached(self.cache_dir, "test", self.source, {"data": 1})
+        entry = get_entry_path(self.cache_dir, "test", self.source)
+        entry.write_bytes(entry.read_bytes()[:-10])
+
+        with self.subTest():
+            self.assertIsNone(
+                load_cached(self.cache_dir, "test", self.source)
+            )
+
+        with self.subTest():
+            self.assertFalse(entry.exists())
+
+    def test_clear_cache(self):
+        """ Test that clearing the cache removes the entries and their
+        temporary files but not the other files of the directory """
+
+        store_cached(self.cache_dir, "test", self.source, {"data": 1})
+        entry = get_entry_path(self.cache_dir, "test", self.source)
+        entry.with_suffix(".1234.tmp").write_bytes(b"")
+        other_files = [
+            self.cache_dir / name
+            for name in ["features.v1.pkl", "model.pkl", "run.tmp"]
+        ]
+
+        for other_file in other_files:
+            other_file.write_bytes(b"")
+
+        clear_cache(self.cache_dir)
+        self.assertEqual(sorted(self.cache_dir.iterdir()), other_files)
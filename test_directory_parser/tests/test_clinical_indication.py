@@ -3,7 +3,9 @@ from unittest.mock import patch
 
 import pandas as pd
 
-from test_directory_parser.clinical_indication import ClinicalIndication
+from test_directory_parser.clinical_indication import (
+    ClinicalIndication, get_target_tokens, matches_output, parse_targets
+)
 
 class TestClinicalIndication(unittest.TestCase):
     """ Class to test the clean_target method of the ClinicalIndication object """
@@ -114,3 +116,140 @@ class TestClinicalIndication(unittest.TestCase):
 
         with self.subTest():
             self.assertEqual(test_panel_output, expected_panel_output)
+
+    @patch("test_directory_parser.clinical_indication.utils.find_hgnc_id")
+    def test_clean_target_resolved_genes(self, mock_hgnc_data):
+        """ Test the clean_target method with genes already resolved in batch
+        """
+        test_clinical_indication = ClinicalIndication(
+            "R100.1", "CI1", "BRCA1, BLARG", "WES", "Things have changed", "",
+            {"BRCA1": "HGNC:1100", "BLARG": None}
+        )
+
+        test_output = test_clinical_indication.genes
+        expected_output = ["HGNC:1100", None]
+
+        with self.subTest():
+            self.assertEqual(test_output, expected_output)
+
+        with self.subTest():
+            mock_hgnc_data.assert_not_called()
+
+    def test_from_output(self):
+        """ Test setting up a clinical indication from a previous output """
+        indication = {
+            "name": "CI1", "code": "R100.1", "gemini_name": "R100.1_CI1_G",
+            "test_method": "Single gene panel",
+            "panels": ["HGNC:1100", None],
+            "original_targets": "BRCA1, BLARG", "changes": "No change"
+        }
+        test_clinical_indication = ClinicalIndication.from_output(indication)
+
+        with self.subTest():
+            self.assertEqual(test_clinical_indication.panels, [])
+
+        with self.subTest():
+            self.assertEqual(
+                test_clinical_indication.genes, ["HGNC:1100", None]
+            )
+
+        with self.subTest():
+            self.assertTrue(
+                matches_output(
+                    indication, "CI1 ", "BRCA1, BLARG", "Single gene panel",
+                    "No change"
+                )
+            )
+
+        with self.subTest():
+            self.assertFalse(
+                matches_output(
+                    indication, "CI1", "BRCA1, BRCA2", "Single gene panel",
+                    "No change"
+                )
+            )
+
+        with self.subTest("blank changes"):
+            self.assertTrue(
+                matches_output(
+                    {**indication, "changes": float("nan")}, "CI1",
+                    "BRCA1, BLARG", "Single gene panel", float("nan")
+                )
+            )
+
+        with self.subTest("blank changes written as null"):
+            self.assertTrue(
+                matches_output(
+                    {**indication, "changes": None}, "CI1",
+                    "BRCA1, BLARG", "Single gene panel", float("nan")
+                )
+            )
+
+    @patch("test_directory_parser.clinical_indication.utils.find_hgnc_id")
+    def test_clean_target_lazy(self, mock_hgnc_data):
+        """ Test that the target is only cleaned on first access to the genes
+        and that the result is kept """
+        mock_hgnc_data.return_value = pd.Series(
+            {
+                "Gene symbol": "BRCA1",
+                "HGNC ID": "HGNC:1100",
+                "Previous": None,
+                "Alias": None
+            }
+        )
+        test_clinical_indication = ClinicalIndication(
+            "R100.1", "CI1", "BRCA1", "gene", "Things have changed", ""
+        )
+
+        with self.subTest("Not resolved at creation"):
+            mock_hgnc_data.assert_not_called()
+
+        test_clinical_indication.genes
+        test_clinical_indication.panels
+        test_clinical_indication.genes
+
+        with self.subTest("Resolved once"):
+            self.assertEqual(mock_hgnc_data.call_count, 1)
+
+        with self.subTest("Slotted object"):
+            self.assertFalse(hasattr(test_clinical_indication, "__dict__"))
+
+    def test_parse_targets(self):
+        """ Test that parsing the whole target column gives the same tokens
+        as the per target parsing, with panels taking precedence """
+        targets = pd.Series(
+            [
+                "Panelapp panel 1 (100), Panelapp panel 2 (101 & 102), BRCA1",
+                "BRCA1, BRCA2, C2H2-171", "Panelapp panel 3", "(200)"
+            ], index=[10, 5, 7, 3]
+        )
+
+        test_output = parse_targets(targets)
+        expected_output = pd.DataFrame(
+            {
+                "row": [10, 10, 5, 5, 5, 3],
+                "kind": ["panel", "panel", "gene", "gene", "gene", "panel"],
+                "token": [
+                    "100", "101 & 102", "BRCA1", "BRCA2", "C2H2-171", "200"
+                ]
+            }
+        )
+
+        with self.subTest():
+            pd.testing.assert_frame_equal(test_output, expected_output)
+
+        for row, target in targets.items():
+            row_tokens = test_output[test_output["row"] == row]
+
+            with self.subTest(target):
+                self.assertEqual(
+                    (
+                        row_tokens.loc[
+                            row_tokens["kind"] == "panel", "token"
+                        ].to_list(),
+                        row_tokens.loc[
+                            row_tokens["kind"] == "gene", "token"
+                        ].to_list()
+                    ),
+                    get_target_tokens(target)
+                )
@@ -0,0 +1,83 @@
+import unittest
+
+from test_directory_parser.diff import compare_indications
+
+
+class TestDiff(unittest.TestCase):
+    """ Suite of tests for the diff.py script """
+
+    def test_compare_indications(self):
+        """ Test for compare_indications
+
+        Test setup:
+        - R1.1 is unchanged
+        - R2.1 has a new gene and lost an unresolved one
+        - R3.1 is removed
+        - R4.1 is added
+
+        Expectation:
+        - Only R2.1 is modified, with the target differences
+        """
+
+        previous_indications = [
+            {
+                "name": "CI1", "code": "R1.1", "gemini_name": "R1.1_CI1_P",
+                "test_method": "WES", "panels": ["100"],
+                "original_targets": "Panel (100)", "changes": "No change"
+            },
+            {
+                "name": "CI2", "code": "R2.1", "gemini_name": "R2.1_CI2_P",
+                "test_method": "Small panel", "panels": ["HGNC:1100", None],
+                "original_targets": "BRCA1, BLARG", "changes": "No change"
+            },
+            {
+                "name": "CI3", "code": "R3.1", "gemini_name": "R3.1_CI3_P",
+                "test_method": "WES", "panels": ["300"],
+                "original_targets": "Panel (300)", "changes": "No change"
+            }
+        ]
+        new_indications = [
+            dict(previous_indications[0], changes="Changed text"),
+            dict(
+                previous_indications[1], panels=["HGNC:1100", "HGNC:1101"],
+                original_targets="BRCA1, BRCA2"
+            ),
+            {
+                "name": "CI4", "code": "R4.1", "gemini_name": "R4.1_CI4_P",
+                "test_method": "WES", "panels": ["400"],
+                "original_targets": "Panel (400)", "changes": "New"
+            }
+        ]
+
+        expected_output = {
+            "added": ["R4.1"],
+            "removed": ["R3.1"],
+            "modified": {
+                "R2.1": {
+                    "fields": {
+                        "original_targets": ["BRCA1, BLARG", "BRCA1, BRCA2"]
+                    },
+                    "added_targets": ["HGNC:1101"],
+                    "removed_targets": [None]
+                }
+            }
+        }
+
+        self.assertEqual(
+            compare_indications(previous_indications, new_indications),
+            expected_output
+        )
+
+    def test_compare_indications_blank_cells(self):
+        """ Test that a blank cell output as NaN by a previous version and as
+        null now isn't reported as modified """
+
+        indication = {
+            "name": "CI1", "code": "R1.1", "gemini_name": "R1.1_CI1_P",
+            "test_method": "WES", "panels": ["100"],
+            "original_targets": None, "changes": None
+        }
+        delta = compare_indications(
+            [dict(indication, original_targets=float("nan"))], [indication]
+        )
+        self.assertEqual(delta["modified"], {})
@@ -0,0 +1,204 @@
+from pathlib import Path
+import tempfile
+import tracemalloc
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+from test_directory_parser.hgnc import (
+    HgncIndex, HgncResolver, load_hgnc_index, read_hgnc_dump
+)
+from test_directory_parser.tests.synthetic_data import write_hgnc_dump
+from test_directory_parser.utils import find_hgnc_id, parse_tsv
+
+TEST_HGNC_DUMP = pd.DataFrame(
+    {
+        "HGNC ID": [
+            "HGNC:1100", "HGNC:28470", "HGNC:1550", "HGNC:1601",
+            "HGNC:11577", "HGNC:24042", "HGNC:13030"
+        ],
+        "Approved symbol": [
+            "BRCA1", "BRCA1P1", "CBS", "RYR1", "TAFAZZIN", "WWTR1",
+            "ZBTB18"
+        ],
+        "Status": [
+            "Approved", "Approved", "Approved", "Approved", "Approved",
+            "Approved", "Approved"
+        ],
+        "Previous symbols": [
+            "MULTIPLE_PREVIOUS", "MULTIPLE_PREVIOUS", None,
+            "MHS, MHS1, CCO", "CMD3A, EFE2, EFE, TAZ", None, "ZNF238",
+        ],
+        "Alias symbols": [
+            "RNF53, BRCC1, PPP1R53, FANCS",
+            "LBRCA1, PsiBRCA1, pseudo-BRCA1", "HIP4", "RYR, PPP1R137",
+            "BTHS, G4.5, MULTIPLE_ALIAS", "TAZ, DKFZp586I1419",
+            "C2H2-171, MULTIPLE_ALIAS, RP58",
+        ]
+    }
+)
+
+
+class TestHgncIndex(unittest.TestCase):
+    """ Suite of tests for the HgncIndex object """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.index = HgncIndex(TEST_HGNC_DUMP)
+
+    def test_resolve(self):
+        """ Test the resolve method for approved, previous, alias, ambiguous
+        and unknown symbols """
+
+        test_inputs = {
+            "BRCA1": ("HGNC:1100", None, None),
+            "TAZ": (None, True, True),
+            "HIP4": ("HGNC:1550", False, True),
+            "UNKNOWN": (None, None, None),
+            "CCO": ("HGNC:1601", True, False),
+            "MULTIPLE_PREVIOUS": (None, True, False),
+            "MULTIPLE_ALIAS": (None, False, True),
+            "C2H2-171": ("HGNC:13030", False, True),
+        }
+
+        for test_input, expected_output in test_inputs.items():
+            with self.subTest(test_input):
+                self.assertEqual(
+                    self.index.resolve(test_input), expected_output
+                )
+
+    def test_resolver_requires_resolve(self):
+        """ Test that a lookup without a resolve method can't be created """
+
+        class IncompleteResolver(HgncResolver):
+            pass
+
+        with self.assertRaises(TypeError):
+            IncompleteResolver()
+
+    def test_find_hgnc_id_matches_dataframe_lookup(self):
+        """ Test that the index gives the same output as the dataframe lookup
+        through utils.find_hgnc_id """
+
+        for symbol in [
+            "BRCA1", "TAZ", "HIP4", "UNKNOWN", "CCO", "MULTIPLE_PREVIOUS",
+            "MULTIPLE_ALIAS", "ZNF238", "A-B"
+        ]:
+            expected_output = find_hgnc_id(symbol, TEST_HGNC_DUMP)
+            test_output = find_hgnc_id(symbol, self.index)
+
+            with self.subTest(symbol):
+                self.assertTrue(test_output.equals(expected_output))
+
+    def test_load_hgnc_index_cached(self):
+        """ Test that a warm run loads the index from the cache without
+        parsing the HGNC dump """
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tsv = Path(tmp_dir) / "hgnc.tsv"
+            TEST_HGNC_DUMP.to_csv(tsv, sep="\t", index=False)
+            cache_dir = Path(tmp_dir) / "cache"
+
+            cold_index = load_hgnc_index(tsv, cache_dir)
+
+            with patch(
+                "test_directory_parser.hgnc.read_hgnc_dump"
+            ) as mock_read_hgnc_dump:
+                warm_index = load_hgnc_index(tsv, cache_dir)
+
+            with self.subTest():
+                mock_read_hgnc_dump.assert_not_called()
+
+            with self.subTest():
+                self.assertEqual(warm_index.approved, cold_index.approved)
+
+
+def measure_peak(func, tsv) -> tuple:
+    """ Measure the peak traced memory of loading a TSV
+
+    Args:
+        func (callable): Function loading the TSV
+        tsv (str): Path to the TSV
+
+    Returns:
+        tuple: Loaded dataframe and peak memory in bytes
+    """
+
+    tracemalloc.start()
+    df = func(tsv)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return df, peak
+
+
+class TestReadHgncDump(unittest.TestCase):
+    """ Suite of tests for the lean HGNC dump loader """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.tsv = Path(cls.tmp_dir.name) / "hgnc.tsv"
+        write_hgnc_dump(cls.tsv, 10000)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def test_read_hgnc_dump(self):
+        """ Test that only the needed columns are read and that the index
+        built from them is the same as the one from the full dump """
+
+        hgnc_dump = read_hgnc_dump(self.tsv)
+        full_index = HgncIndex(parse_tsv(self.tsv))
+        lean_index = HgncIndex(hgnc_dump)
+
+        with self.subTest("columns"):
+            self.assertEqual(
+                list(hgnc_dump.columns), [
+                    "HGNC ID", "Approved symbol", "Status",
+                    "Previous symbols", "Alias symbols"
+                ]
+            )
+
+        with self.subTest("status"):
+            self.assertEqual(hgnc_dump["Status"].dtype, "category")
+
+        for symbol_map in ["approved", "previous", "alias"]:
+            with self.subTest(symbol_map):
+                self.assertEqual(
+                    getattr(lean_index, symbol_map),
+                    getattr(full_index, symbol_map)
+                )
+
+    def test_read_hgnc_dump_drop_withdrawn(self):
+        """ Test that the withdrawn entries can be removed """
+
+        hgnc_dump = read_hgnc_dump(self.tsv, drop_withdrawn=True)
+
+        with self.subTest():
+            self.assertFalse((hgnc_dump["Status"] == "Entry Withdrawn").any())
+
+        with self.subTest():
+            self.assertFalse(
+                hgnc_dump["Approved symbol"].str.endswith("~withdrawn").any()
+            )
+
+    def test_read_hgnc_dump_resources(self):
+        """ Test that the lean loader uses less memory than parse_tsv, the
+        timings of both are reported by benchmarks/run.py """
+
+        # warm up the file system cache and pandas
+        parse_tsv(self.tsv)
+
+        full_dump, full_peak = measure_peak(parse_tsv, self.tsv)
+        lean_dump, lean_peak = measure_peak(read_hgnc_dump, self.tsv)
+
+        with self.subTest("peak memory"):
+            self.assertLess(lean_peak, full_peak * 0.75)
+
+        with self.subTest("dataframe memory"):
+            self.assertLess(
+                lean_dump.memory_usage(deep=True).sum(),
+                full_dump.memory_usage(deep=True).sum()
+            )
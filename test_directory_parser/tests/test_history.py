@@ -0,0 +1,118 @@
+from pathlib import Path
+import tempfile
+import unittest
+
+import numpy as np
+
+from test_directory_parser.history import ReleaseHistory
+from test_directory_parser.json_output import write_output
+from test_directory_parser.tests.test_json_output import (
+    TEST_INDICATIONS, TEST_METADATA
+)
+from test_directory_parser.tests.test_store import NEXT_INDICATIONS
+
+
+class TestReleaseHistory(unittest.TestCase):
+    """ Suite of tests for the history.py script """
+
+    def setUp(self) -> None:
+        self.history = ReleaseHistory()
+        # added out of order, the timelines are sorted by date
+        self.history.add_releases([
+            {
+                **TEST_METADATA, "date": "240401",
+                "indications": NEXT_INDICATIONS
+            },
+            {**TEST_METADATA, "indications": TEST_INDICATIONS},
+            {
+                **TEST_METADATA, "date": "240501",
+                "indications": TEST_INDICATIONS
+            }
+        ])
+
+    def test_get_timeline(self):
+        """ Test the presence of a gene in the test codes across releases """
+
+        timeline = self.history.get_timeline("HGNC:1100")
+
+        with self.subTest("releases"):
+            self.assertEqual(
+                [release["date"] for release in timeline["releases"]],
+                ["240226", "240401", "240501"]
+            )
+
+        with self.subTest("codes"):
+            self.assertEqual(timeline["codes"], ["R200.1", "R200.2"])
+
+        with self.subTest("targeted"):
+            np.testing.assert_array_equal(
+                timeline["targeted"],
+                [[True, False, True], [False, True, False]]
+            )
+
+        with self.subTest("listed"):
+            np.testing.assert_array_equal(
+                timeline["listed"], [[True, True, True], [False, True, False]]
+            )
+
+    def test_get_timeline_r_code(self):
+        """ Test restricting a timeline to a R code and a test code """
+
+        with self.subTest("R code"):
+            self.assertEqual(
+                self.history.get_timeline("HGNC:1100", "R200")["codes"],
+                ["R200.1", "R200.2"]
+            )
+
+        with self.subTest("test code"):
+            np.testing.assert_array_equal(
+                self.history.get_timeline("HGNC:1100", "R200.2")["targeted"],
+                [[False, True, False]]
+            )
+
+        with self.subTest("unknown"):
+            self.assertEqual(
+                self.history.get_timeline("HGNC:1100", "R999")["codes"], []
+            )
+
+    def test_get_changes(self):
+        """ Test when a gene entered or left the target of a test code """
+
+        self.assertEqual(
+            [
+                (change["code"], change["date"], change["change"])
+                for change in self.history.get_changes("HGNC:1100")
+            ], [
+                ("R200.1", "240226", "added"),
+                ("R200.1", "240401", "removed"),
+                ("R200.1", "240501", "added"),
+                ("R200.2", "240401", "added"),
+                ("R200.2", "240501", "removed")
+            ]
+        )
+
+    def test_save_load(self):
+        """ Test that a saved history gives the same timelines and can be
+        extended with new outputs """
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "history.npz"
+            self.history.save(path)
+            history = ReleaseHistory.load(path)
+            output = Path(tmp_dir) / "output.json"
+            write_output(
+                output, {**TEST_METADATA, "date": "240601"}, NEXT_INDICATIONS
+            )
+            history.add_outputs([output])
+
+        with self.subTest("extended"):
+            np.testing.assert_array_equal(
+                history.get_timeline("HGNC:1100")["targeted"],
+                [[True, False, True, False], [False, True, False, True]]
+            )
+
+        with self.subTest("duplicated release"):
+            with self.assertRaises(Exception):
+                history.add_releases(
+                    [{**TEST_METADATA, "indications": TEST_INDICATIONS}]
+                )
@@ -0,0 +1,86 @@
+from pathlib import Path
+import tempfile
+import unittest
+
+from test_directory_parser.hgnc import load_hgnc_index
+from test_directory_parser.indication_index import (
+    IndicationIndex, load_index
+)
+from test_directory_parser.json_output import write_output
+from test_directory_parser.tests.synthetic_data import (
+    build_test_directory, write_inputs
+)
+from test_directory_parser.tests.test_json_output import (
+    TEST_INDICATIONS, TEST_METADATA
+)
+
+
+class TestIndicationIndex(unittest.TestCase):
+    """ Suite of tests for the indication_index.py script """
+
+    def test_find(self):
+        """ Test the lookups on the targets and test method """
+
+        index = IndicationIndex()
+        index.add("CI1", ["100", "HGNC:1100", "HGNC:1100", None], "WES")
+        index.add("CI2", ["HGNC:1100"], "WGS")
+
+        with self.subTest("gene"):
+            self.assertEqual(index.find(hgnc_id="HGNC:1100"), ["CI1", "CI2"])
+
+        with self.subTest("panel"):
+            self.assertEqual(index.find(panel_id="100"), ["CI1"])
+
+        with self.subTest("test method"):
+            self.assertEqual(index.find(test_method="WGS"), ["CI2"])
+
+        with self.subTest("absent"):
+            self.assertEqual(index.find(hgnc_id="HGNC:1"), [])
+
+        with self.subTest("no lookup"):
+            with self.assertRaises(Exception):
+                index.find()
+
+    def test_load_index(self):
+        """ Test indexing a saved output """
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output = Path(tmp_dir) / "output.json"
+            write_output(output, TEST_METADATA, TEST_INDICATIONS)
+            output_data, index = load_index(output)
+
+        self.assertEqual(
+            index.find(hgnc_id="HGNC:1100"), [TEST_INDICATIONS[1]]
+        )
+
+    def test_test_directory_index(self):
+        """ Test that the index of a test directory matches its output """
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            hgnc_tsv, workbook, ngs_test_ids = write_inputs(tmp_dir, 60)
+            td = build_test_directory(workbook, load_hgnc_index(hgnc_tsv))
+
+        indications = td.get_indications()
+        hgnc_id = next(
+            target for indication in indications
+            for target in indication["panels"]
+            if target and target.startswith("HGNC:")
+        )
+
+        with self.subTest("gene"):
+            self.assertEqual(
+                [ci.r_code for ci in td.find_indications(hgnc_id=hgnc_id)],
+                [
+                    indication["code"] for indication in indications
+                    if hgnc_id in indication["panels"]
+                ]
+            )
+
+        with self.subTest("test method"):
+            self.assertEqual(
+                len(td.find_indications(test_method="WGS")),
+                len([
+                    indication for indication in indications
+                    if indication["test_method"] == "WGS"
+                ])
+            )
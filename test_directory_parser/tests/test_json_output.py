@@ -0,0 +1,77 @@
+import json
+from pathlib import Path
+import tempfile
+import unittest
+
+from test_directory_parser.json_output import load_output, write_output
+
+TEST_METADATA = {
+    "td_source": "test_directory.xlsx", "config_source": "Test_config",
+    "date": "240226"
+}
+TEST_INDICATIONS = [
+    {
+        "name": "CI1", "code": "R100.1", "gemini_name": "R100.1_CI1_P",
+        "test_method": "WES", "panels": ["100"],
+        "original_targets": "Panel (100)", "changes": "No change"
+    },
+    {
+        "name": "CI2", "code": "R200.1", "gemini_name": "R200.1_CI2_G",
+        "test_method": "Single gene", "panels": ["HGNC:1100", None],
+        "original_targets": "BRCA1, BLARG", "changes": "No change"
+    }
+]
+
+
+class TestJsonOutput(unittest.TestCase):
+    """ Suite of tests for the json_output.py script """
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.expected_output = {
+            **TEST_METADATA, "indications": TEST_INDICATIONS
+        }
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_write_output_formats(self):
+        """ Test that every format, gzipped or not, loads back to the same
+        data """
+
+        for output_format in ["json", "compact", "ndjson"]:
+            for compress in [False, True]:
+                output = (
+                    Path(self.tmp_dir.name) / f"{output_format}_{compress}"
+                )
+                write_output(
+                    output, TEST_METADATA, iter(TEST_INDICATIONS),
+                    output_format, compress
+                )
+
+                with self.subTest(f"{output_format} gzip={compress}"):
+                    self.assertEqual(
+                        load_output(output), self.expected_output
+                    )
+
+    def test_write_output_ndjson_lines(self):
+        """ Test that the newline delimited output has the metadata on the
+        first line and one indication per line """
+
+        output = Path(self.tmp_dir.name) / "output.ndjson"
+        write_output(output, TEST_METADATA, TEST_INDICATIONS, "ndjson")
+        lines = output.read_text().splitlines()
+
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [TEST_METADATA, *TEST_INDICATIONS]
+        )
+
+    def test_write_output_invalid_format(self):
+        """ Test that an unknown format raises an error """
+
+        with self.assertRaises(Exception):
+            write_output(
+                Path(self.tmp_dir.name) / "output", TEST_METADATA,
+                TEST_INDICATIONS, "xml"
+            )
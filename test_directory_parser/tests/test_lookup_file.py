@@ -0,0 +1,102 @@
+from pathlib import Path
+import pickle
+import tempfile
+import unittest
+
+from test_directory_parser.hgnc import HgncIndex, read_hgnc_dump
+from test_directory_parser.lookup_file import (
+    compile_lookup_file, HgncLookupFile
+)
+from test_directory_parser.tests.synthetic_data import write_hgnc_dump
+from test_directory_parser.tests.test_hgnc import TEST_HGNC_DUMP
+from test_directory_parser.utils import find_hgnc_id, find_hgnc_ids
+
+
+class TestHgncLookupFile(unittest.TestCase):
+    """ Suite of tests for the HGNC lookup file """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.index = HgncIndex(TEST_HGNC_DUMP)
+        cls.path = Path(cls.tmp_dir.name) / "hgnc.bin"
+        compile_lookup_file(cls.index, cls.path)
+        cls.lookup_file = HgncLookupFile(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def test_resolve(self):
+        """ Test that the lookup file resolves symbols like the index """
+
+        symbols = (
+            list(self.index.approved) + list(self.index.previous) +
+            list(self.index.alias) + ["UNKNOWN", "A-B", "", "BRCA", "ZZZ"]
+        )
+
+        for symbol in symbols:
+            with self.subTest(symbol):
+                self.assertEqual(
+                    self.lookup_file.resolve(symbol),
+                    self.index.resolve(symbol)
+                )
+
+    def test_find_hgnc_id(self):
+        """ Test that the lookup file can be used through utils """
+
+        for symbol in ["BRCA1", "TAZ", "HIP4", "UNKNOWN", "CCO"]:
+            with self.subTest(symbol):
+                self.assertTrue(
+                    find_hgnc_id(symbol, self.lookup_file).equals(
+                        find_hgnc_id(symbol, self.index)
+                    )
+                )
+
+        with self.subTest("find_hgnc_ids"):
+            self.assertTrue(
+                find_hgnc_ids(["TAZ", "BRCA1"], self.lookup_file).equals(
+                    find_hgnc_ids(["TAZ", "BRCA1"], self.index)
+                )
+            )
+
+    def test_synthetic_dump(self):
+        """ Test every symbol of a larger synthetic dump """
+
+        tsv = Path(self.tmp_dir.name) / "synthetic.tsv"
+        path = Path(self.tmp_dir.name) / "synthetic.bin"
+        write_hgnc_dump(tsv, 2000)
+        index = HgncIndex(read_hgnc_dump(tsv))
+        compile_lookup_file(index, path)
+        lookup_file = HgncLookupFile(path)
+
+        for symbol in (
+            list(index.approved) + list(index.previous) + list(index.alias)
+        ):
+            self.assertEqual(
+                lookup_file.resolve(symbol), index.resolve(symbol)
+            )
+
+    def test_pickle(self):
+        """ Test that only the path is pickled and that the file is mapped
+        again when unpickled """
+
+        data = pickle.dumps(self.lookup_file)
+        lookup_file = pickle.loads(data)
+
+        with self.subTest("size"):
+            self.assertLess(len(data), 200)
+
+        with self.subTest("resolve"):
+            self.assertEqual(
+                lookup_file.resolve("CCO"), ("HGNC:1601", True, False)
+            )
+
+    def test_not_a_lookup_file(self):
+        """ Test that other files are rejected """
+
+        path = Path(self.tmp_dir.name) / "hgnc.tsv"
+        TEST_HGNC_DUMP.to_csv(path, sep="\t", index=False)
+
+        with self.assertRaises(Exception):
+            HgncLookupFile(path)
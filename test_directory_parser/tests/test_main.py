@@ -0,0 +1,132 @@
+import importlib.util
+import json
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from test_directory_parser.tests.synthetic_data import write_inputs
+
+MAIN = Path(__file__).resolve().parents[2] / "main.py"
+# modules that must only be imported by the commands needing them
+HEAVY_MODULES = ["pandas", "numpy", "regex", "openpyxl"]
+# generous budget for the imports of main.py --help in microseconds
+IMPORT_TIME_BUDGET = 500000
+
+
+def get_import_times(*args) -> dict:
+    """ Run main.py with -X importtime and gather the import times
+
+    Returns:
+        dict: Dict of imported module names to their self import time in
+        microseconds
+    """
+
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", str(MAIN), *args],
+        capture_output=True, text=True, check=True
+    )
+    import_times = {}
+
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_time, cumulative_time, name = line.split(":", 1)[1].split("|")
+        import_times[name.strip()] = int(self_time)
+
+    return import_times
+
+
+class TestMain(unittest.TestCase):
+    """ Suite of tests for the startup of main.py """
+
+    def test_help_imports(self):
+        """ Test that --help doesn't import the heavy dependencies and stays
+        within the import time budget """
+
+        import_times = get_import_times("--help")
+
+        for module in HEAVY_MODULES:
+            with self.subTest(module):
+                self.assertNotIn(module, import_times)
+
+        with self.subTest("budget"):
+            self.assertLess(sum(import_times.values()), IMPORT_TIME_BUDGET)
+
+    def test_clear_cache_only(self):
+        """ Test that clearing the cache without a command exits cleanly """
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            entry = Path(tmp_dir) / "hgnc_index_0123456789abcdef.v1.pkl"
+            entry.write_bytes(b"")
+            process = subprocess.run(
+                [
+                    sys.executable, str(MAIN), "--cache_dir", tmp_dir,
+                    "--clear_cache"
+                ], capture_output=True, text=True
+            )
+
+            with self.subTest("exit code"):
+                self.assertEqual(process.returncode, 0, process.stderr)
+
+            with self.subTest("cleared"):
+                self.assertFalse(entry.exists())
+
+    def test_auto_config_preferred(self):
+        """ Test that a workbook in the 2023 layout, matched equally by
+        230401_RD and 231001_RD, gets the config given with --config along
+        with --auto_config """
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            hgnc_tsv, workbook_path, ngs_test_ids = write_inputs(
+                tmp_dir, 10, 100, layout="2023"
+            )
+            output = Path(tmp_dir) / "output.json"
+            command = [
+                sys.executable, str(MAIN), "--auto_config", "--hgnc",
+                str(hgnc_tsv), "--output", str(output), "rare_disease",
+                str(workbook_path)
+            ]
+
+            with self.subTest("tie"):
+                process = subprocess.run(
+                    command, capture_output=True, text=True
+                )
+                self.assertIn("equally", process.stderr)
+
+            process = subprocess.run(
+                [*command[:2], "--config", "configs/231001_RD.json"] +
+                command[2:], capture_output=True, text=True,
+                cwd=MAIN.parent
+            )
+
+            with self.subTest("exit code"):
+                self.assertEqual(process.returncode, 0, process.stderr)
+
+            with self.subTest("output"):
+                self.assertEqual(
+                    json.loads(output.read_text())["config_source"],
+                    "231001_RD"
+                )
+
+    def test_get_delta_output(self):
+        """ Test that only the suffixes of the output formats are replaced in
+        the default name of the delta output """
+
+        spec = importlib.util.spec_from_file_location("main", MAIN)
+        main = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(main)
+        expected_outputs = {
+            "out/240226_RD_TD.json": "out/240226_RD_TD_delta.json",
+            "td.v2.json": "td.v2_delta.json",
+            "td.v3.ndjson.gz": "td.v3_delta.json",
+            "td": "td_delta.json",
+        }
+
+        for output, expected_output in expected_outputs.items():
+            with self.subTest(output):
+                self.assertEqual(
+                    main.get_delta_output(output), str(Path(expected_output))
+                )
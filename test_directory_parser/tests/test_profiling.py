@@ -0,0 +1,86 @@
+import unittest
+
+from test_directory_parser import hgnc
+from test_directory_parser import profiling
+from test_directory_parser import utils
+from test_directory_parser.tests.test_hgnc import TEST_HGNC_DUMP
+
+
+class TestProfiling(unittest.TestCase):
+    """ Suite of tests for the profiling.py script """
+
+    def test_get_lookup_path(self):
+        """ Test the path deduced from the outputs of the HGNC lookups """
+
+        expected_paths = [
+            (("HGNC:1100", None, None), "approved"),
+            ((None, None, None), "not_found"),
+            (("HGNC:1601", True, False), "previous"),
+            (("HGNC:1100", False, True), "alias"),
+            ((None, True, True), "ambiguous"),
+            ((None, False, True), "ambiguous"),
+        ]
+
+        for lookup, expected_path in expected_paths:
+            with self.subTest(lookup):
+                self.assertEqual(
+                    profiling.get_lookup_path(*lookup), expected_path
+                )
+
+    def test_instrumented(self):
+        """ Test that the stages and lookups are recorded while instrumented
+        and that the original functions are restored afterwards """
+
+        original_resolve = hgnc.HgncIndex.resolve
+        original_init = hgnc.HgncIndex.__init__
+        original_find_hgnc_id = utils.find_hgnc_id
+        profiler = profiling.Profiler()
+        hgnc_index = hgnc.HgncIndex(TEST_HGNC_DUMP)
+
+        with profiler.instrumented():
+            hgnc.HgncIndex(TEST_HGNC_DUMP)
+            utils.find_hgnc_id("BRCA1", hgnc_index)
+            utils.find_hgnc_id("MHS", hgnc_index)
+            utils.find_hgnc_ids(["TAZ", "BRCA1"], hgnc_index)
+
+            with profiler.stage("outer"):
+                with profiler.stage("inner"):
+                    [0] * 100000
+
+        report = profiler.report()
+
+        with self.subTest("find_hgnc_id"):
+            self.assertEqual(
+                report["hgnc_lookups"]["find_hgnc_id"]["calls"], 2
+            )
+
+        with self.subTest("resolve"):
+            self.assertEqual(
+                report["hgnc_lookups"]["HgncIndex.resolve"]["calls"], 4
+            )
+
+        with self.subTest("find_hgnc_ids"):
+            self.assertEqual(
+                report["hgnc_lookups"]["find_hgnc_ids"]["paths"],
+                {"ambiguous": 1, "approved": 1}
+            )
+
+        with self.subTest("build_hgnc_index"):
+            self.assertEqual(report["stages"]["build_hgnc_index"]["calls"], 1)
+
+        with self.subTest("inner peak"):
+            # the list of 100000 pointers takes about 0.76 MB
+            self.assertGreater(
+                report["stages"]["inner"]["peak_memory_mb"], 0.5
+            )
+
+        with self.subTest("nested peak"):
+            self.assertGreaterEqual(
+                report["stages"]["outer"]["peak_memory_mb"],
+                report["stages"]["inner"]["peak_memory_mb"]
+            )
+
+        with self.subTest("restored"):
+            self.assertIs(hgnc.HgncIndex.resolve, original_resolve)
+            self.assertIs(hgnc.HgncIndex.__init__, original_init)
+            self.assertIs(utils.find_hgnc_id, original_find_hgnc_id)
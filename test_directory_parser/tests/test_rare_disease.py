@@ -1,12 +1,17 @@
 from pathlib import Path
+import tempfile
+import time
 import unittest
 from unittest.mock import patch
 
+import openpyxl
 import pandas as pd
 
 from test_directory_parser.rare_disease import (
-    parse_config, parse_rare_disease_td
+    parse_config, parse_rare_disease_td, select_config,
+    validate_test_directory, WorkbookSession
 )
+from test_directory_parser.tests.synthetic_data import TD_HEADER, write_inputs
 
 PATH_TO_TEST_FOLDER = Path(".") / "test_directory_parser" / "tests" / "test_data"
 
@@ -153,3 +158,325 @@ class TestRareDisease(unittest.TestCase):
             test_output, test_change_column = parse_rare_disease_td(
                 "", self.test_config
             )
+
+    def test_parse_rare_disease_td_streaming(self):
+        """ Test for parse_rare_disease_td in streaming mode
+
+        Setup test:
+        - Workbook with a title row above the header, an empty row and a
+        column that isn't of interest
+
+        Expectations:
+        - Same output as the pandas reader
+        """
+
+        config = dict(self.test_config, header_index=1)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            workbook_path = Path(tmp_dir) / "test_directory.xlsx"
+            workbook = openpyxl.Workbook()
+            sheet = workbook.active
+            sheet.title = "Sheet1"
+            sheet.append(["National genomic test directory"])
+            sheet.append([
+                "Clinical indication ID", "Test ID", "Clinical Indication",
+                "Target/Genes", "Test Method", "Commissioning category",
+                "NGS Technology", "Changes since April 2023 publication"
+            ])
+            sheet.append([
+                "R100", "R100.1", "CI1", "Panel1 (100)", "WES", "Category1",
+                "WES", "No change"
+            ])
+            sheet.append([])
+            sheet.append([
+                "R300", "R300.1", "CI2", "Panel2 (200)", "WES", "Category2",
+                "Not WES", "No change"
+            ])
+            sheet.append([
+                "R400", "R400.1", "CI3", "BRCA1", "Small panel", "Category2",
+                "CEN", None
+            ])
+            workbook.save(workbook_path)
+
+            expected_output, expected_change_column = parse_rare_disease_td(
+                workbook_path, config
+            )
+            test_output, test_change_column = parse_rare_disease_td(
+                workbook_path, config, streaming=True
+            )
+
+        with self.subTest():
+            pd.testing.assert_frame_equal(test_output, expected_output)
+
+        with self.subTest():
+            self.assertEqual(test_change_column, expected_change_column)
+
+    @patch("test_directory_parser.rare_disease.pd.read_excel")
+    def test_parse_rare_disease_td_cached(self, mock_td_excel):
+        """ Test for parse_rare_disease_td with a cache directory
+
+        Setup test:
+        - Test directory parsed twice with the same config and once with a
+        different ngs_type
+
+        Expectations:
+        - The workbook is only read for the first and the last parsing
+        - Cached output is the same as the parsed one
+        """
+
+        mock_td_excel.return_value = pd.DataFrame(
+            {
+                "Test ID": ["R100.1", "R300.1"],
+                "Clinical Indication": ["CI1", "CI2"],
+                "Target/Genes": ["Panel1", "Panel2"],
+                "Test Method": ["WES", "WES"],
+                "NGS Technology": ["WES", "Not WES"],
+                "Changes since April 2023 publication": [
+                    "No change", "No change"
+                ]
+            }
+        )
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            workbook_path = Path(tmp_dir) / "test_directory.xlsx"
+            workbook_path.write_bytes(b"workbook")
+            cache_dir = Path(tmp_dir) / "cache"
+
+            expected_output, _ = parse_rare_disease_td(
+                workbook_path, self.test_config, cache_dir=cache_dir
+            )
+            test_output, test_change_column = parse_rare_disease_td(
+                workbook_path, self.test_config, cache_dir=cache_dir
+            )
+
+            with self.subTest():
+                self.assertEqual(mock_td_excel.call_count, 1)
+
+            parse_rare_disease_td(
+                workbook_path, dict(self.test_config, ngs_type=["WES"]),
+                cache_dir=cache_dir
+            )
+
+        with self.subTest():
+            self.assertEqual(mock_td_excel.call_count, 2)
+
+        with self.subTest():
+            self.assertTrue(test_output.equals(expected_output))
+
+        with self.subTest():
+            self.assertEqual(
+                test_change_column, "Changes since April 2023 publication"
+            )
+
+    def test_select_config(self):
+        """ Test for select_config
+
+        Setup test:
+        - Workbook shaped like the 240226 test directory with a cancer sheet
+        - Workbook without the sheet of interest
+
+        Expectations:
+        - The most recent rare disease config matching the first workbook,
+        240226_RD, is selected and the cancer config is only selected for the
+        cancer sheet
+        - No config matches the second workbook
+        """
+
+        config_paths = sorted(Path("configs").glob("*.json"))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            hgnc_tsv, workbook_path, ngs_test_ids = write_inputs(
+                tmp_dir, 5, 50, cancer_rows=5
+            )
+
+            with self.subTest():
+                self.assertEqual(
+                    Path(select_config(workbook_path, config_paths)).name,
+                    "240226_RD.json"
+                )
+
+            with self.subTest():
+                self.assertEqual(
+                    Path(
+                        select_config(workbook_path, config_paths, "cancer")
+                    ).name, "240226_cancer.json"
+                )
+
+            other_workbook_path = Path(tmp_dir) / "other.xlsx"
+            openpyxl.Workbook().save(other_workbook_path)
+
+            with self.subTest():
+                with self.assertRaises(Exception):
+                    select_config(other_workbook_path, config_paths)
+
+    def test_select_config_scoring(self):
+        """ Test for select_config scoring the configs
+
+        Setup test:
+        - Workbook without the technology column
+        - Workbook with a renamed test method column
+
+        Expectations:
+        - The configs expecting no technology column, 230401_RD and
+        231001_RD, match the first workbook equally so none is picked and
+        both are listed, in well under a second
+        - Without 230401_RD, 231001_RD is selected for the first workbook
+        - With 230401_RD preferred, it is selected for the first workbook and
+        the preference is ignored for a workbook it doesn't match
+        - The second workbook fails with the missing column of the closest
+        configs and the columns of its header
+        """
+
+        config_paths = sorted(Path("configs").glob("*.json"))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            hgnc_tsv, workbook_path, ngs_test_ids = write_inputs(
+                tmp_dir, 2000, 50, layout="2023"
+            )
+
+            start = time.perf_counter()
+
+            with self.assertRaises(Exception) as tie_error:
+                select_config(workbook_path, config_paths)
+
+            elapsed = time.perf_counter() - start
+
+            with self.subTest("tie"):
+                self.assertIn("230401_RD.json", str(tie_error.exception))
+                self.assertIn("231001_RD.json", str(tie_error.exception))
+
+            with self.subTest("header only"):
+                self.assertLess(elapsed, 1)
+
+            with self.subTest("best match"):
+                self.assertEqual(
+                    Path(select_config(workbook_path, [
+                        path for path in config_paths
+                        if path.name != "230401_RD.json"
+                    ])).name, "231001_RD.json"
+                )
+
+            with self.subTest("preferred"):
+                self.assertEqual(
+                    Path(select_config(
+                        workbook_path, config_paths,
+                        preferred_config="configs/230401_RD.json"
+                    )).name, "230401_RD.json"
+                )
+
+            with self.subTest("preferred outside the configs"):
+                self.assertEqual(
+                    Path(select_config(
+                        workbook_path, [], preferred_config=config_paths[1]
+                    )).name, "230401_RD.json"
+                )
+
+            with self.subTest("preferred not matching"):
+                with self.assertRaisesRegex(Exception, "equally"):
+                    select_config(
+                        workbook_path, config_paths,
+                        preferred_config="configs/240226_RD.json"
+                    )
+
+            renamed_path = Path(tmp_dir) / "renamed.xlsx"
+            workbook = openpyxl.Workbook()
+            workbook.active.title = "R&ID indications"
+            workbook.active.append(["National genomic test directory"])
+            workbook.active.append([
+                "Test methodology" if column == "Test Method" else column
+                for column in TD_HEADER
+            ])
+            workbook.save(renamed_path)
+
+            with self.assertRaises(Exception) as error:
+                select_config(renamed_path, config_paths)
+
+        with self.subTest("column diff"):
+            self.assertIn("240226_RD.json", str(error.exception))
+            self.assertIn(
+                "Missing column 'Test Method'", str(error.exception)
+            )
+            self.assertIn("Test methodology", str(error.exception))
+
+    def test_validate_test_directory(self):
+        """ Test for validate_test_directory
+
+        Setup test:
+        - Workbook shaped like the 240226 test directory
+        - Config with a missing sheet, config with a missing column
+
+        Expectations:
+        - The 240226_RD config is valid
+        - The sheet and column problems are reported
+        """
+
+        config = parse_config("configs/240226_RD.json")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            hgnc_tsv, workbook_path, ngs_test_ids = write_inputs(
+                tmp_dir, 5, 50
+            )
+
+            with self.subTest("valid"):
+                validate_test_directory(workbook_path, config)
+
+            with self.subTest("missing sheet"):
+                with self.assertRaisesRegex(
+                    Exception, "Missing sheet 'Cancer indications'"
+                ):
+                    validate_test_directory(
+                        workbook_path,
+                        {**config, "sheet_of_interest": "Cancer indications"}
+                    )
+
+            with self.subTest("missing column"):
+                with self.assertRaisesRegex(
+                    Exception, "Missing column 'NGS Technology'"
+                ):
+                    validate_test_directory(
+                        workbook_path,
+                        {**config, "ngs_column": "NGS Technology"}
+                    )
+
+    def test_workbook_session(self):
+        """ Test for WorkbookSession
+
+        Setup test:
+        - Workbook with a rare disease and a cancer sheet
+
+        Expectations:
+        - Both sheets are extracted with one opening of the workbook
+        - The rare disease sheet is the same as the one read by pandas
+        """
+
+        rd_config = parse_config("configs/240226_RD.json")
+        cancer_config = parse_config("configs/240226_cancer.json")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            hgnc_tsv, workbook_path, ngs_test_ids = write_inputs(
+                tmp_dir, 20, 50, cancer_rows=10
+            )
+            expected_output, _ = parse_rare_disease_td(
+                workbook_path, rd_config
+            )
+
+            with patch(
+                "test_directory_parser.rare_disease.openpyxl.load_workbook",
+                wraps=openpyxl.load_workbook
+            ) as mock_load_workbook:
+                with WorkbookSession(workbook_path) as session:
+                    rd_output, _ = parse_rare_disease_td(
+                        workbook_path, rd_config, session=session
+                    )
+                    cancer_output, _ = parse_rare_disease_td(
+                        workbook_path, cancer_config, session=session
+                    )
+
+        with self.subTest("opened once"):
+            self.assertEqual(mock_load_workbook.call_count, 1)
+
+        with self.subTest("rare disease sheet"):
+            pd.testing.assert_frame_equal(rd_output, expected_output)
+
+        with self.subTest("cancer sheet"):
+            self.assertEqual(len(cancer_output), 10)
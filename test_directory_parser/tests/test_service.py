@@ -0,0 +1,163 @@
+import json
+from pathlib import Path
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+import urllib.error
+import urllib.request
+
+from test_directory_parser import service
+from test_directory_parser.tests.synthetic_data import (
+    RD_CONFIG, write_inputs
+)
+
+
+class TestService(unittest.TestCase):
+    """ Suite of tests for the service.py script """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.hgnc, cls.test_directory, cls.ngs_test_ids = write_inputs(
+            cls.tmp_dir.name, 30
+        )
+        cls.service = service.ParseService(str(cls.hgnc))
+        cls.server = service.create_server(cls.service, port=0)
+        cls.url = "http://{}:{}".format(*cls.server.server_address[:2])
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.tmp_dir.cleanup()
+
+    def post(self, path: str, data: dict) -> tuple:
+        """ Send a POST request to the service
+
+        Args:
+            path (str): Path of the endpoint
+            data (dict): JSON body
+
+        Returns:
+            tuple: Status code and JSON response
+        """
+
+        request = urllib.request.Request(
+            f"{self.url}{path}", data=json.dumps(data).encode(),
+            method="POST"
+        )
+
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, json.load(response)
+        except urllib.error.HTTPError as e:
+            return e.code, json.load(e)
+
+    def test_parse(self):
+        """ Test that the indications are returned when no output is given
+        and written when one is """
+
+        request = {
+            "test_directory": str(self.test_directory), "config": RD_CONFIG
+        }
+        status, response = self.post("/parse", request)
+
+        with self.subTest("status"):
+            self.assertEqual(status, 200)
+
+        with self.subTest("indications"):
+            self.assertEqual(
+                [indication["code"] for indication in response["indications"]],
+                self.ngs_test_ids
+            )
+
+        output = Path(self.tmp_dir.name) / "output.json"
+        status, response = self.post(
+            "/parse", {**request, "output": str(output)}
+        )
+
+        with self.subTest("output"):
+            self.assertEqual(response, {"output": str(output)})
+
+        with self.subTest("output content"):
+            with open(output) as f:
+                self.assertEqual(
+                    len(json.load(f)["indications"]), len(self.ngs_test_ids)
+                )
+
+    def test_parse_errors(self):
+        """ Test the status codes of invalid requests and failing parses """
+
+        status, response = self.post("/parse", {"config": RD_CONFIG})
+
+        with self.subTest("missing key"):
+            self.assertEqual(status, 400)
+
+        status, response = self.post(
+            "/parse", {"test_directory": "missing.xlsx", "config": RD_CONFIG}
+        )
+
+        with self.subTest("missing file"):
+            self.assertEqual(status, 500)
+
+        with patch(
+            "test_directory_parser.pipeline.run_rare_disease",
+            side_effect=ValueError("Invalid cell")
+        ):
+            status, response = self.post(
+                "/parse", {
+                    "test_directory": str(self.test_directory),
+                    "config": RD_CONFIG
+                }
+            )
+
+        with self.subTest("value error while parsing"):
+            self.assertEqual(status, 500)
+
+        status, response = self.post("/parse", ["not", "an", "object"])
+
+        with self.subTest("not an object"):
+            self.assertEqual(status, 400)
+
+        status, response = self.post("/unknown", {})
+
+        with self.subTest("unknown path"):
+            self.assertEqual(status, 404)
+
+    def test_reload(self):
+        """ Test that the HGNC data is replaced on reload """
+
+        previous_hgnc_data = self.service.hgnc_data
+        status, response = self.post("/reload", {})
+
+        with self.subTest("status"):
+            self.assertEqual(status, 200)
+
+        with self.subTest("reloaded"):
+            self.assertIsNot(self.service.hgnc_data, previous_hgnc_data)
+
+    def test_reload_failure(self):
+        """ Test that a failed reload keeps the data and files in use """
+
+        previous_hgnc_data = self.service.hgnc_data
+        status, response = self.post(
+            "/reload", {"hgnc": str(Path(self.tmp_dir.name) / "missing.tsv")}
+        )
+
+        with self.subTest("status"):
+            self.assertEqual(status, 500)
+
+        with self.subTest("data kept"):
+            self.assertIs(self.service.hgnc_data, previous_hgnc_data)
+
+        with self.subTest("files kept"):
+            self.assertEqual(self.service.hgnc_dump, str(self.hgnc))
+
+        status, response = self.post("/reload", {})
+
+        with self.subTest("reload of the files in use"):
+            self.assertEqual(
+                response, {"hgnc": str(self.hgnc), "hgnc_lookup": None}
+            )
@@ -0,0 +1,192 @@
+from pathlib import Path
+import tempfile
+import unittest
+
+from test_directory_parser.json_output import load_output, write_output
+from test_directory_parser.store import (
+    connect, export_output, export_release, import_output, import_release,
+    list_releases, query_indications
+)
+from test_directory_parser.tests.test_json_output import (
+    TEST_INDICATIONS, TEST_METADATA
+)
+
+NEXT_INDICATIONS = [
+    {
+        "name": "CI2", "code": "R200.1", "gemini_name": "R200.1_CI2_G",
+        "test_method": "Single gene", "panels": ["HGNC:1101"],
+        "original_targets": "BRCA2", "changes": "Removal of BRCA1"
+    },
+    {
+        "name": "CI3", "code": "R200.2", "gemini_name": "R200.2_CI3_P",
+        "test_method": "WES", "panels": ["HGNC:1100", "100"],
+        "original_targets": "BRCA1, Panel (100)", "changes": "New test"
+    }
+]
+
+
+class TestStore(unittest.TestCase):
+    """ Suite of tests for the store.py script """
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.connection = connect(Path(self.tmp_dir.name) / "store.db")
+        self.release_id = import_release(
+            self.connection, {**TEST_METADATA, "indications": TEST_INDICATIONS}
+        )
+        self.next_release_id = import_release(
+            self.connection, {
+                **TEST_METADATA, "date": "240401",
+                "indications": NEXT_INDICATIONS
+            }
+        )
+
+    def tearDown(self) -> None:
+        self.connection.close()
+        self.tmp_dir.cleanup()
+
+    def test_export_release(self):
+        """ Test that a stored release is exported as it was imported """
+
+        self.assertEqual(
+            export_release(self.connection, self.release_id),
+            {**TEST_METADATA, "indications": TEST_INDICATIONS}
+        )
+
+    def test_import_export_output(self):
+        """ Test importing an output file and writing it back """
+
+        output = Path(self.tmp_dir.name) / "output.ndjson"
+        exported_output = Path(self.tmp_dir.name) / "exported.json"
+        metadata = {**TEST_METADATA, "date": "240501"}
+        write_output(output, metadata, TEST_INDICATIONS, "ndjson")
+        release_id = import_output(self.connection, output)
+        export_output(self.connection, release_id, exported_output)
+
+        self.assertEqual(
+            load_output(exported_output),
+            {**metadata, "indications": TEST_INDICATIONS}
+        )
+
+    def test_import_export_blank_cells(self):
+        """ Test that blank cells, written as NaN by the json module in older
+        outputs, are exported as null """
+
+        output = Path(self.tmp_dir.name) / "output.json"
+        exported_output = Path(self.tmp_dir.name) / "exported.json"
+        metadata = {**TEST_METADATA, "date": "240501"}
+        blank_indications = [
+            dict(indication, original_targets=None, changes=None)
+            for indication in TEST_INDICATIONS
+        ]
+        write_output(
+            output, metadata, [
+                dict(indication, changes=float("nan"))
+                for indication in blank_indications
+            ]
+        )
+
+        with self.subTest("NaN written"):
+            self.assertIn("NaN", output.read_text())
+
+        release_id = import_output(self.connection, output)
+        export_output(self.connection, release_id, exported_output)
+
+        with self.subTest("exported"):
+            self.assertEqual(
+                load_output(exported_output),
+                {**metadata, "indications": blank_indications}
+            )
+
+        # the exported output round trips as is
+        release_id = import_output(
+            self.connection, exported_output, replace=True
+        )
+        export_output(self.connection, release_id, output)
+
+        with self.subTest("round trip"):
+            self.assertEqual(output.read_bytes(), exported_output.read_bytes())
+
+    def test_import_existing_release(self):
+        """ Test that a release is only imported again when replacing it """
+
+        with self.subTest("error"):
+            with self.assertRaises(Exception):
+                import_release(
+                    self.connection,
+                    {**TEST_METADATA, "indications": NEXT_INDICATIONS}
+                )
+
+        release_id = import_release(
+            self.connection,
+            {**TEST_METADATA, "indications": NEXT_INDICATIONS}, replace=True
+        )
+
+        with self.subTest("replaced"):
+            self.assertEqual(
+                export_release(self.connection, release_id)["indications"],
+                NEXT_INDICATIONS
+            )
+
+        with self.subTest("no leftover"):
+            self.assertEqual(
+                [release["indications"] for release in list_releases(
+                    self.connection
+                )], [2, 2]
+            )
+
+    def test_query_indications(self):
+        """ Test the gene, panel and R code lookups across releases """
+
+        with self.subTest("gene"):
+            self.assertEqual(
+                [
+                    (row["date"], row["code"]) for row in query_indications(
+                        self.connection, hgnc_id="HGNC:1100"
+                    )
+                ], [("240226", "R200.1"), ("240401", "R200.2")]
+            )
+
+        with self.subTest("panel"):
+            self.assertEqual(
+                [
+                    (row["date"], row["code"]) for row in query_indications(
+                        self.connection, panel_id="100"
+                    )
+                ], [("240226", "R100.1"), ("240401", "R200.2")]
+            )
+
+        with self.subTest("R code"):
+            self.assertEqual(
+                [
+                    (row["date"], row["code"]) for row in query_indications(
+                        self.connection, r_code="R200"
+                    )
+                ], [
+                    ("240226", "R200.1"), ("240401", "R200.1"),
+                    ("240401", "R200.2")
+                ]
+            )
+
+        with self.subTest("test code"):
+            self.assertEqual(
+                len(query_indications(self.connection, r_code="R200.2")), 1
+            )
+
+    def test_query_uses_indexes(self):
+        """ Test that the lookups don't scan the indication and target
+        tables """
+
+        for column, table in [
+            ("indication.r_code", "indication"),
+            ("target.panel_id", "target"),
+        ]:
+            plan = " ".join(
+                row[3] for row in self.connection.execute(
+                    f"EXPLAIN QUERY PLAN SELECT * FROM {table} "
+                    f"WHERE {column} = ?", ("R200",)
+                )
+            )
+
+            with self.subTest(column):
+                self.assertIn("USING INDEX", plan)
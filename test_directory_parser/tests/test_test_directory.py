@@ -1,12 +1,20 @@
 import json
 from pathlib import Path
+import tempfile
 import unittest
 from unittest.mock import patch
 
+import openpyxl
 import pandas as pd
 
+from test_directory_parser import json_output
+from test_directory_parser.hgnc import load_hgnc_index
+from test_directory_parser.pipeline import run_rare_disease, run_release
 from test_directory_parser.clinical_indication import ClinicalIndication
 from test_directory_parser.test_directory import TestDirectory
+from test_directory_parser.tests.synthetic_data import (
+    build_test_directory, write_inputs
+)
 from test_directory_parser.utils import get_date
 
 PATH_TO_TEST_FOLDER = Path(".") / "test_directory_parser" / "tests" / "test_data"
@@ -62,7 +70,7 @@ class TestTestDirectory(unittest.TestCase):
 
     def tearDown(self) -> None:
         # reset the filtered_clinical_indications attributes for further testing 
-        self.td.filtered_clinical_indications = []
+        self.td.filtered_clinical_indications = None
 
     def test_setup_clinical_indications(self):
         """ Test for setting up clinical indications i.e. adding them to the
@@ -87,6 +95,21 @@ class TestTestDirectory(unittest.TestCase):
         with self.subTest():
             self.assertEqual(len(self.td.all_clinical_indications), 2)
 
+    def test_reset_clinical_indications(self):
+        """ Test that the setup can be run again after a reset without
+        indexing the clinical indications twice """
+
+        self.td.reset_clinical_indications()
+        self.td.setup_clinical_indications()
+
+        with self.subTest():
+            self.assertEqual(len(self.td.all_clinical_indications), 2)
+
+        with self.subTest():
+            self.assertEqual(
+                len(self.td.find_indications(test_method="WES")), 1
+            )
+
     def test_filter_clinical_indications_present(self):
         """ Test filter clinical indications method with internal TD having a
         clinical indication 
@@ -144,6 +167,70 @@ class TestTestDirectory(unittest.TestCase):
         with self.assertRaises(AssertionError):
             self.td.filter_clinical_indications(test_internal_td)
 
+    def test_filter_clinical_indications_lenient(self):
+        """ Test filter clinical indications method in lenient mode with
+        internal TD missing a clinical indication
+
+        Test setup:
+        - TD contains R100.1 and R200.1
+        - Internal TD contains R100.1 and R100.2
+
+        Expectation:
+        - R100.1 is kept and R100.2 is reported as missing without error
+        """
+
+        test_internal_td = pd.DataFrame(
+            {
+                "Test ID": ["R100.1", "R100.2"],
+                "NGS Technology": ["WES", "WES"]
+            }
+        )
+
+        kept_clinical_indications, missing_test_ids = (
+            self.td.filter_clinical_indications(test_internal_td, False)
+        )
+
+        with self.subTest():
+            self.assertEqual(
+                [ci.r_code for ci in kept_clinical_indications], ["R100.1"]
+            )
+
+        with self.subTest():
+            self.assertEqual(missing_test_ids, {"R100.2"})
+
+    def test_filter_clinical_indications_none_kept(self):
+        """ Test filter clinical indications method in lenient mode with an
+        internal TD matching no clinical indication
+
+        Test setup:
+        - TD contains R100.1 and R200.1
+        - Internal TD contains R999.9 and a blank row
+
+        Expectation:
+        - No clinical indication is output instead of every NGS one
+        - The blank row isn't reported as a missing test
+        """
+
+        test_internal_td = pd.DataFrame(
+            {
+                "Test ID": ["R999.9", float("nan")],
+                "NGS Technology": ["WES", float("nan")]
+            }
+        )
+
+        kept_clinical_indications, missing_test_ids = (
+            self.td.filter_clinical_indications(test_internal_td, False)
+        )
+
+        with self.subTest("kept"):
+            self.assertEqual(kept_clinical_indications, [])
+
+        with self.subTest("output"):
+            self.assertEqual(self.td.get_indications(), [])
+
+        with self.subTest("missing"):
+            self.assertEqual(missing_test_ids, {"R999.9"})
+
     def test_output_json_no_internal_td(self):
         """ Test output json method
         
@@ -178,6 +265,35 @@ class TestTestDirectory(unittest.TestCase):
             self.assertEqual(json.loads(f.read()), expected_output)
             
 
+    def test_output_json_blank_cells(self):
+        """ Test that blank cells are output as null with and without orjson
+        """
+
+        ci = self.td.ngs_clinical_indications[0]
+        change = ci.change
+        ci.change = float("nan")
+        outputs = []
+
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                output = Path(tmp_dir) / "output.json"
+
+                for orjson in [json_output.orjson, None]:
+                    with patch.object(json_output, "orjson", orjson):
+                        self.td.output_json(output, "compact")
+
+                    outputs.append(output.read_bytes())
+        finally:
+            ci.change = change
+
+        with self.subTest("same output"):
+            self.assertEqual(outputs[0], outputs[1])
+
+        with self.subTest("null"):
+            self.assertIsNone(
+                json.loads(outputs[0])["indications"][0]["changes"]
+            )
+
     @patch("test_directory_parser.utils.find_hgnc_id")
     def test_output_json_with_internal_td(self, mock_hgnc_id):
         """ Test output json method
@@ -228,3 +344,142 @@ class TestTestDirectory(unittest.TestCase):
         with open(PATH_TO_TEST_FOLDER / "test_output.json") as f:
             self.assertEqual(json.loads(f.read()), expected_output)
             
+
+
+class TestShardedTestDirectory(unittest.TestCase):
+    """ Test that building the clinical indications in a process pool gives
+    the same output as building them serially """
+
+    def test_setup_clinical_indications_processes(self):
+        """ Test that the output is byte identical and that the targets not
+        cleaned in the workers can still be cleaned """
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            hgnc_tsv, workbook, ngs_test_ids = write_inputs(tmp_dir, 100, 500)
+            hgnc_index = load_hgnc_index(hgnc_tsv)
+            outputs = []
+            test_directories = []
+
+            for processes in [None, 3]:
+                td = build_test_directory(
+                    workbook, hgnc_index, processes=processes
+                )
+                output = Path(tmp_dir) / f"output_{processes}.json"
+                td.output_json(output)
+                outputs.append(output.read_bytes())
+                test_directories.append(td)
+
+            with self.subTest("output"):
+                self.assertEqual(outputs[0], outputs[1])
+
+            with self.subTest("lazy targets"):
+                # the targets that aren't output are still cleaned on access
+                serial_td, sharded_td = test_directories
+                self.assertEqual(
+                    [ci.genes for ci in sharded_td.all_clinical_indications],
+                    [ci.genes for ci in serial_td.all_clinical_indications]
+                )
+
+
+class TestRelease(unittest.TestCase):
+    """ Test the parsing of several sheets of a test directory """
+
+    def test_run_release(self):
+        """ Test that one output is written per sheet type, that the workbook
+        is opened once and that the rare disease output is the same as when
+        parsing the sheet alone """
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            hgnc_tsv, workbook, ngs_test_ids = write_inputs(
+                tmp_dir, 30, cancer_rows=20
+            )
+            hgnc_index = load_hgnc_index(hgnc_tsv)
+            outputs = {
+                "rare_disease": Path(tmp_dir) / "rd.json",
+                "cancer": Path(tmp_dir) / "cancer.json"
+            }
+            expected_rd_output = Path(tmp_dir) / "expected_rd.json"
+
+            with patch(
+                "openpyxl.load_workbook", wraps=openpyxl.load_workbook
+            ) as mock_load_workbook:
+                test_directories = run_release(
+                    workbook, {
+                        "rare_disease": "configs/240226_RD.json",
+                        "cancer": "configs/240226_cancer.json"
+                    }, hgnc_index, outputs
+                )
+            run_rare_disease(
+                workbook, "configs/240226_RD.json", hgnc_index,
+                expected_rd_output
+            )
+
+            with self.subTest("rare disease"):
+                self.assertEqual(
+                    outputs["rare_disease"].read_bytes(),
+                    expected_rd_output.read_bytes()
+                )
+
+            with self.subTest("cancer"):
+                with open(outputs["cancer"]) as f:
+                    cancer_output = json.load(f)
+
+                self.assertEqual(
+                    cancer_output["config_source"], "240226_cancer"
+                )
+
+            with self.subTest("td_type"):
+                self.assertEqual(
+                    test_directories["cancer"].td_type, "cancer"
+                )
+
+            with self.subTest("workbook opened once"):
+                self.assertEqual(mock_load_workbook.call_count, 1)
+
+
+class TestRunRareDisease(unittest.TestCase):
+    """ Test the header validation of the rare disease pipeline """
+
+    def test_validation(self):
+        """ Test that a wrong config fails before the sheet is loaded and
+        that a cached sheet doesn't open the workbook at all """
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            hgnc_tsv, workbook, ngs_test_ids = write_inputs(tmp_dir, 20)
+            config = Path(tmp_dir) / "config.json"
+            cache_dir = Path(tmp_dir) / "cache"
+            hgnc_index = load_hgnc_index(hgnc_tsv)
+
+            with open("configs/240226_RD.json") as f:
+                config_data = json.load(f)
+
+            with open(config, "w") as f:
+                json.dump({**config_data, "ngs_column": "NGS Tech"}, f)
+
+            with patch(
+                "test_directory_parser.rare_disease.pd.read_excel"
+            ) as mock_read_excel:
+                with self.assertRaisesRegex(
+                    Exception, "Missing column 'NGS Tech'"
+                ):
+                    run_rare_disease(workbook, config, hgnc_index, None)
+
+            with self.subTest("validated before loading"):
+                mock_read_excel.assert_not_called()
+
+            for streaming in [False, True]:
+                run_rare_disease(
+                    workbook, "configs/240226_RD.json", hgnc_index, None,
+                    streaming=streaming, cache_dir=cache_dir
+                )
+
+            with patch(
+                "openpyxl.load_workbook", wraps=openpyxl.load_workbook
+            ) as mock_load_workbook:
+                run_rare_disease(
+                    workbook, "configs/240226_RD.json", hgnc_index, None,
+                    cache_dir=cache_dir
+                )
+
+            with self.subTest("cache hit"):
+                mock_load_workbook.assert_not_called()
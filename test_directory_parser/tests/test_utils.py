@@ -7,7 +7,7 @@ import numpy as np
 import pandas as pd
 
 from test_directory_parser.utils import (
-    get_date, parse_tsv, parse_lab_excel, find_hgnc_id
+    get_date, parse_tsv, parse_lab_excel, find_hgnc_id, find_hgnc_ids
 )
 
 # path to the test folder containing all the data that will be used in the tests
@@ -167,3 +167,47 @@ class TestUtils(unittest.TestCase):
 
             with self.subTest(test_msg):
                 self.assertTrue(test_output.equals(expected_output))
+
+    def test_find_hgnc_ids(self):
+        """ Test for find_hgnc_ids function. The batch output should match
+        find_hgnc_id for every symbol and duplicates should be resolved once
+        """
+
+        test_hgnc_dump = pd.DataFrame(
+            {
+                "HGNC ID": [
+                    "HGNC:1100", "HGNC:28470", "HGNC:1550", "HGNC:1601",
+                    "HGNC:11577", "HGNC:24042"
+                ],
+                "Approved symbol": [
+                    "BRCA1", "BRCA1P1", "CBS", "RYR1", "TAFAZZIN", "WWTR1"
+                ],
+                "Previous symbols": [
+                    "MULTIPLE_PREVIOUS", "MULTIPLE_PREVIOUS", None,
+                    "MHS, MHS1, CCO", "CMD3A, EFE2, EFE, TAZ", None
+                ],
+                "Alias symbols": [
+                    "RNF53, BRCC1, PPP1R53, FANCS",
+                    "LBRCA1, PsiBRCA1, pseudo-BRCA1", "HIP4", "RYR, PPP1R137",
+                    "BTHS, G4.5", "TAZ, DKFZp586I1419"
+                ]
+            }
+        )
+        test_symbols = [
+            "BRCA1", "TAZ", "HIP4", "UNKNOWN", "CCO", "MULTIPLE_PREVIOUS",
+            "BRCA1"
+        ]
+
+        test_output = find_hgnc_ids(test_symbols, test_hgnc_dump)
+
+        with self.subTest("Deduplicated symbols"):
+            self.assertEqual(len(test_output), 6)
+
+        for symbol in test_symbols:
+            expected_output = find_hgnc_id(symbol, test_hgnc_dump)
+
+            with self.subTest(symbol):
+                self.assertEqual(
+                    test_output.loc[symbol].to_dict(),
+                    expected_output.to_dict()
+                )
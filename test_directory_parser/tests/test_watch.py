@@ -0,0 +1,158 @@
+import asyncio
+import contextlib
+import io
+import os
+from pathlib import Path
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from test_directory_parser import batch
+from test_directory_parser import hgnc
+from test_directory_parser import watch
+from test_directory_parser.tests.synthetic_data import write_inputs
+
+CONFIG_DIR = Path(__file__).resolve().parents[2] / "configs"
+
+
+def crash_workbook(workbook: str, *args):
+    """ Kill the worker process like an out of memory error would for the
+    workbooks named crash, succeed for the others """
+
+    if Path(workbook).stem == "crash":
+        os._exit(1)
+
+    return f"{workbook}.json", 0, None
+
+
+class TestWatch(unittest.TestCase):
+    """ Suite of tests for the watch.py script """
+
+    def test_scan_directory(self):
+        """ Test that only workbooks are listed, without the lock files """
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for name in ["td.xlsx", "~$td.xlsx", "output.json"]:
+                (Path(tmp_dir) / name).write_bytes(b"data")
+
+            self.assertEqual(
+                list(watch.scan_directory(tmp_dir)),
+                [str(Path(tmp_dir) / "td.xlsx")]
+            )
+
+    def test_drop_missing(self):
+        """ Test that the workbooks removed from the directory are forgotten
+        """
+
+        states = {"kept.xlsx": (1, 1), "removed.xlsx": (1, 1)}
+        watch.drop_missing(states, {"kept.xlsx": (1, 2)})
+        self.assertEqual(states, {"kept.xlsx": (1, 1)})
+
+    def test_process_workbook_config(self):
+        """ Test that a workbook in the 2023 layout, matched equally by
+        230401_RD and 231001_RD, fails without a config and is parsed with
+        the config given """
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            hgnc_tsv, workbook_path, ngs_test_ids = write_inputs(
+                tmp_dir, 10, 100, layout="2023"
+            )
+            config_paths = sorted(CONFIG_DIR.glob("*.json"))
+
+            with patch.object(
+                batch, "HGNC_DATA", hgnc.load_hgnc_index(hgnc_tsv)
+            ):
+                output, elapsed, tie_error = watch.process_workbook(
+                    str(workbook_path), config_paths, tmp_dir
+                )
+                output, elapsed, error = watch.process_workbook(
+                    str(workbook_path), config_paths, tmp_dir,
+                    config=str(CONFIG_DIR / "231001_RD.json")
+                )
+
+            with self.subTest("tie"):
+                self.assertIn("equally", tie_error)
+
+            with self.subTest("config"):
+                self.assertIsNone(error)
+
+            with self.subTest("output"):
+                self.assertTrue(Path(output).exists())
+
+    def test_watch(self):
+        """ Test that a workbook dropped in the watched directory is parsed
+        once with the matching config """
+
+        async def run(directory, workbook, hgnc_data, output):
+            stop = asyncio.Event()
+            watch_task = asyncio.create_task(
+                watch.watch(
+                    directory, sorted(CONFIG_DIR.glob("*.json")), hgnc_data,
+                    processes=1, interval=0.05, settle=0.1, stop=stop
+                )
+            )
+            await asyncio.sleep(0.1)
+            shutil.copy(workbook, directory)
+            start = time.monotonic()
+
+            while not output.exists() and time.monotonic() - start < 30:
+                await asyncio.sleep(0.05)
+
+            stop.set()
+            await watch_task
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            directory = Path(tmp_dir) / "watched"
+            directory.mkdir()
+            hgnc_tsv, workbook, ngs_test_ids = write_inputs(tmp_dir, 10, 100)
+            output = directory / "test_directory.json"
+
+            asyncio.run(
+                run(
+                    directory, workbook, hgnc.load_hgnc_index(hgnc_tsv),
+                    output
+                )
+            )
+
+            self.assertTrue(output.exists())
+
+    @patch("test_directory_parser.watch.process_workbook", crash_workbook)
+    def test_watch_dead_worker(self):
+        """ Test that a dead worker process fails its workbook and that the
+        next workbooks are parsed by new worker processes """
+
+        async def run(directory, stdout):
+            stop = asyncio.Event()
+            watch_task = asyncio.create_task(
+                watch.watch(
+                    directory, [], None, processes=1, interval=0.05,
+                    settle=0.1, stop=stop
+                )
+            )
+
+            for name, expected in [("crash", "FAILED"), ("ok", "OK")]:
+                (directory / f"{name}.xlsx").write_bytes(b"data")
+                start = time.monotonic()
+
+                while (
+                    f"{expected}\t" not in stdout.getvalue() and
+                    time.monotonic() - start < 30
+                ):
+                    await asyncio.sleep(0.05)
+
+            stop.set()
+            await watch_task
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            stdout = io.StringIO()
+
+            with contextlib.redirect_stdout(stdout):
+                asyncio.run(run(Path(tmp_dir), stdout))
+
+            with self.subTest("failed"):
+                self.assertIn("BrokenProcessPool", stdout.getvalue())
+
+            with self.subTest("next workbook"):
+                self.assertIn("OK\t", stdout.getvalue())
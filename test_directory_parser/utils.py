@@ -4,6 +4,8 @@ import numpy as np
 import pandas as pd
 import regex
 
+from test_directory_parser import hgnc
+
 
 def get_date():
     """ Return date as string in the following format: YYMMDD
@@ -51,7 +53,8 @@ def find_hgnc_id(gene_symbol: str, hgnc_dump: pd.DataFrame) -> pd.DataFrame:
 
     Args:
         gene_symbol (str): Gene symbol
-        hgnc_dump (pd.Dataframe): Hgnc dump dataframe
+        hgnc_dump (pd.Dataframe): Hgnc dump dataframe or HgncIndex built from
+        it
 
     Raises:
         Exception: if a panel has escaped previous checks
@@ -61,6 +64,10 @@ def find_hgnc_id(gene_symbol: str, hgnc_dump: pd.DataFrame) -> pd.DataFrame:
         look in the alias or previous columns to solve the symbol
     """
 
+    # use the prebuilt index or lookup file instead of scanning the dataframe
+    if isinstance(hgnc_dump, hgnc.HgncResolver):
+        return hgnc_dump.find_hgnc_id(gene_symbol)
+
     df_res = pd.Series(
         [gene_symbol, None, None, None], index=[
             "Gene symbol", "HGNC ID", "Previous", "Alias"
@@ -146,3 +153,109 @@ def find_hgnc_id(gene_symbol: str, hgnc_dump: pd.DataFrame) -> pd.DataFrame:
     df_res.at["HGNC ID"] = hgnc_id
 
     return df_res
+
+
+def explode_symbols(hgnc_dump: pd.DataFrame, column: str) -> pd.DataFrame:
+    """ Create a table with one row per symbol of a comma separated symbol
+    column of the HGNC dump
+
+    Args:
+        hgnc_dump (pd.DataFrame): Hgnc dump dataframe
+        column (str): Name of the column i.e. Previous symbols
+
+    Returns:
+        pd.DataFrame: Dataframe with a "Symbol" and a "HGNC ID" column
+    """
+
+    exploded_symbols = hgnc_dump[column].str.split(",").explode()
+    exploded_symbols = exploded_symbols.str.strip()
+    symbols = pd.DataFrame(
+        {
+            "Symbol": exploded_symbols,
+            "HGNC ID": hgnc_dump["HGNC ID"].reindex(exploded_symbols.index)
+        }
+    )
+    symbols = symbols[symbols["Symbol"].notna() & (symbols["Symbol"] != "")]
+    # a row listing the same symbol twice only counts once
+    return symbols.reset_index().drop_duplicates(
+        ["index", "Symbol"]
+    ).drop(columns="index")
+
+
+def find_hgnc_ids(symbols, hgnc_dump: pd.DataFrame) -> pd.DataFrame:
+    """ Find the hgnc ids of multiple gene symbols at once using merges
+    against the approved, previous and alias symbols
+
+    Args:
+        symbols (iterable): Gene symbols, duplicates are resolved once
+        hgnc_dump (pd.Dataframe): Hgnc dump dataframe or HgncIndex built from
+        it
+
+    Returns:
+        pd.DataFrame: Dataframe indexed by gene symbol with the same columns
+        as the output of find_hgnc_id
+    """
+
+    columns = ["Gene symbol", "HGNC ID", "Previous", "Alias"]
+    unique_symbols = list(dict.fromkeys(symbols))
+
+    if not unique_symbols:
+        return pd.DataFrame(columns=columns)
+
+    if isinstance(hgnc_dump, hgnc.HgncResolver):
+        return hgnc_dump.find_hgnc_ids(unique_symbols)
+
+    df_res = pd.DataFrame({"Gene symbol": unique_symbols})
+
+    approved_symbols = hgnc_dump.loc[
+        hgnc_dump["Approved symbol"].notna(), ["Approved symbol", "HGNC ID"]
+    ].drop_duplicates("Approved symbol").rename(
+        columns={"Approved symbol": "Gene symbol", "HGNC ID": "Approved ID"}
+    )
+    df_res = df_res.merge(approved_symbols, how="left", on="Gene symbol")
+
+    for column, name in [
+        ("Previous symbols", "Previous"), ("Alias symbols", "Alias")
+    ]:
+        symbol_counts = explode_symbols(hgnc_dump, column).groupby(
+            "Symbol"
+        )["HGNC ID"].agg(["first", "size"]).rename(
+            columns={"first": f"{name} ID", "size": f"{name} count"}
+        )
+        df_res = df_res.merge(
+            symbol_counts, how="left", left_on="Gene symbol",
+            right_index=True
+        )
+        df_res[f"{name} count"] = df_res[f"{name} count"].fillna(0)
+
+    approved = df_res["Approved ID"].notna()
+    symbol_like = df_res["Gene symbol"].str.match(r"[A-Z]+[A-Z0-9]+")
+    previous_count = df_res["Previous count"]
+    alias_count = df_res["Alias count"]
+    # rows where the previous and alias symbols are used and at least one of
+    # them matched
+    fallback = ~approved & symbol_like & (
+        (previous_count > 0) | (alias_count > 0)
+    )
+    only_previous = fallback & (previous_count == 1) & (alias_count == 0)
+    only_alias = fallback & (previous_count == 0) & (alias_count == 1)
+
+    hgnc_ids = pd.Series(None, index=df_res.index, dtype=object)
+    hgnc_ids[approved] = df_res.loc[approved, "Approved ID"]
+    hgnc_ids[only_previous] = df_res.loc[only_previous, "Previous ID"]
+    hgnc_ids[only_alias] = df_res.loc[only_alias, "Alias ID"]
+
+    previous = pd.Series(None, index=df_res.index, dtype=object)
+    previous[fallback] = previous_count[fallback] > 0
+    alias = pd.Series(None, index=df_res.index, dtype=object)
+    alias[fallback] = alias_count[fallback] > 0
+
+    df_res = pd.DataFrame(
+        {
+            "Gene symbol": df_res["Gene symbol"], "HGNC ID": hgnc_ids,
+            "Previous": previous, "Alias": alias
+        }, columns=columns, dtype=object
+    )
+    # replace NA by None like find_hgnc_id
+    df_res = df_res.where(df_res.notna(), None)
+    return df_res.set_index("Gene symbol", drop=False)
@@ -0,0 +1,243 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+import time
+import traceback
+
+from test_directory_parser import batch
+from test_directory_parser import pipeline
+from test_directory_parser import rare_disease
+
+
+def scan_directory(directory: str) -> dict:
+    """ Get the size and modification time of the workbooks of a directory
+
+    Args:
+        directory (str): Path to the watched directory
+
+    Returns:
+        dict: Dict of workbook paths to their (size, mtime) tuple
+    """
+
+    workbooks = {}
+
+    for path in Path(directory).glob("*.xlsx"):
+        # skip the lock files of open workbooks
+        if path.name.startswith("~$"):
+            continue
+
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+
+        workbooks[str(path)] = (stat.st_size, stat.st_mtime_ns)
+
+    return workbooks
+
+
+def drop_missing(states: dict, workbooks: dict):
+    """ Forget the workbooks that are no longer in the watched directory
+
+    Args:
+        states (dict): Dict of workbook paths to what is known about them
+        workbooks (dict): Workbooks found by scan_directory
+    """
+
+    for workbook in set(states) - set(workbooks):
+        del states[workbook]
+
+
+def process_workbook(
+    workbook: str, config_paths: list, output_dir: str,
+    lab_excel: str = None, streaming: bool = False, cache_dir: str = None,
+    config: str = None
+):
+    """ Select the config of a workbook and parse it in a worker process
+    initialised with batch.init_worker
+
+    Args:
+        workbook (str): Path to the test directory
+        config_paths (list): Paths to the configs to select from
+        output_dir (str): Directory of the outputs
+        lab_excel (str, optional): Excel file containing the clinical
+        indications that the lab handles
+        streaming (bool, optional): Whether to read the test directory row by
+        row using a read-only workbook
+        cache_dir (str, optional): Path to the cache directory
+        config (str, optional): Path to the config to use whenever it
+        matches the header of the workbook
+
+    Returns:
+        tuple: Path to the output, wall time in seconds and traceback of the
+        error if the parsing failed, None otherwise
+    """
+
+    start = time.perf_counter()
+    output = str(Path(output_dir) / f"{Path(workbook).stem}.json")
+
+    try:
+        config = rare_disease.select_config(
+            workbook, config_paths, preferred_config=config
+        )
+        pipeline.run_rare_disease(
+            workbook, config, batch.HGNC_DATA, output, lab_excel, streaming,
+            cache_dir
+        )
+    except Exception:
+        return output, time.perf_counter() - start, traceback.format_exc()
+
+    return output, time.perf_counter() - start, None
+
+
+async def run_workbook(
+    executor: ProcessPoolExecutor, workbook: str, *args
+):
+    """ Parse a workbook in the process pool and print the outcome
+
+    Args:
+        executor (ProcessPoolExecutor): Pool of worker processes
+        workbook (str): Path to the test directory
+        *args: Other arguments of process_workbook
+
+    Returns:
+        bool: Whether a worker process died, breaking the pool
+    """
+
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    broken = False
+
+    try:
+        output, elapsed, error = await loop.run_in_executor(
+            executor, process_workbook, workbook, *args
+        )
+    except Exception as e:
+        # i.e. BrokenProcessPool when a worker process died
+        broken = isinstance(e, BrokenProcessPool)
+        output, elapsed, error = (
+            None, time.perf_counter() - start, traceback.format_exc()
+        )
+
+    if error:
+        print(f"FAILED\t{elapsed:.2f}s\t{workbook}\n{error}")
+    else:
+        print(f"OK\t{elapsed:.2f}s\t{workbook}\t{output}")
+
+    return broken
+
+
+async def watch(
+    directory: str, config_paths: list, hgnc_data, output_dir: str = None,
+    lab_excel: str = None, processes: int = None, interval: float = 2,
+    settle: float = 2, streaming: bool = False, cache_dir: str = None,
+    config: str = None, stop: asyncio.Event = None
+):
+    """ Watch a directory and parse the new or changed workbooks once they
+    stopped changing
+
+    Args:
+        directory (str): Path to the watched directory
+        config_paths (list): Paths to the configs to select from
+        hgnc_data (HgncResolver): HgncIndex or HgncLookupFile, sent once to
+        every worker process
+        output_dir (str, optional): Directory of the outputs, defaults to the
+        watched directory
+        lab_excel (str, optional): Excel file containing the clinical
+        indications that the lab handles. Every workbook is parsed again
+        when it changes
+        processes (int, optional): Number of worker processes
+        interval (float, optional): Seconds between 2 scans of the directory
+        settle (float, optional): Seconds during which the size and
+        modification time of a workbook must not change before parsing it
+        streaming (bool, optional): Whether to read the test directories row
+        by row using a read-only workbook
+        cache_dir (str, optional): Path to the cache directory
+        config (str, optional): Path to the config to use for the workbooks
+        whose header it matches, i.e. when several configs match equally
+        stop (asyncio.Event, optional): Event stopping the watch when set
+    """
+
+    output_dir = output_dir or directory
+    stop = stop or asyncio.Event()
+    loop = asyncio.get_running_loop()
+    # last (size, mtime) of every workbook and when it was first seen
+    seen = {}
+    # (size, mtime) of the workbooks when they were last parsed
+    processed = {}
+    lab_excel_path = Path(lab_excel).resolve() if lab_excel else None
+    lab_excel_mtime = None
+    tasks = set()
+    # set when a worker process died, the pool is then replaced
+    pool_broken = asyncio.Event()
+
+    def create_executor() -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=processes, initializer=batch.init_worker,
+            initargs=(hgnc_data,)
+        )
+
+    def on_done(task: asyncio.Task):
+        tasks.discard(task)
+
+        if not task.cancelled() and task.result():
+            pool_broken.set()
+
+    executor = create_executor()
+
+    try:
+        while not stop.is_set():
+            if pool_broken.is_set():
+                print("A worker process died, starting new worker processes")
+                executor.shutdown(wait=False)
+                executor = create_executor()
+                pool_broken.clear()
+
+            workbooks = scan_directory(directory)
+            drop_missing(seen, workbooks)
+            drop_missing(processed, workbooks)
+
+            if lab_excel_path and lab_excel_path.exists():
+                mtime = lab_excel_path.stat().st_mtime_ns
+
+                if lab_excel_mtime not in (None, mtime):
+                    print(f"{lab_excel} changed, parsing the workbooks again")
+                    processed = {}
+
+                lab_excel_mtime = mtime
+
+            for workbook, stat in workbooks.items():
+                if Path(workbook).resolve() == lab_excel_path:
+                    continue
+
+                if processed.get(workbook) == stat:
+                    continue
+
+                if workbook not in seen or seen[workbook][0] != stat:
+                    # new or still being written
+                    seen[workbook] = (stat, loop.time())
+                    continue
+
+                if loop.time() - seen[workbook][1] < settle:
+                    continue
+
+                processed[workbook] = stat
+                task = asyncio.create_task(
+                    run_workbook(
+                        executor, workbook, config_paths, output_dir,
+                        lab_excel, streaming, cache_dir, config
+                    )
+                )
+                tasks.add(task)
+                task.add_done_callback(on_done)
+
+            try:
+                await asyncio.wait_for(stop.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+
+        if tasks:
+            await asyncio.gather(*tasks)
+    finally:
+        executor.shutdown()